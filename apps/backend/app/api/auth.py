@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession as Session
 
 from app.schemas.auth import AuthSchema
 from app.database import get_db
@@ -11,9 +11,9 @@ auth_router = APIRouter()
 
 
 @auth_router.post("/signup", status_code=status.HTTP_200_OK)
-def signup(input_data: AuthSchema, db: Session = Depends(get_db)):
+async def signup(input_data: AuthSchema, db: Session = Depends(get_db)):
     try:
-        data = AuthService.signup(input_data=input_data, db=db)
+        data = await AuthService.signup(input_data=input_data, db=db)
         return ResponseSchema(
             success=True, message="user created successfully", data=data
         )
@@ -28,9 +28,9 @@ def signup(input_data: AuthSchema, db: Session = Depends(get_db)):
 
 
 @auth_router.post("/signin", status_code=status.HTTP_200_OK)
-def signin(input_data: AuthSchema, db: Session = Depends(get_db)):
+async def signin(input_data: AuthSchema, db: Session = Depends(get_db)):
     try:
-        data = AuthService.signin(input_data=input_data, db=db)
+        data = await AuthService.signin(input_data=input_data, db=db)
         return ResponseSchema(
             success=True, message="user signed in successfully", data=data
         )
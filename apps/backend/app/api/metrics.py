@@ -0,0 +1,32 @@
+from fastapi import APIRouter, Depends, status
+
+from app.core.rag.cache import answer_cache, retrieval_cache
+from app.core.rag.rerank import reranker
+from app.core.utils.rag.provider import llm_client
+from app.core.utils.hash import hasher
+from app.core.utils.user_cache import user_cache
+from app.database.main import pool_stats
+from app.middlewares.auth_middleware import auth_middleware
+from app.schemas.response import ResponseSchema
+
+metrics_router = APIRouter()
+
+
+# load and usage figures stay behind auth, like the session routes
+@metrics_router.get(
+    "/", status_code=status.HTTP_200_OK, dependencies=[Depends(auth_middleware)]
+)
+def get_metrics():
+    return ResponseSchema(
+        success=True,
+        message="metrics fetched successfully",
+        data={
+            "db_pool": pool_stats(),
+            "answer_cache": answer_cache.stats(),
+            "retrieval_cache": retrieval_cache.stats(),
+            "reranker": reranker.stats(),
+            "llm": llm_client.stats(),
+            "user_cache": user_cache.stats(),
+            "hashing": hasher.stats(),
+        },
+    )
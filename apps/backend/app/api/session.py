@@ -1,6 +1,5 @@
 from fastapi import (
     APIRouter,
-    BackgroundTasks,
     Depends,
     File,
     HTTPException,
@@ -8,7 +7,8 @@ from fastapi import (
     UploadFile,
     status,
 )
-from sqlalchemy.orm import Session
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession as Session
 
 from app.database.main import get_db
 from app.core.s3.aws import ALLOWED_CONTENT_TYPES
@@ -17,22 +17,16 @@ from app.services.session import SessionService
 from app.core.utils.exceptions.base import DomainError
 from app.schemas.response import ResponseSchema
 from app.middlewares.auth_middleware import auth_middleware
-from app.core.utils.params import get_pagination
+from app.core.utils.params import get_cursor, get_pagination
 
 session_router = APIRouter()
 
 
-def model_to_dict(obj):
-    """Convert SQLAlchemy model instance to dictionary"""
-    return {c.name: getattr(obj, c.name) for c in obj.__table__.columns}
-
-
 @session_router.post(
     "/create", status_code=status.HTTP_200_OK, dependencies=[Depends(auth_middleware)]
 )
-def file_upload(
+async def file_upload(
     req: Request,
-    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     db: Session = Depends(get_db),
 ):
@@ -49,9 +43,7 @@ def file_upload(
         )
 
     try:
-        data = SessionService.create_session(
-            file=file, user_id=user["id"], db=db, background_tasks=background_tasks
-        )
+        data = await SessionService.create_session(file=file, user_id=user["id"], db=db)
         return ResponseSchema(
             success=True,
             message="file uploaded successfully",
@@ -67,7 +59,7 @@ def file_upload(
 @session_router.post(
     "/chat", status_code=status.HTTP_200_OK, dependencies=[Depends(auth_middleware)]
 )
-def chat(req: Request, input_data: ChatParams, db: Session = Depends(get_db)):
+async def chat(req: Request, input_data: ChatParams, db: Session = Depends(get_db)):
     user = req.state.user
     if not user:
         raise HTTPException(
@@ -75,11 +67,12 @@ def chat(req: Request, input_data: ChatParams, db: Session = Depends(get_db)):
         )
 
     try:
-        data = SessionService.chat(
+        data = await SessionService.chat(
             session_id=input_data.session_id,
             user_id=user["id"],
             message=input_data.message,
             db=db,
+            retrieval=input_data.retrieval,
         )
         return ResponseSchema(
             success=True, message="chat message processed successfully", data=data
@@ -91,10 +84,44 @@ def chat(req: Request, input_data: ChatParams, db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 
+@session_router.post(
+    "/chat/stream",
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(auth_middleware)],
+)
+async def chat_stream(
+    req: Request, input_data: ChatParams, db: Session = Depends(get_db)
+):
+    user = req.state.user
+    if not user:
+        raise HTTPException(
+            status_code=401, detail="Unauthorized: User not authenticated"
+        )
+
+    try:
+        events = await SessionService.chat_stream(
+            session_id=input_data.session_id,
+            user_id=user["id"],
+            message=input_data.message,
+            db=db,
+            retrieval=input_data.retrieval,
+        )
+        return StreamingResponse(
+            events,
+            media_type="application/x-ndjson",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+    except DomainError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.message)
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+
 @session_router.get(
     "/", status_code=status.HTTP_200_OK, dependencies=[Depends(auth_middleware)]
 )
-def get_sessions(req: Request, db: Session = Depends(get_db)):
+async def get_sessions(req: Request, db: Session = Depends(get_db)):
     user = req.state.user
     if not user:
         raise HTTPException(
@@ -103,15 +130,19 @@ def get_sessions(req: Request, db: Session = Depends(get_db)):
 
     # get pagination params
     limit, offset = get_pagination(req)
+    cursor = get_cursor(req)
 
     try:
-        data = SessionService.get_sessions(
-            user_id=user["id"], db=db, limit=limit, offset=offset
+        data, next_cursor = await SessionService.get_sessions(
+            user_id=user["id"], db=db, limit=limit, offset=offset, cursor=cursor
         )
         return ResponseSchema(
             success=True,
             message="sessions fetched successfully",
-            data={"sessions": [model_to_dict(item) for item in data]},
+            data={
+                "sessions": [item.model_dump() for item in data],
+                "next_cursor": next_cursor,
+            },
         )
     except DomainError as e:
         raise HTTPException(status_code=e.status_code, detail=e.message)
@@ -125,7 +156,7 @@ def get_sessions(req: Request, db: Session = Depends(get_db)):
     status_code=status.HTTP_200_OK,
     dependencies=[Depends(auth_middleware)],
 )
-def get_session(req: Request, session_id: str, db: Session = Depends(get_db)):
+async def get_session(req: Request, session_id: str, db: Session = Depends(get_db)):
     user = req.state.user
     if not user:
         raise HTTPException(
@@ -137,25 +168,25 @@ def get_session(req: Request, session_id: str, db: Session = Depends(get_db)):
 
     # get pagination
     limit, offset = get_pagination(req)
+    cursor = get_cursor(req)
 
     try:
-        data = SessionService.get_session(
-            user_id=user["id"], session_id=session_id, db=db, limit=limit, offset=offset
+        session_data, chats, next_cursor = await SessionService.get_session(
+            user_id=user["id"],
+            session_id=session_id,
+            db=db,
+            limit=limit,
+            offset=offset,
+            cursor=cursor,
         )
-        session_data = data["session"]
-        chats_data = data["chats"]
-
-        session_dict = model_to_dict(session_data)
-        if session_data.document:
-            session_dict["document_name"] = session_data.document.title
-            session_dict["document_url"] = session_data.document.url
 
         return ResponseSchema(
             success=True,
             message="session fetched successfully",
             data={
-                "session": session_dict,
-                "chats": [model_to_dict(item) for item in chats_data],
+                "session": session_data.model_dump(),
+                "chats": [item.model_dump() for item in chats],
+                "next_cursor": next_cursor,
             },
         )
     except DomainError as e:
@@ -163,3 +194,61 @@ def get_session(req: Request, session_id: str, db: Session = Depends(get_db)):
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+
+@session_router.get(
+    "/{session_id}/status",
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(auth_middleware)],
+)
+async def get_ingestion_status(
+    req: Request, session_id: str, db: Session = Depends(get_db)
+):
+    user = req.state.user
+    if not user:
+        raise HTTPException(
+            status_code=401, detail="Unauthorized: User not authenticated"
+        )
+
+    try:
+        data = await SessionService.get_ingestion_status(
+            session_id=session_id, user_id=user["id"], db=db
+        )
+        return ResponseSchema(
+            success=True,
+            message="ingestion status fetched successfully",
+            data=data.model_dump(),
+        )
+    except DomainError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.message)
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+
+@session_router.post(
+    "/{session_id}/retry",
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(auth_middleware)],
+)
+async def retry_ingestion(req: Request, session_id: str, db: Session = Depends(get_db)):
+    user = req.state.user
+    if not user:
+        raise HTTPException(
+            status_code=401, detail="Unauthorized: User not authenticated"
+        )
+
+    try:
+        data = await SessionService.retry_ingestion(
+            session_id=session_id, user_id=user["id"], db=db
+        )
+        return ResponseSchema(
+            success=True,
+            message="document queued for ingestion",
+            data=data.model_dump(),
+        )
+    except DomainError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.message)
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
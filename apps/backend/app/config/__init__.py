@@ -7,16 +7,95 @@ load_dotenv()
 
 env = EnvSchema(
     access_token_secret=os.getenv("ACCESS_TOKEN_SECRET", ""),
+    access_token_ttl=int(os.getenv("ACCESS_TOKEN_TTL", "0")),
+    auth_trust_claims=os.getenv("AUTH_TRUST_CLAIMS", "False").lower() == "true",
+    user_cache_size=int(os.getenv("USER_CACHE_SIZE", "10000")),
+    user_cache_ttl=float(os.getenv("USER_CACHE_TTL", "60")),
+    bcrypt_rounds=int(os.getenv("BCRYPT_ROUNDS", "12")),
+    hashing_mode=os.getenv("HASHING_MODE", "process"),
+    hashing_workers=int(os.getenv("HASHING_WORKERS", "2")),
+    hashing_max_pending=int(os.getenv("HASHING_MAX_PENDING", "32")),
     aws_access_key=os.getenv("AWS_ACCESS_KEY", ""),
     aws_secret_key=os.getenv("AWS_SECRET_KEY", ""),
     aws_region=os.getenv("AWS_REGION", ""),
     aws_cloudfront_url=os.getenv("AWS_CLOUDFRONT_URL", ""),
     database_uri=os.getenv("DATABASE_URI", ""),
+    database_async_uri=os.getenv("DATABASE_ASYNC_URI", ""),
+    db_pool_size=int(os.getenv("DB_POOL_SIZE", "5")),
+    db_max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "10")),
+    db_pool_timeout=float(os.getenv("DB_POOL_TIMEOUT", "30")),
+    db_pool_recycle=int(os.getenv("DB_POOL_RECYCLE", "1800")),
+    db_pool_pre_ping=os.getenv("DB_POOL_PRE_PING", "True").lower() == "true",
     aws_bucket=os.getenv("AWS_BUCKET", ""),
+    s3_part_size=int(os.getenv("S3_PART_SIZE", str(8 * 1024 * 1024))),
+    s3_upload_concurrency=int(os.getenv("S3_UPLOAD_CONCURRENCY", "4")),
     port=int(os.getenv("PORT", "8080")),
     chromadb_host=os.getenv("CHROMADB_HOST", "localhost"),
     chromadb_port=int(os.getenv("CHROMADB_PORT", "8000")),
     chromadb_ssl=os.getenv("CHROMADB_SSL", "False").lower() == "true",
+    vector_store=os.getenv("VECTOR_STORE", "chroma"),
+    vector_index_dir=os.getenv("VECTOR_INDEX_DIR", "data/vectors"),
+    vector_cache_size=int(os.getenv("VECTOR_CACHE_SIZE", "64")),
+    vector_graph_threshold=int(os.getenv("VECTOR_GRAPH_THRESHOLD", "20000")),
+    vector_graph_degree=int(os.getenv("VECTOR_GRAPH_DEGREE", "16")),
+    vector_search_ef=int(os.getenv("VECTOR_SEARCH_EF", "64")),
+    vector_encoding=os.getenv("VECTOR_ENCODING", "float32"),
+    vector_rescore_factor=int(os.getenv("VECTOR_RESCORE_FACTOR", "10")),
+    embedding_model=os.getenv("EMBEDDING_MODEL", "BAAI/bge-small-en"),
+    embedding_device=os.getenv("EMBEDDING_DEVICE", "cpu"),
+    embedding_normalize=os.getenv("EMBEDDING_NORMALIZE", "True").lower() == "true",
+    embedding_warmup=os.getenv("EMBEDDING_WARMUP", "True").lower() == "true",
+    embedding_batch_size=int(os.getenv("EMBEDDING_BATCH_SIZE", "64")),
+    embedding_workers=int(os.getenv("EMBEDDING_WORKERS", "2")),
+    embedding_torch_threads=int(os.getenv("EMBEDDING_TORCH_THREADS", "0")),
+    chunk_tokens=int(os.getenv("CHUNK_TOKENS", "256")),
+    chunk_overlap_tokens=int(os.getenv("CHUNK_OVERLAP_TOKENS", "0")),
+    pdf_ocr_min_share=float(os.getenv("PDF_OCR_MIN_SHARE", "0.1")),
+    retrieval_top_k=int(os.getenv("RETRIEVAL_TOP_K", "5")),
+    retrieval_fetch_k=int(os.getenv("RETRIEVAL_FETCH_K", "20")),
+    retrieval_mmr_lambda=float(os.getenv("RETRIEVAL_MMR_LAMBDA", "0.7")),
+    retrieval_max_distance=float(os.getenv("RETRIEVAL_MAX_DISTANCE", "0")),
+    rerank_enabled=os.getenv("RERANK_ENABLED", "False").lower() == "true",
+    rerank_model=os.getenv("RERANK_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2"),
+    rerank_candidates=int(os.getenv("RERANK_CANDIDATES", "20")),
+    rerank_batch_size=int(os.getenv("RERANK_BATCH_SIZE", "16")),
+    rerank_budget_ms=float(os.getenv("RERANK_BUDGET_MS", "300")),
+    rerank_cache_size=int(os.getenv("RERANK_CACHE_SIZE", "10000")),
+    hybrid_enabled=os.getenv("HYBRID_ENABLED", "True").lower() == "true",
+    lexical_top_k=int(os.getenv("LEXICAL_TOP_K", "10")),
+    rrf_k=int(os.getenv("RRF_K", "60")),
+    lexical_index_dir=os.getenv("LEXICAL_INDEX_DIR", "data/lexical"),
+    lexical_cache_size=int(os.getenv("LEXICAL_CACHE_SIZE", "64")),
+    prompt_max_tokens=int(os.getenv("PROMPT_MAX_TOKENS", "6000")),
+    prompt_history_tokens=int(os.getenv("PROMPT_HISTORY_TOKENS", "1000")),
+    prompt_memory_tokens=int(os.getenv("PROMPT_MEMORY_TOKENS", "500")),
+    llm_provider=os.getenv("LLM_PROVIDER", "gemini"),
+    llm_model=os.getenv("LLM_MODEL", "gemini-2.5-flash"),
+    llm_max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "8")),
+    llm_timeout=float(os.getenv("LLM_TIMEOUT", "60")),
+    llm_stream_idle_timeout=float(os.getenv("LLM_STREAM_IDLE_TIMEOUT", "30")),
+    llm_max_retries=int(os.getenv("LLM_MAX_RETRIES", "3")),
+    llm_backoff_base=float(os.getenv("LLM_BACKOFF_BASE", "0.5")),
+    llm_backoff_max=float(os.getenv("LLM_BACKOFF_MAX", "8")),
+    memory_enabled=os.getenv("MEMORY_ENABLED", "True").lower() == "true",
+    memory_recent_turns=int(os.getenv("MEMORY_RECENT_TURNS", "2")),
+    memory_summary_every=int(os.getenv("MEMORY_SUMMARY_EVERY", "4")),
+    memory_summary_words=int(os.getenv("MEMORY_SUMMARY_WORDS", "200")),
+    ingestion_mode=os.getenv("INGESTION_MODE", "local"),
+    ingestion_workers=int(os.getenv("INGESTION_WORKERS", "2")),
+    ingestion_poll_interval=float(os.getenv("INGESTION_POLL_INTERVAL", "2.0")),
+    ingestion_lease=float(os.getenv("INGESTION_LEASE", "600")),
+    ingestion_spool_dir=os.getenv("INGESTION_SPOOL_DIR", ""),
+    answer_cache_enabled=os.getenv("ANSWER_CACHE_ENABLED", "True").lower() == "true",
+    answer_cache_size=int(os.getenv("ANSWER_CACHE_SIZE", "2048")),
+    answer_cache_ttl=float(os.getenv("ANSWER_CACHE_TTL", "3600")),
+    answer_cache_threshold=float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.95")),
+    retrieval_cache_enabled=os.getenv("RETRIEVAL_CACHE_ENABLED", "True").lower()
+    == "true",
+    retrieval_cache_mb=float(os.getenv("RETRIEVAL_CACHE_MB", "32")),
+    chunk_cache_mb=float(os.getenv("CHUNK_CACHE_MB", "64")),
+    retrieval_cache_ttl=float(os.getenv("RETRIEVAL_CACHE_TTL", "600")),
+    retrieval_cache_step=float(os.getenv("RETRIEVAL_CACHE_STEP", "0.02")),
 )
 
 Config = {"Env": env}
@@ -1 +1 @@
-from .chroma import docs
+from .store import docs, async_docs
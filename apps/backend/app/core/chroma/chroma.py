@@ -1,9 +1,18 @@
+import asyncio
+
 import chromadb
 
-from app.config import Config
 from app.core.utils.rag import HuggingFaceAdapter
 
 
+COLLECTION_METADATA = {
+    "description": "Document collection for RAG-based chat system",
+    "project": "rag-docs",
+    "type": "chat-with-documents",
+    "purpose": "Store and retrieve document embeddings for conversational AI",
+}
+
+
 class ChromaClient:
     def __init__(self, host: str, port: int, ssl: bool) -> None:
         self._host = host
@@ -24,12 +33,7 @@ class ChromaClient:
             return self._client.create_collection(
                 name=name,
                 embedding_function=HuggingFaceAdapter,
-                metadata={
-                    "description": "Document collection for RAG-based chat system",
-                    "project": "rag-docs",
-                    "type": "chat-with-documents",
-                    "purpose": "Store and retrieve document embeddings for conversational AI",
-                },
+                metadata=COLLECTION_METADATA,
             )
         raise ConnectionError("Client not connected")
 
@@ -48,8 +52,32 @@ class ChromaClient:
         raise ConnectionError("Client not connected")
 
 
-docs = ChromaClient(
-    host=Config["Env"].chromadb_host,
-    port=Config["Env"].chromadb_port,
-    ssl=Config["Env"].chromadb_ssl,
-).get_docs()
+class AsyncChromaClient:
+    """Async counterpart of ChromaClient for the request path.
+
+    The HTTP client and collection handle are created on first use, since
+    building them needs a running event loop.
+    """
+
+    def __init__(self, host: str, port: int, ssl: bool) -> None:
+        self._host = host
+        self._port = port
+        self._ssl = ssl
+        self._collection = None
+        self._lock = asyncio.Lock()
+
+    async def get_docs(self):
+        if self._collection is not None:
+            return self._collection
+
+        async with self._lock:
+            if self._collection is None:
+                client = await chromadb.AsyncHttpClient(
+                    host=self._host, port=self._port, ssl=self._ssl
+                )
+                self._collection = await client.get_or_create_collection(
+                    name="docs",
+                    embedding_function=HuggingFaceAdapter,
+                    metadata=COLLECTION_METADATA,
+                )
+        return self._collection
@@ -0,0 +1,31 @@
+from app.config import Config
+
+# the vector store is picked once per process; callers only see a
+# Chroma-style collection (`docs`) and its async counterpart (`async_docs`)
+if Config["Env"].vector_store == "local":
+    from app.core.vectorstore import AsyncLocalVectorStore, LocalVectorStore
+
+    docs = LocalVectorStore(
+        directory=Config["Env"].vector_index_dir,
+        max_loaded=Config["Env"].vector_cache_size,
+        graph_threshold=Config["Env"].vector_graph_threshold,
+        graph_degree=Config["Env"].vector_graph_degree,
+        search_ef=Config["Env"].vector_search_ef,
+        encoding=Config["Env"].vector_encoding,
+        rescore_factor=Config["Env"].vector_rescore_factor,
+    )
+    async_docs = AsyncLocalVectorStore(docs)
+else:
+    from .chroma import AsyncChromaClient, ChromaClient
+
+    docs = ChromaClient(
+        host=Config["Env"].chromadb_host,
+        port=Config["Env"].chromadb_port,
+        ssl=Config["Env"].chromadb_ssl,
+    ).get_docs()
+
+    async_docs = AsyncChromaClient(
+        host=Config["Env"].chromadb_host,
+        port=Config["Env"].chromadb_port,
+        ssl=Config["Env"].chromadb_ssl,
+    )
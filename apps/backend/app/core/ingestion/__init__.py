@@ -0,0 +1 @@
+from .queue import ingestion_queue, run_ingestion
@@ -0,0 +1,318 @@
+import threading
+from contextlib import contextmanager
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+
+from sqlalchemy import DateTime, Float, func, literal, or_, select, update
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+
+from app.config import Config
+from app.core.logger import get_logger
+from app.core.rag.cache import answer_cache, retrieval_cache
+from app.core.rag.lexical import lexical_store
+from app.core.rag.rag import Rag
+from app.database.main import SessionLocal
+from app.database.models.documents import Document, DocumentStatus
+from app.database.models.sessions import Session as SessionModel
+from app.schemas.rag import RagStore
+
+logger = get_logger(__name__)
+
+
+IN_PROGRESS = (DocumentStatus.PARSING, DocumentStatus.EMBEDDING)
+
+
+class _seconds_ago(FunctionElement):
+    """The database clock minus a number of seconds.
+
+    Leases are renewed and checked against the database's clock, never a
+    worker's, so hosts with skewed clocks still agree on when one expired.
+    """
+
+    type = DateTime()
+    inherit_cache = True
+
+
+@compiles(_seconds_ago)
+def _seconds_ago_default(element, compiler, **kw):
+    return f"now() - {compiler.process(element.clauses, **kw)} * interval '1 second'"
+
+
+@compiles(_seconds_ago, "sqlite")
+def _seconds_ago_sqlite(element, compiler, **kw):
+    # sqlite keeps CURRENT_TIMESTAMP as text, which datetime() matches
+    return f"datetime('now', -{compiler.process(element.clauses, **kw)} || ' seconds')"
+
+
+def _claimable():
+    # pending jobs, plus jobs whose worker stopped renewing its lease (the
+    # process crashed or was redeployed mid-ingestion)
+    expired = _seconds_ago(literal(float(Config["Env"].ingestion_lease), Float))
+    return or_(
+        Document.status == DocumentStatus.PENDING,
+        Document.status.in_(IN_PROGRESS) & (Document.updated_at < expired),
+    )
+
+
+def claim_document(doc_id: int) -> bool:
+    """Atomically move a pending or abandoned document to parsing.
+
+    Only one worker, in-process or external, wins the claim for a given
+    document, so the same upload is never ingested twice.
+    """
+    with SessionLocal() as db:
+        result = db.execute(
+            update(Document)
+            .where(Document.id == doc_id, _claimable())
+            .values(
+                status=DocumentStatus.PARSING,
+                error=None,
+                index_version=Document.index_version + 1,
+            )
+        )
+        db.commit()
+        return result.rowcount == 1
+
+
+def renew_lease(doc_id: int) -> None:
+    # bumping updated_at tells other workers the job is still alive
+    with SessionLocal() as db:
+        db.execute(
+            update(Document)
+            .where(Document.id == doc_id, Document.status.in_(IN_PROGRESS))
+            .values(updated_at=func.now())
+        )
+        db.commit()
+
+
+def requeue_document(doc_id: int) -> bool:
+    """Move a failed document back to pending so it is ingested again."""
+    with SessionLocal() as db:
+        result = db.execute(
+            update(Document)
+            .where(Document.id == doc_id, Document.status == DocumentStatus.FAILED)
+            .values(status=DocumentStatus.PENDING, error=None)
+        )
+        db.commit()
+        return result.rowcount == 1
+
+
+@contextmanager
+def _leased(doc_id: int):
+    # renew a few times per lease so a slow batch never lets it lapse
+    stop = threading.Event()
+    interval = Config["Env"].ingestion_lease / 3
+
+    def heartbeat():
+        while not stop.wait(interval):
+            try:
+                renew_lease(doc_id)
+            except Exception as e:
+                logger.warning(f"Failed to renew lease on document {doc_id}: {e}")
+
+    thread = threading.Thread(
+        target=heartbeat, name=f"ingestion-lease-{doc_id}", daemon=True
+    )
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def set_document_status(
+    doc_id: int, status: DocumentStatus, error: str | None = None
+) -> None:
+    with SessionLocal() as db:
+        db.execute(
+            update(Document)
+            .where(Document.id == doc_id)
+            .values(status=status, error=error[:500] if error else None)
+        )
+        db.commit()
+
+
+def pending_document_ids(limit: int) -> list[int]:
+    with SessionLocal() as db:
+        return list(
+            db.scalars(
+                select(Document.id)
+                .where(_claimable())
+                .order_by(Document.id)
+                .limit(limit)
+            )
+        )
+
+
+def run_ingestion(doc_id: int, source: str | None = None) -> bool:
+    """Ingest one document.
+
+    `source` is a local copy of the upload; without one (external workers,
+    resumed jobs) the document is fetched from S3 instead. The local copy
+    is removed once the job ends, whatever the outcome.
+    """
+    try:
+        return _run_ingestion(doc_id, source)
+    finally:
+        if source:
+            Path(source).unlink(missing_ok=True)
+
+
+def _run_ingestion(doc_id: int, source: str | None) -> bool:
+    if not claim_document(doc_id):
+        logger.info(f"Document {doc_id} already claimed, skipping")
+        return False
+
+    with SessionLocal() as db:
+        doc = db.get(Document, doc_id)
+        if not doc:
+            logger.warning(f"Document {doc_id} disappeared before ingestion")
+            return False
+        doc_key = str(doc.key)
+        index_version = int(doc.index_version)
+        session_tokens = list(
+            db.scalars(
+                select(SessionModel.session_token).where(
+                    SessionModel.document_id == doc_id
+                )
+            )
+        )
+
+    # drop answers generated from a previous version of the document
+    answer_cache.invalidate(doc_id)
+    retrieval_cache.invalidate(doc_id)
+    lexical_store.invalidate(doc_id)
+    try:
+        with _leased(doc_id):
+            Rag.store(
+                RagStore(doc_id=doc_id, doc_key=doc_key, index_version=index_version),
+                source=source,
+                on_stage=lambda stage: set_document_status(doc_id, stage),
+            )
+    except Exception as e:
+        message = getattr(e, "message", str(e))
+        logger.error(f"Ingestion failed for document {doc_id}: {message}")
+        set_document_status(doc_id, DocumentStatus.FAILED, error=message)
+        return False
+
+    set_document_status(doc_id, DocumentStatus.READY)
+    answer_cache.invalidate(doc_id)
+    retrieval_cache.invalidate(doc_id)
+
+    # session names are generated from stored chunks, so they come last
+    with SessionLocal() as db:
+        for session_token in session_tokens:
+            try:
+                Rag.generate_session_name(session_token=session_token, db=db)
+            except Exception as e:
+                logger.warning(
+                    f"Failed to generate name for session {session_token}: {str(e)}"
+                )
+    return True
+
+
+class IngestionQueue:
+    """Runs ingestion jobs on a bounded worker pool.
+
+    The documents table is the durable queue: a job is just a document in the
+    pending state, or one left mid-ingestion whose lease ran out. In "local"
+    mode the API process runs jobs on its own pool and sweeps for abandoned
+    ones; in "external" mode it only records them and `python -m app.worker`
+    picks them up.
+    """
+
+    def __init__(self, mode: str, max_workers: int, lease: float) -> None:
+        self._mode = mode
+        self._max_workers = max_workers
+        self._lease = lease
+        self._executor: ThreadPoolExecutor | None = None
+        self._active: set[int] = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sweeper: threading.Thread | None = None
+
+    @property
+    def is_local(self) -> bool:
+        return self._mode == "local"
+
+    def _pool(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self._max_workers, thread_name_prefix="ingestion"
+            )
+        return self._executor
+
+    def submit(self, doc_id: int, source: str | None = None) -> Future | None:
+        with self._lock:
+            self._active.add(doc_id)
+        future = self._pool().submit(run_ingestion, doc_id, source)
+        future.add_done_callback(lambda _: self._done(doc_id))
+        return future
+
+    def _done(self, doc_id: int) -> None:
+        with self._lock:
+            self._active.discard(doc_id)
+
+    def enqueue(self, doc_id: int, source: str | None = None) -> Future | None:
+        if not self.is_local:
+            return None
+        return self.submit(doc_id, source)
+
+    def retry(self, doc_id: int) -> bool:
+        # failed jobs go back to pending; external workers pick them up on
+        # their next poll
+        if not requeue_document(doc_id):
+            return False
+        self.enqueue(doc_id)
+        return True
+
+    def resume_pending(self) -> int:
+        # pick up pending jobs and ones abandoned mid-ingestion by a crash or
+        # redeploy; claims make this safe to run from several processes
+        if not self.is_local:
+            return 0
+        with self._lock:
+            active = set(self._active)
+        doc_ids = [i for i in pending_document_ids(limit=1000) if i not in active]
+        for doc_id in doc_ids:
+            self.submit(doc_id)
+        return len(doc_ids)
+
+    def start(self) -> None:
+        # resume now, then keep sweeping: a job abandoned just before a
+        # restart only becomes claimable once its lease runs out
+        if not self.is_local or self._sweeper is not None:
+            return
+        self.resume_pending()
+        self._stop.clear()
+        self._sweeper = threading.Thread(
+            target=self._sweep, name="ingestion-sweeper", daemon=True
+        )
+        self._sweeper.start()
+
+    def _sweep(self) -> None:
+        while not self._stop.wait(self._lease / 3):
+            try:
+                resumed = self.resume_pending()
+                if resumed:
+                    logger.info(f"Resumed {resumed} abandoned ingestion jobs")
+            except Exception as e:
+                logger.warning(f"Ingestion sweep failed: {e}")
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._stop.set()
+        if self._sweeper is not None:
+            self._sweeper.join()
+            self._sweeper = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+
+ingestion_queue = IngestionQueue(
+    mode=Config["Env"].ingestion_mode,
+    max_workers=Config["Env"].ingestion_workers,
+    lease=Config["Env"].ingestion_lease,
+)
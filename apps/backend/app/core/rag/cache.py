@@ -0,0 +1,386 @@
+import hashlib
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Hashable
+
+import numpy as np
+
+from app.config import Config
+from app.schemas.rag import RetrievedChunk
+
+# follow-ups like "what about it?" only make sense next to the previous turn
+_ANAPHORA = re.compile(
+    r"\b(it|its|this|that|these|those|they|them|their|he|she|him|her|"
+    r"above|previous|earlier|same|more|else|again|also)\b"
+)
+
+
+def normalize_query(query: str) -> str:
+    query = re.sub(r"\s+", " ", query.strip().lower())
+    return query.rstrip("?!. ")
+
+
+def is_self_contained(query: str) -> bool:
+    """Heuristic: True when a query does not lean on earlier turns."""
+    return not _ANAPHORA.search(normalize_query(query))
+
+
+@dataclass
+class _Entry:
+    doc_id: int
+    version: int | None
+    query: str
+    embedding: np.ndarray
+    answer: str
+    expires_at: float
+
+
+class AnswerCache:
+    """LRU + TTL cache of LLM answers, scoped per document.
+
+    A lookup hits on an exact normalised-query match, or on the most similar
+    cached query for the same document when its cosine similarity reaches
+    `threshold`. Entries also carry the document's index version, so answers
+    from an earlier ingest never hit once a re-ingest (possibly in another
+    process, whose `invalidate` this cache never sees) bumps the version.
+    """
+
+    def __init__(
+        self, max_entries: int, ttl_seconds: float, threshold: float, enabled: bool
+    ) -> None:
+        self._max_entries = max_entries
+        self._ttl = ttl_seconds
+        self._threshold = threshold
+        self.enabled = enabled
+        self._entries: OrderedDict[tuple, _Entry] = OrderedDict()
+        self._by_doc: dict[int, set[tuple]] = {}
+        self._lock = threading.Lock()
+        self._stats = {
+            "exact_hits": 0,
+            "semantic_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "invalidations": 0,
+        }
+
+    def get(
+        self,
+        doc_id: int,
+        query: str,
+        embedding: list[float],
+        version: int | None = None,
+    ) -> str | None:
+        if not self.enabled:
+            return None
+
+        key = (doc_id, version, normalize_query(query))
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry.expires_at > now:
+                self._entries.move_to_end(key)
+                self._stats["exact_hits"] += 1
+                return entry.answer
+
+            best_key, best_score = None, self._threshold
+            vec = _unit(embedding)
+            for candidate_key in list(self._by_doc.get(doc_id, ())):
+                candidate = self._entries[candidate_key]
+                if candidate.version != version:
+                    continue
+                if candidate.expires_at <= now:
+                    self._remove(candidate_key)
+                    continue
+                score = float(np.dot(candidate.embedding, vec))
+                if score >= best_score:
+                    best_key, best_score = candidate_key, score
+
+            if best_key is None:
+                self._stats["misses"] += 1
+                return None
+
+            self._entries.move_to_end(best_key)
+            self._stats["semantic_hits"] += 1
+            return self._entries[best_key].answer
+
+    def put(
+        self,
+        doc_id: int,
+        query: str,
+        embedding: list[float],
+        answer: str,
+        version: int | None = None,
+    ):
+        if not self.enabled or not answer:
+            return
+
+        key = (doc_id, version, normalize_query(query))
+        with self._lock:
+            # answers for any other version of the document can't hit again
+            for stale in list(self._by_doc.get(doc_id, ())):
+                if self._entries[stale].version != version:
+                    self._remove(stale)
+            self._entries[key] = _Entry(
+                doc_id=doc_id,
+                version=version,
+                query=key[2],
+                embedding=_unit(embedding),
+                answer=answer,
+                expires_at=time.monotonic() + self._ttl,
+            )
+            self._entries.move_to_end(key)
+            self._by_doc.setdefault(doc_id, set()).add(key)
+
+            while len(self._entries) > self._max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._stats["evictions"] += 1
+
+    def invalidate(self, doc_id: int) -> None:
+        with self._lock:
+            for key in list(self._by_doc.get(doc_id, ())):
+                self._remove(key)
+            self._stats["invalidations"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._by_doc.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits = self._stats["exact_hits"] + self._stats["semantic_hits"]
+            lookups = hits + self._stats["misses"]
+            return {
+                **self._stats,
+                "entries": len(self._entries),
+                "hit_rate": hits / lookups if lookups else 0.0,
+            }
+
+    def _remove(self, key: tuple) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        doc_keys = self._by_doc.get(entry.doc_id)
+        if doc_keys is not None:
+            doc_keys.discard(key)
+            if not doc_keys:
+                del self._by_doc[entry.doc_id]
+
+
+def _unit(embedding: list[float]) -> np.ndarray:
+    vec = np.asarray(embedding, dtype=np.float32)
+    norm = np.linalg.norm(vec)
+    return vec / norm if norm else vec
+
+
+@dataclass
+class _Sized:
+    doc_id: int
+    value: Any
+    size: int
+    expires_at: float
+
+
+class ByteLRU:
+    """LRU bounded by the approximate bytes of its values, scoped per document.
+
+    Sizes are supplied by the caller; they don't need to be exact, only
+    proportional, so large entries push out several small ones.
+    """
+
+    def __init__(self, max_bytes: int, ttl_seconds: float) -> None:
+        self._max_bytes = max_bytes
+        self._ttl = ttl_seconds
+        self._entries: OrderedDict[Hashable, _Sized] = OrderedDict()
+        self._by_doc: dict[int, set[Hashable]] = {}
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Any:
+        entry = self._entries.get(key)
+        if entry is None or entry.expires_at <= time.monotonic():
+            if entry is not None:
+                self._remove(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry.value
+
+    def put(self, doc_id: int, key: Hashable, value: Any, size: int) -> None:
+        if size > self._max_bytes:
+            return
+        self._remove(key)
+        self._entries[key] = _Sized(
+            doc_id, value, size, expires_at=time.monotonic() + self._ttl
+        )
+        self._by_doc.setdefault(doc_id, set()).add(key)
+        self._bytes += size
+        while self._bytes > self._max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def invalidate(self, doc_id: int) -> None:
+        for key in list(self._by_doc.get(doc_id, ())):
+            self._remove(key)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._by_doc.clear()
+        self._bytes = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._bytes -= entry.size
+        doc_keys = self._by_doc.get(entry.doc_id)
+        if doc_keys is not None:
+            doc_keys.discard(key)
+            if not doc_keys:
+                del self._by_doc[entry.doc_id]
+
+
+@dataclass(frozen=True)
+class VectorHits:
+    """Ids, distances and (for MMR) embeddings of one vector-store query."""
+
+    ids: list[str]
+    distances: list[float]
+    embeddings: np.ndarray | None = None
+
+    @property
+    def nbytes(self) -> int:
+        size = sum(len(i) for i in self.ids) + 8 * len(self.distances) + 64
+        if self.embeddings is not None:
+            size += self.embeddings.nbytes
+        return size
+
+
+class RetrievalCache:
+    """Vector-search results and chunk texts kept in process.
+
+    Search results are keyed by document, the query embedding quantised to
+    `step` and the shape of the search, so repeated and near-identical
+    follow-ups skip the vector-store round trip. They only hold chunk ids;
+    texts live in a separate chunk LRU shared by every query of a document.
+    Both are bounded in bytes and dropped when a document is re-ingested.
+    Both keys also carry the document's index version, so a re-ingest in
+    another process, whose invalidation never reaches this one, can't serve
+    ids or texts of the previous version.
+    """
+
+    def __init__(
+        self,
+        enabled: bool,
+        results_bytes: int,
+        chunks_bytes: int,
+        ttl_seconds: float,
+        step: float,
+    ) -> None:
+        self.enabled = enabled
+        self._step = step
+        self._results = ByteLRU(results_bytes, ttl_seconds)
+        self._chunks = ByteLRU(chunks_bytes, ttl_seconds)
+        self._lock = threading.Lock()
+
+    def key(
+        self,
+        doc_id: int,
+        embedding: list[float],
+        n_results: int,
+        embeddings: bool,
+        version: int | None = None,
+    ) -> tuple:
+        quantised = np.round(_unit(embedding) / self._step).astype(np.int16)
+        digest = hashlib.blake2b(quantised.tobytes(), digest_size=16).digest()
+        return doc_id, version, digest, n_results, embeddings
+
+    def get_hits(self, key: tuple) -> VectorHits | None:
+        if not self.enabled:
+            return None
+        with self._lock:
+            return self._results.get(key)
+
+    def put_hits(self, key: tuple, hits: VectorHits) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._results.put(key[0], key, hits, hits.nbytes)
+
+    def get_chunks(
+        self, ids: list[str], version: int | None = None
+    ) -> dict[str, RetrievedChunk]:
+        if not self.enabled:
+            return {}
+        found = {}
+        with self._lock:
+            for chunk_id in ids:
+                chunk = self._chunks.get((chunk_id, version))
+                if chunk is not None:
+                    found[chunk_id] = chunk
+        return found
+
+    def put_chunks(
+        self, doc_id: int, chunks: list[RetrievedChunk], version: int | None = None
+    ) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            for chunk in chunks:
+                # cached chunks are query independent
+                chunk = chunk.model_copy(update={"distance": None, "score": None})
+                size = sys.getsizeof(chunk.text) + len(chunk.id) + 128
+                self._chunks.put(doc_id, (chunk.id, version), chunk, size)
+
+    def invalidate(self, doc_id: int) -> None:
+        with self._lock:
+            self._results.invalidate(doc_id)
+            self._chunks.invalidate(doc_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._results.clear()
+            self._chunks.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "results": self._results.stats(),
+                "chunks": self._chunks.stats(),
+            }
+
+
+answer_cache = AnswerCache(
+    max_entries=Config["Env"].answer_cache_size,
+    ttl_seconds=Config["Env"].answer_cache_ttl,
+    threshold=Config["Env"].answer_cache_threshold,
+    enabled=Config["Env"].answer_cache_enabled,
+)
+
+retrieval_cache = RetrievalCache(
+    enabled=Config["Env"].retrieval_cache_enabled,
+    results_bytes=int(Config["Env"].retrieval_cache_mb * 1024 * 1024),
+    chunks_bytes=int(Config["Env"].chunk_cache_mb * 1024 * 1024),
+    ttl_seconds=Config["Env"].retrieval_cache_ttl,
+    step=Config["Env"].retrieval_cache_step,
+)
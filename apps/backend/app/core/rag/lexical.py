@@ -0,0 +1,254 @@
+import re
+import threading
+from collections import Counter, OrderedDict
+from pathlib import Path
+
+import numpy as np
+
+from app.config import Config
+from app.core.chroma import docs
+from app.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+# identifiers like "ERR-404", "v1.2.3" or "user_id" stay whole; their parts
+# are indexed too so "404" alone still matches
+_TOKEN = re.compile(r"\w+(?:[-.:/]\w+)*")
+_PART = re.compile(r"[-.:/]")
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def tokenize(text: str) -> list[str]:
+    tokens = []
+    for token in _TOKEN.findall(text.lower()):
+        tokens.append(token)
+        if _PART.search(token):
+            tokens.extend(part for part in _PART.split(token) if part)
+    return tokens
+
+
+class BM25Index:
+    """Okapi BM25 over the chunks of one document.
+
+    Postings are kept as flat numpy arrays (CSR layout): the postings of
+    term t live in `rows[offsets[t]:offsets[t + 1]]`, with matching term
+    frequencies in `tfs`. Chunk positions double as chunk ids, since chunks
+    are stored as `{doc_id}_chunk_{position}`. `version` is the document's
+    index version at the time the chunks were read.
+    """
+
+    def __init__(
+        self,
+        terms: list[str],
+        offsets: np.ndarray,
+        rows: np.ndarray,
+        tfs: np.ndarray,
+        doc_lengths: np.ndarray,
+        version: int = 0,
+    ) -> None:
+        self.version = version
+        self._vocabulary = {term: i for i, term in enumerate(terms)}
+        self._terms = terms
+        self._offsets = offsets
+        self._rows = rows
+        self._tfs = tfs
+        self._doc_lengths = doc_lengths.astype(np.float32)
+        self._avg_length = float(self._doc_lengths.mean()) if len(doc_lengths) else 0
+        df = np.diff(offsets).astype(np.float32)
+        n = len(doc_lengths)
+        self._idf = np.log1p((n - df + 0.5) / (df + 0.5))
+
+    @property
+    def size(self) -> int:
+        return len(self._doc_lengths)
+
+    def search(self, query: str, k: int) -> list[tuple[int, float]]:
+        term_ids = {
+            self._vocabulary[t] for t in tokenize(query) if t in self._vocabulary
+        }
+        if not term_ids or not self.size:
+            return []
+
+        scores = np.zeros(self.size, dtype=np.float32)
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * self._doc_lengths / self._avg_length)
+        for t in term_ids:
+            start, end = self._offsets[t], self._offsets[t + 1]
+            rows = self._rows[start:end]
+            tf = self._tfs[start:end].astype(np.float32)
+            scores[rows] += self._idf[t] * tf * (BM25_K1 + 1) / (tf + norm[rows])
+
+        k = min(k, int(np.count_nonzero(scores)))
+        if k == 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(i), float(scores[i])) for i in top]
+
+    def save(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp.npz")
+        np.savez_compressed(
+            tmp,
+            terms=np.array(self._terms, dtype=np.str_),
+            offsets=self._offsets,
+            rows=self._rows,
+            tfs=self._tfs,
+            doc_lengths=self._doc_lengths.astype(np.uint32),
+            version=np.int64(self.version),
+        )
+        # readers never see a half-written index
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path: Path) -> "BM25Index":
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                terms=data["terms"].tolist(),
+                offsets=data["offsets"],
+                rows=data["rows"],
+                tfs=data["tfs"],
+                doc_lengths=data["doc_lengths"],
+                # files written before versions existed match version 0
+                version=int(data["version"]) if "version" in data else 0,
+            )
+
+
+class BM25Builder:
+    """Accumulates chunk term counts as chunks stream through ingestion."""
+
+    def __init__(self) -> None:
+        self._postings: dict[str, list[tuple[int, int]]] = {}
+        self._doc_lengths: list[int] = []
+
+    def add(self, texts: list[str]) -> None:
+        for text in texts:
+            position = len(self._doc_lengths)
+            counts = Counter(tokenize(text))
+            for term, tf in counts.items():
+                self._postings.setdefault(term, []).append((position, tf))
+            self._doc_lengths.append(sum(counts.values()))
+
+    def build(self) -> BM25Index:
+        terms = sorted(self._postings)
+        lengths = [len(self._postings[t]) for t in terms]
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        rows = np.empty(offsets[-1], dtype=np.uint32)
+        tfs = np.empty(offsets[-1], dtype=np.uint16)
+        for i, term in enumerate(terms):
+            postings = self._postings[term]
+            start = offsets[i]
+            rows[start : start + len(postings)] = [r for r, _ in postings]
+            tfs[start : start + len(postings)] = [min(tf, 65535) for _, tf in postings]
+        return BM25Index(
+            terms=terms,
+            offsets=offsets,
+            rows=rows,
+            tfs=tfs,
+            doc_lengths=np.array(self._doc_lengths, dtype=np.uint32),
+        )
+
+
+class LexicalStore:
+    """Per-document BM25 indexes on local disk, loaded lazily into an LRU.
+
+    Indexes are written at ingestion time, tagged with the document's index
+    version. A process that finds none, or only one from an older version
+    (an API node that didn't run the ingestion, or a document indexed
+    before lexical search existed), rebuilds it from the chunks in Chroma.
+    Loads and rebuilds take a per-document lock, so concurrent first
+    queries share one rebuild.
+    """
+
+    def __init__(self, directory: str, max_loaded: int, lock_stripes: int = 64):
+        self._directory = Path(directory)
+        self._max_loaded = max_loaded
+        self._loaded: OrderedDict[int, BM25Index] = OrderedDict()
+        self._lock = threading.Lock()
+        self._doc_locks = [threading.Lock() for _ in range(lock_stripes)]
+
+    def _path(self, doc_id: int) -> Path:
+        return self._directory / f"{doc_id}.npz"
+
+    def save(self, doc_id: int, index: BM25Index, version: int = 0) -> None:
+        index.version = version
+        with self._doc_locks[doc_id % len(self._doc_locks)]:
+            index.save(self._path(doc_id))
+            with self._lock:
+                self._remember(doc_id, index)
+
+    def get(self, doc_id: int, version: int | None = None) -> BM25Index:
+        """The index of `doc_id`, reloaded or rebuilt if not at `version`.
+
+        `version` None accepts whatever index is on hand.
+        """
+        index = self._cached(doc_id, version)
+        if index is not None:
+            return index
+
+        with self._doc_locks[doc_id % len(self._doc_locks)]:
+            # another thread may have loaded it while we waited
+            index = self._cached(doc_id, version)
+            if index is None:
+                index = self._load(doc_id, version)
+                with self._lock:
+                    self._remember(doc_id, index)
+        return index
+
+    def invalidate(self, doc_id: int) -> None:
+        with self._doc_locks[doc_id % len(self._doc_locks)]:
+            with self._lock:
+                self._loaded.pop(doc_id, None)
+            self._path(doc_id).unlink(missing_ok=True)
+
+    def _cached(self, doc_id: int, version: int | None) -> BM25Index | None:
+        with self._lock:
+            index = self._loaded.get(doc_id)
+            if index is None or not _matches(index, version):
+                return None
+            self._loaded.move_to_end(doc_id)
+            return index
+
+    def _load(self, doc_id: int, version: int | None) -> BM25Index:
+        path = self._path(doc_id)
+        if path.exists():
+            index = BM25Index.load(path)
+            if _matches(index, version):
+                return index
+            logger.info(
+                f"Lexical index for doc_id {doc_id} is at version "
+                f"{index.version}, expected {version}"
+            )
+        return self._rebuild(doc_id, version or 0)
+
+    def _remember(self, doc_id: int, index: BM25Index) -> None:
+        self._loaded[doc_id] = index
+        self._loaded.move_to_end(doc_id)
+        while len(self._loaded) > self._max_loaded:
+            self._loaded.popitem(last=False)
+
+    def _rebuild(self, doc_id: int, version: int) -> BM25Index:
+        logger.info(f"Rebuilding lexical index for doc_id: {doc_id}")
+        result = docs.get(where={"doc_id": str(doc_id)}, include=["documents"])
+        texts = dict(zip(result.get("ids") or [], result.get("documents") or []))
+        builder = BM25Builder()
+        # positions must line up with the chunk numbers in the ids
+        count = len(texts)
+        builder.add([texts.get(f"{doc_id}_chunk_{i}") or "" for i in range(count)])
+        index = builder.build()
+        index.version = version
+        if index.size:
+            index.save(self._path(doc_id))
+        return index
+
+
+def _matches(index: BM25Index, version: int | None) -> bool:
+    return version is None or index.version == version
+
+
+lexical_store = LexicalStore(
+    directory=Config["Env"].lexical_index_dir,
+    max_loaded=Config["Env"].lexical_cache_size,
+)
@@ -0,0 +1,151 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain_core.messages import HumanMessage, SystemMessage
+from sqlalchemy import select, update
+
+from app.config import Config
+from app.core.logger import get_logger
+from app.core.utils.rag.provider import llm_client
+from app.database.main import SessionLocal
+from app.database.models.chats import Chat, Role
+from app.database.models.sessions import Session as SessionModel
+
+logger = get_logger(__name__)
+
+SUMMARY_PROMPT = """You maintain the running memory of a conversation between a user and a document assistant.
+Merge the existing summary with the new turns into one updated summary.
+Keep facts, names, numbers, decisions and open questions the user may refer back to; drop greetings and filler.
+Write plain prose in the third person, at most {words} words. Return ONLY the summary."""
+
+
+def summarize_session(
+    session_token: str, recent_messages: int, every_messages: int, words: int
+) -> bool:
+    """Fold turns older than the recent window into the session summary.
+
+    Nothing happens until at least `every_messages` messages have piled up
+    outside the window, so the LLM runs once every N turns, not per chat;
+    until then those turns are still sent verbatim as chat history.
+    Returns True when the summary was updated.
+    """
+    with SessionLocal() as db:
+        session = db.scalar(
+            select(SessionModel).where(SessionModel.session_token == session_token)
+        )
+        if not session:
+            return False
+        summarized_until = session.summarized_until
+        previous = session.memory_summary or ""
+
+        query = select(Chat).where(Chat.session_id == session_token)
+        if summarized_until is not None:
+            query = query.where(Chat.id > summarized_until)
+        chats = list(db.scalars(query.order_by(Chat.id)))
+
+    # the newest turns are sent verbatim, so they stay out of the summary
+    pending = chats[: max(0, len(chats) - recent_messages)]
+    if len(pending) < every_messages:
+        return False
+
+    transcript = "\n".join(
+        f"{'User' if chat.role == Role.USER else 'Assistant'}: {chat.message}"
+        for chat in pending
+    )
+    summary = llm_client.invoke(
+        [
+            SystemMessage(content=SUMMARY_PROMPT.format(words=words)),
+            HumanMessage(
+                content=f"EXISTING SUMMARY:\n{previous or '(none)'}\n\n"
+                f"NEW TURNS:\n{transcript}"
+            ),
+        ]
+    ).strip()
+    if not summary:
+        return False
+
+    # only apply on top of the summary we started from; a concurrent run
+    # that got there first wins
+    condition = (
+        SessionModel.summarized_until.is_(None)
+        if summarized_until is None
+        else SessionModel.summarized_until == summarized_until
+    )
+    with SessionLocal() as db:
+        result = db.execute(
+            update(SessionModel)
+            .where(SessionModel.session_token == session_token, condition)
+            .values(memory_summary=summary, summarized_until=pending[-1].id)
+        )
+        db.commit()
+    return result.rowcount == 1
+
+
+class MemoryQueue:
+    """Runs session summarisation off the request path.
+
+    Each chat submits its session; a session already queued or running is
+    not queued twice, and the job itself decides whether enough new turns
+    have accumulated to be worth an LLM call.
+    """
+
+    def __init__(
+        self,
+        enabled: bool,
+        recent_turns: int,
+        every_turns: int,
+        summary_words: int,
+        max_workers: int = 1,
+    ) -> None:
+        self.enabled = enabled
+        # one turn is a user message plus the assistant's answer
+        self.recent_messages = recent_turns * 2
+        self._every_messages = every_turns * 2
+        self._summary_words = summary_words
+        self._max_workers = max_workers
+        self._executor: ThreadPoolExecutor | None = None
+        self._queued: set[str] = set()
+        self._lock = threading.Lock()
+
+    def _pool(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self._max_workers, thread_name_prefix="memory"
+            )
+        return self._executor
+
+    def submit(self, session_token: str) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            if session_token in self._queued:
+                return
+            self._queued.add(session_token)
+        self._pool().submit(self._run, session_token)
+
+    def _run(self, session_token: str) -> None:
+        try:
+            summarize_session(
+                session_token,
+                recent_messages=self.recent_messages,
+                every_messages=self._every_messages,
+                words=self._summary_words,
+            )
+        except Exception as e:
+            logger.warning(f"Failed to update memory for {session_token}: {e}")
+        finally:
+            with self._lock:
+                self._queued.discard(session_token)
+
+    def shutdown(self, wait: bool = True) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+
+memory_queue = MemoryQueue(
+    enabled=Config["Env"].memory_enabled,
+    recent_turns=Config["Env"].memory_recent_turns,
+    every_turns=Config["Env"].memory_summary_every,
+    summary_words=Config["Env"].memory_summary_words,
+)
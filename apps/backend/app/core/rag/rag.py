@@ -1,14 +1,22 @@
+import asyncio
+from typing import AsyncIterator, Callable
+from fastapi.concurrency import run_in_threadpool
+from langchain_core.language_models import BaseChatModel
 from sqlalchemy.orm import Session
 
 from app.database.models.sessions import Session as SessionModel
-from app.core.utils.rag import load_document
-from app.core.utils.rag import chunk_text
-from app.core.utils.rag import generate_embeddings
+from app.core.utils.rag import iter_pages
+from app.core.utils.rag.loader import DocumentSource
+from app.core.utils.rag import chunk_documents
+from app.core.utils.rag import embed_batches, generate_embeddings
 from app.core.chroma import docs
 from app.schemas.rag import RagStore, RagQuery, LlmQuery
 from app.core.logger import get_logger
-from app.core.utils.rag.llm import generate_session_name, llm_response
-from app.database.models.documents import Document
+from app.core.rag.cache import answer_cache, is_self_contained
+from app.core.rag.lexical import BM25Builder, lexical_store
+from app.core.rag.retrieval import resolve_settings, retrieve
+from app.core.utils.rag.llm import generate_session_name, llm_response, llm_stream
+from app.database.models.documents import Document, DocumentStatus
 from app.core.utils.exceptions.rag import (
     DocumentLoadError,
     DocumentChunkingError,
@@ -22,37 +30,75 @@ logger = get_logger(__name__)
 class Rag:
 
     @staticmethod
-    def store(input_data: RagStore) -> bool:
+    def store(
+        input_data: RagStore,
+        source: DocumentSource | None = None,
+        on_stage: Callable[[DocumentStatus], None] | None = None,
+    ) -> bool:
+        # on_stage lets the caller record progress as the pipeline advances
+        on_stage = on_stage or (lambda stage: None)
         try:
-            # load document from s3 with object key
-            doc = load_document(input_data.doc_key)
-            if not doc:
-                raise DocumentLoadError(input_data.doc_key)
-
-            # split the document into small chunks
-            chunk_data = chunk_text(doc)
-            if not chunk_data:
+            # pages are parsed, chunked and embedded as a stream, so only a
+            # few batches of the document are in memory at any time
+            on_stage(DocumentStatus.PARSING)
+            pages = iter_pages(input_data.doc_key, source=source)
+            chunks = chunk_documents(pages)
+
+            # convert chunks to embedding vectors batch by batch and write
+            # each batch to the vector db as soon as it is ready
+            stored = 0
+            lexical = BM25Builder()
+            try:
+                for batch, vec in embed_batches(
+                    chunks, text=lambda chunk: chunk.page_content
+                ):
+                    if not vec:
+                        raise EmbeddingGenerationError("No embeddings generated")
+                    if stored == 0:
+                        on_stage(DocumentStatus.EMBEDDING)
+
+                    chunk_ids = [
+                        f"{input_data.doc_id}_chunk_{stored + i}"
+                        for i in range(len(batch))
+                    ]
+                    metadatas = [
+                        {
+                            "doc_id": str(input_data.doc_id),
+                            "page": chunk.metadata.get("page", 0),
+                            "start": chunk.metadata.get("start", 0),
+                            "end": chunk.metadata.get("end", 0),
+                        }
+                        for chunk in batch
+                    ]
+
+                    # store the vector embedding in vector db
+                    docs.upsert(
+                        ids=chunk_ids,
+                        embeddings=vec,
+                        documents=[chunk.page_content for chunk in batch],
+                        metadatas=metadatas,
+                    )
+                    lexical.add([chunk.page_content for chunk in batch])
+                    stored += len(batch)
+            except Exception:
+                # don't leave a half-indexed document behind
+                docs.delete(where={"doc_id": str(input_data.doc_id)})
+                raise
+
+            if not stored:
                 raise DocumentChunkingError(input_data.doc_key)
 
-            # convert chunks to embedding vectors
-            vec = generate_embeddings(chunk_data=chunk_data)
-            if not vec:
-                raise EmbeddingGenerationError("No embeddings generated")
-
-            chunk_ids = [
-                f"{input_data.doc_id}_chunk_{i}" for i in range(len(chunk_data))
-            ]
-            metadatas = [
-                {"doc_id": str(input_data.doc_id)} for _ in range(len(chunk_data))
-            ]
-
-            # store the vector embedding in vector db
-            docs.add(
-                ids=chunk_ids, embeddings=vec, documents=chunk_data, metadatas=metadatas
+            # engines with a search structure build it now, not on first query
+            if hasattr(docs, "prepare"):
+                docs.prepare(where={"doc_id": str(input_data.doc_id)})
+
+            # the lexical index sits next to the chunks for hybrid retrieval
+            lexical_store.save(
+                input_data.doc_id, lexical.build(), version=input_data.index_version
             )
 
             logger.info(
-                f"Successfully stored document: {input_data.doc_key} with {len(chunk_data)} chunks"
+                f"Successfully stored document: {input_data.doc_key} with {stored} chunks"
             )
             return True
 
@@ -72,73 +118,27 @@ class Rag:
             raise VectorStoreError(str(e))
 
     @staticmethod
-    def query(input_data: RagQuery):
+    async def query(input_data: RagQuery):
         try:
-            # validate input
-            if not input_data.query or not input_data.query.strip():
-                raise ValueError("Query cannot be empty")
-
-            logger.info(f"Processing query for document: {input_data.doc_id}")
+            vec = await Rag._embed_query(input_data)
 
-            # convert query to vector embeddings
-            try:
-                vec = generate_embeddings([input_data.query])
-                if not vec:
-                    raise EmbeddingGenerationError(
-                        "Failed to generate query embeddings"
-                    )
-            except Exception as e:
-                logger.error(
-                    f"Error generating embeddings for query: {str(e)}",
-                    exc_info=True,
+            cacheable = Rag._is_cacheable(input_data)
+            if cacheable:
+                cached = answer_cache.get(
+                    input_data.doc_id,
+                    input_data.query,
+                    vec[0],
+                    input_data.index_version,
                 )
-                raise EmbeddingGenerationError(f"Query embedding failed: {str(e)}")
+                if cached:
+                    logger.info(f"Answer cache hit for doc_id: {input_data.doc_id}")
+                    return cached
 
-            # query vector db with the vector embed query
-            try:
-                result = docs.query(
-                    query_embeddings=vec,
-                    n_results=5,
-                    where={"doc_id": str(input_data.doc_id)},
-                )
-                if not result:
-                    raise VectorStoreError("No results returned from vector database")
-
-                documents = result.get("documents") or []
-                flattened_docs = (
-                    [str(doc) for sublist in documents for doc in sublist]
-                    if documents
-                    else []
-                )
+            llm_query = await Rag._prepare_llm_query(input_data, vec)
 
-                if not flattened_docs:
-                    logger.warning(
-                        f"No documents found for query on doc_id: {input_data.doc_id}"
-                    )
-                else:
-                    logger.info(
-                        f"Retrieved {len(flattened_docs)} document chunks for query"
-                    )
-            except VectorStoreError:
-                raise
-            except Exception as e:
-                logger.error(
-                    f"Error querying vector database: {str(e)}",
-                    exc_info=True,
-                )
-                raise VectorStoreError(f"Vector database query failed: {str(e)}")
-
-            # prepare llm query input
+            # get llm response
             try:
-                llm_query = LlmQuery(
-                    query=input_data.query,
-                    doc_data=flattened_docs,
-                    context=input_data.context if input_data.context else None,
-                    history=input_data.history if input_data.history else None,
-                )
-
-                # get llm response
-                response = llm_response(input_data=llm_query)
+                response = await llm_response(input_data=llm_query)
 
                 if not response:
                     raise ValueError("LLM returned empty response")
@@ -146,8 +146,6 @@ class Rag:
                 logger.info(
                     f"Successfully generated response for query on doc_id: {input_data.doc_id}"
                 )
-                return response
-
             except Exception as e:
                 logger.error(
                     f"Error generating LLM response: {str(e)}",
@@ -155,6 +153,16 @@ class Rag:
                 )
                 raise VectorStoreError(f"LLM response generation failed: {str(e)}")
 
+            if cacheable and isinstance(response, str):
+                answer_cache.put(
+                    input_data.doc_id,
+                    input_data.query,
+                    vec[0],
+                    response,
+                    input_data.index_version,
+                )
+            return response
+
         except (EmbeddingGenerationError, VectorStoreError, ValueError) as e:
             logger.error(f"Query error: {str(e)}")
             raise
@@ -165,6 +173,145 @@ class Rag:
             )
             raise VectorStoreError(f"Unexpected query error: {str(e)}")
 
+    @staticmethod
+    async def query_stream(
+        input_data: RagQuery, llm: BaseChatModel | None = None
+    ) -> AsyncIterator[str]:
+        # retrieval runs eagerly so lookup errors surface before the response
+        # starts; only the llm tokens are produced lazily
+        vec = await Rag._embed_query(input_data)
+
+        cacheable = Rag._is_cacheable(input_data)
+        if cacheable:
+            cached = answer_cache.get(
+                input_data.doc_id, input_data.query, vec[0], input_data.index_version
+            )
+            if cached:
+                logger.info(f"Answer cache hit for doc_id: {input_data.doc_id}")
+                return Rag._replay(cached)
+
+        llm_query = await Rag._prepare_llm_query(input_data, vec)
+        tokens = Rag._stream_tokens(llm_query=llm_query, llm=llm)
+        if not cacheable:
+            return tokens
+        return Rag._cache_stream(input_data, vec[0], tokens)
+
+    @staticmethod
+    async def _stream_tokens(
+        llm_query: LlmQuery, llm: BaseChatModel | None = None
+    ) -> AsyncIterator[str]:
+        try:
+            async for token in llm_stream(input_data=llm_query, llm=llm):
+                yield token
+        except (GeneratorExit, asyncio.CancelledError):
+            raise
+        except Exception as e:
+            logger.error(
+                f"Error streaming LLM response: {str(e)}",
+                exc_info=True,
+            )
+            raise VectorStoreError(f"LLM response generation failed: {str(e)}")
+
+    @staticmethod
+    async def _replay(answer: str) -> AsyncIterator[str]:
+        yield answer
+
+    @staticmethod
+    async def _cache_stream(
+        input_data: RagQuery, embedding: list[float], tokens: AsyncIterator[str]
+    ) -> AsyncIterator[str]:
+        # only answers that streamed to completion are cached
+        parts: list[str] = []
+        try:
+            async for token in tokens:
+                parts.append(token)
+                yield token
+        finally:
+            await tokens.aclose()
+        answer_cache.put(
+            input_data.doc_id,
+            input_data.query,
+            embedding,
+            "".join(parts),
+            input_data.index_version,
+        )
+
+    @staticmethod
+    def _is_cacheable(input_data: RagQuery) -> bool:
+        # answers built from non-default retrieval settings aren't comparable
+        if input_data.retrieval is not None:
+            return False
+        # with prior turns in the prompt the same words can mean something
+        # else, so only self-contained questions go through the cache
+        if not input_data.history and not input_data.context:
+            return True
+        return is_self_contained(input_data.query)
+
+    @staticmethod
+    async def _embed_query(input_data: RagQuery) -> list[list[float]]:
+        # validate input
+        if not input_data.query or not input_data.query.strip():
+            raise ValueError("Query cannot be empty")
+
+        logger.info(f"Processing query for document: {input_data.doc_id}")
+
+        # convert query to vector embeddings; the model is cpu-bound, so it
+        # runs on the threadpool instead of blocking the event loop
+        try:
+            vec = await run_in_threadpool(generate_embeddings, [input_data.query])
+            if not vec:
+                raise EmbeddingGenerationError("Failed to generate query embeddings")
+        except Exception as e:
+            logger.error(
+                f"Error generating embeddings for query: {str(e)}",
+                exc_info=True,
+            )
+            raise EmbeddingGenerationError(f"Query embedding failed: {str(e)}")
+        return vec
+
+    @staticmethod
+    async def _prepare_llm_query(
+        input_data: RagQuery, vec: list[list[float]]
+    ) -> LlmQuery:
+        # query vector db with the vector embed query, then drop weak matches
+        # and diversify the candidates down to top_k
+        try:
+            settings = resolve_settings(input_data.retrieval)
+            chunks = await retrieve(
+                input_data.doc_id,
+                input_data.query,
+                vec[0],
+                settings,
+                version=input_data.index_version,
+            )
+            flattened_docs = [chunk.text for chunk in chunks]
+
+            if not flattened_docs:
+                logger.warning(
+                    f"No documents found for query on doc_id: {input_data.doc_id}"
+                )
+            else:
+                logger.info(
+                    f"Retrieved {len(flattened_docs)} document chunks for query"
+                )
+        except VectorStoreError:
+            raise
+        except Exception as e:
+            logger.error(
+                f"Error querying vector database: {str(e)}",
+                exc_info=True,
+            )
+            raise VectorStoreError(f"Vector database query failed: {str(e)}")
+
+        # prepare llm query input
+        return LlmQuery(
+            query=input_data.query,
+            doc_data=flattened_docs,
+            chunks=chunks,
+            context=input_data.context if input_data.context else None,
+            history=input_data.history if input_data.history else None,
+        )
+
     @staticmethod
     def generate_session_name(session_token: str, db: Session) -> str:
 
@@ -176,11 +323,11 @@ class Rag:
         )
         if not doc:
             raise ValueError(f"No document found for session token: {session_token}")
-        result = docs.get(where={"doc_id": str(doc.id)}, limit=2)
+        result = docs.get(where={"doc_id": str(doc.index_id)}, limit=2)
         documents = result.get("documents") or []
         context = " ".join(documents) if documents else ""
         title = generate_session_name(context=context)
-        print(title)
+        logger.debug(f"Generated title for session {session_token}: {title}")
         session = (
             db.query(SessionModel)
             .filter(SessionModel.session_token == session_token)
@@ -0,0 +1,174 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from app.config import Config
+from app.core.logger import get_logger
+from app.core.rag.cache import normalize_query
+from app.schemas.rag import RetrievedChunk
+
+logger = get_logger(__name__)
+
+
+class Reranker:
+    """Cross-encoder re-ranking of retrieved chunks under a time budget.
+
+    Query/chunk pairs are scored in batches on a small pool and the scores
+    cached per (query, chunk id, chunk text). The caller stops waiting when
+    the budget runs out, even mid-batch, and keeps the retrieval order, so a
+    slow CPU never holds a chat request hostage; the abandoned job stops
+    after its current batch, and what it scored still lands in the cache.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        device: str,
+        batch_size: int,
+        budget_ms: float,
+        cache_size: int,
+        enabled: bool,
+        max_workers: int = 4,
+    ) -> None:
+        self._model_name = model_name
+        self._device = device
+        self._batch_size = batch_size
+        self._budget = budget_ms / 1000
+        self._cache_size = cache_size
+        self.enabled = enabled
+        self._model = None
+        self._model_lock = threading.Lock()
+        self._max_workers = max_workers
+        self._executor: ThreadPoolExecutor | None = None
+        self._scores: OrderedDict[tuple[str, str, int], float] = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {
+            "requests": 0,
+            "cache_hits": 0,
+            "scored_pairs": 0,
+            "over_budget": 0,
+            "errors": 0,
+        }
+
+    def _get_model(self):
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    from sentence_transformers import CrossEncoder
+
+                    logger.info(f"Loading re-ranker {self._model_name}")
+                    self._model = CrossEncoder(self._model_name, device=self._device)
+        return self._model
+
+    def warmup(self) -> None:
+        self._get_model().predict([("warmup", "warmup")])
+
+    def rerank(
+        self, query: str, chunks: list[RetrievedChunk], top_k: int
+    ) -> list[RetrievedChunk]:
+        if len(chunks) <= 1:
+            return chunks[:top_k]
+
+        deadline = time.monotonic() + self._budget
+        normalized = normalize_query(query)
+        keys = [(normalized, chunk.id, hash(chunk.text)) for chunk in chunks]
+        scores: dict[int, float] = {}
+        with self._lock:
+            self._stats["requests"] += 1
+            for i, key in enumerate(keys):
+                score = self._scores.get(key)
+                if score is not None:
+                    self._scores.move_to_end(key)
+                    scores[i] = score
+            self._stats["cache_hits"] += len(scores)
+
+        pending = [i for i in range(len(chunks)) if i not in scores]
+        if pending:
+            abandoned = threading.Event()
+            try:
+                future = self._pool().submit(
+                    self._score, query, chunks, keys, pending, abandoned
+                )
+                scores.update(
+                    future.result(timeout=max(0.0, deadline - time.monotonic()))
+                )
+            except TimeoutError:
+                abandoned.set()
+                with self._lock:
+                    self._stats["over_budget"] += 1
+                logger.warning("Re-ranking over budget, keeping retrieval order")
+                return chunks[:top_k]
+            except Exception as e:
+                with self._lock:
+                    self._stats["errors"] += 1
+                logger.error(f"Re-ranking failed, keeping retrieval order: {e}")
+                return chunks[:top_k]
+
+        order = sorted(range(len(chunks)), key=lambda i: scores[i], reverse=True)
+        return [chunks[i].model_copy(update={"score": scores[i]}) for i in order][
+            :top_k
+        ]
+
+    def _score(
+        self,
+        query: str,
+        chunks: list[RetrievedChunk],
+        keys: list[tuple[str, str, int]],
+        pending: list[int],
+        abandoned: threading.Event,
+    ) -> dict[int, float]:
+        model = self._get_model()
+        scores: dict[int, float] = {}
+        for start in range(0, len(pending), self._batch_size):
+            if abandoned.is_set():
+                break
+            batch = pending[start : start + self._batch_size]
+            predicted = model.predict(
+                [(query, chunks[i].text) for i in batch],
+                batch_size=self._batch_size,
+            )
+            with self._lock:
+                for i, score in zip(batch, predicted):
+                    scores[i] = float(score)
+                    self._remember(keys[i], float(score))
+                self._stats["scored_pairs"] += len(batch)
+        return scores
+
+    def _pool(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._model_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self._max_workers, thread_name_prefix="rerank"
+                    )
+        return self._executor
+
+    def shutdown(self, wait: bool = True) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+    def _remember(self, key: tuple[str, str, int], score: float) -> None:
+        self._scores[key] = score
+        self._scores.move_to_end(key)
+        while len(self._scores) > self._cache_size:
+            self._scores.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                **self._stats,
+                "enabled": self.enabled,
+                "cached_scores": len(self._scores),
+            }
+
+
+reranker = Reranker(
+    model_name=Config["Env"].rerank_model,
+    device=Config["Env"].embedding_device,
+    batch_size=Config["Env"].rerank_batch_size,
+    budget_ms=Config["Env"].rerank_budget_ms,
+    cache_size=Config["Env"].rerank_cache_size,
+    enabled=Config["Env"].rerank_enabled,
+)
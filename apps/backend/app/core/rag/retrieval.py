@@ -0,0 +1,290 @@
+from dataclasses import dataclass, replace
+
+import numpy as np
+from fastapi.concurrency import run_in_threadpool
+
+from app.config import Config
+from app.core.chroma import async_docs
+from app.core.logger import get_logger
+from app.core.rag.cache import VectorHits, retrieval_cache
+from app.core.rag.lexical import lexical_store
+from app.core.rag.rerank import reranker
+from app.schemas.rag import RetrievalParams, RetrievedChunk
+
+logger = get_logger(__name__)
+
+
+@dataclass(frozen=True)
+class RetrievalSettings:
+    top_k: int
+    fetch_k: int
+    mmr_lambda: float
+    max_distance: float
+    rerank: bool = False
+    rerank_candidates: int = 0
+    hybrid: bool = False
+    lexical_k: int = 0
+    rrf_k: int = 60
+
+    @property
+    def use_mmr(self) -> bool:
+        return self.fetch_k > self.top_k and self.mmr_lambda < 1.0
+
+    @property
+    def n_results(self) -> int:
+        return self.fetch_k if self.use_mmr else self.top_k
+
+
+def resolve_settings(params: RetrievalParams | None = None) -> RetrievalSettings:
+    # request values win over the deployment defaults, field by field
+    env = Config["Env"]
+    overrides = params.model_dump(exclude_none=True) if params else {}
+    settings = {
+        "top_k": env.retrieval_top_k,
+        "fetch_k": env.retrieval_fetch_k,
+        "mmr_lambda": env.retrieval_mmr_lambda,
+        "max_distance": env.retrieval_max_distance,
+        "rerank": reranker.enabled,
+        "rerank_candidates": env.rerank_candidates,
+        "hybrid": env.hybrid_enabled,
+        "lexical_k": env.lexical_top_k,
+        "rrf_k": env.rrf_k,
+        **overrides,
+    }
+    # RERANK_ENABLED is a hard gate: a request may turn re-ranking off, but
+    # never load the cross-encoder on a deployment that disabled it
+    settings["rerank"] = reranker.enabled and overrides.get("rerank", True)
+    return RetrievalSettings(**settings)
+
+
+def mmr(query: np.ndarray, candidates: np.ndarray, k: int, lambda_: float) -> list[int]:
+    """Greedy maximal-marginal-relevance selection.
+
+    Returns indices into `candidates`, trading similarity to the query
+    (weight `lambda_`) against similarity to chunks already picked.
+    """
+    if len(candidates) == 0:
+        return []
+    query = query / (np.linalg.norm(query) or 1.0)
+    norms = np.linalg.norm(candidates, axis=1, keepdims=True)
+    candidates = candidates / np.where(norms == 0, 1.0, norms)
+
+    relevance = candidates @ query
+    redundancy = np.zeros(len(candidates))
+    selected: list[int] = []
+    remaining = np.ones(len(candidates), dtype=bool)
+    for _ in range(min(k, len(candidates))):
+        scores = lambda_ * relevance - (1 - lambda_) * redundancy
+        scores[~remaining] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        remaining[best] = False
+        redundancy = np.maximum(redundancy, candidates @ candidates[best])
+    return selected
+
+
+def select_chunks(
+    query: list[float],
+    ids: list[str],
+    texts: list[str],
+    distances: list[float],
+    metadatas: list[dict] | None,
+    embeddings: list[list[float]] | None,
+    settings: RetrievalSettings,
+) -> list[RetrievedChunk]:
+    """Apply the distance cut-off and MMR to candidates sorted by distance."""
+    metadatas = metadatas or [{} for _ in ids]
+    keep = [
+        i
+        for i, distance in enumerate(distances)
+        if not settings.max_distance or distance <= settings.max_distance
+    ]
+
+    if settings.use_mmr and embeddings is not None and len(keep) > settings.top_k:
+        picked = mmr(
+            np.asarray(query, dtype=np.float32),
+            np.asarray([embeddings[i] for i in keep], dtype=np.float32),
+            settings.top_k,
+            settings.mmr_lambda,
+        )
+        keep = [keep[i] for i in picked]
+    else:
+        keep = keep[: settings.top_k]
+
+    return [
+        RetrievedChunk(
+            id=ids[i],
+            text=str(texts[i]),
+            distance=float(distances[i]),
+            page=(metadatas[i] or {}).get("page"),
+            start=(metadatas[i] or {}).get("start"),
+            end=(metadatas[i] or {}).get("end"),
+        )
+        for i in keep
+    ]
+
+
+def reciprocal_rank_fusion(rankings: list[list[str]], k: int = 60) -> list[str]:
+    """Merge ranked id lists by summing 1 / (k + rank) across lists."""
+    scores: dict[str, float] = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, start=1):
+            scores[item] = scores.get(item, 0.0) + 1.0 / (k + rank)
+    return sorted(scores, key=lambda item: scores[item], reverse=True)
+
+
+def lexical_search(
+    doc_id: int, query: str, k: int, version: int | None = None
+) -> list[str]:
+    index = lexical_store.get(doc_id, version)
+    return [f"{doc_id}_chunk_{position}" for position, _ in index.search(query, k)]
+
+
+async def retrieve(
+    doc_id: int,
+    query: str,
+    vector: list[float],
+    settings: RetrievalSettings,
+    version: int | None = None,
+) -> list[RetrievedChunk]:
+    # with re-ranking on, retrieval widens to the candidate pool and the
+    # cross-encoder cuts it back down to top_k
+    candidates = settings
+    if settings.rerank:
+        candidates = replace(
+            settings, top_k=max(settings.top_k, settings.rerank_candidates)
+        )
+    pool = candidates.top_k
+
+    chunks = await _vector_search(doc_id, vector, candidates, version)
+    if settings.hybrid:
+        chunks = await _fuse_lexical(doc_id, query, chunks, settings, pool, version)
+    if settings.rerank:
+        return await run_in_threadpool(reranker.rerank, query, chunks, settings.top_k)
+    return chunks[: settings.top_k]
+
+
+async def _vector_search(
+    doc_id: int,
+    vector: list[float],
+    settings: RetrievalSettings,
+    version: int | None = None,
+) -> list[RetrievedChunk]:
+    key = retrieval_cache.key(
+        doc_id, vector, settings.n_results, settings.use_mmr, version
+    )
+    hits = retrieval_cache.get_hits(key)
+    if hits is None:
+        include = ["documents", "metadatas", "distances"]
+        if settings.use_mmr:
+            include.append("embeddings")
+
+        collection = await async_docs.get_docs()
+        result = await collection.query(
+            query_embeddings=[vector],
+            n_results=settings.n_results,
+            where={"doc_id": str(doc_id)},
+            include=include,
+        )
+
+        def first(field: str):
+            values = result.get(field)
+            return values[0] if values is not None and len(values) else None
+
+        ids = first("ids") or []
+        embeddings = first("embeddings")
+        hits = VectorHits(
+            ids=list(ids),
+            distances=list(first("distances") or [0.0] * len(ids)),
+            embeddings=(
+                np.asarray(embeddings, dtype=np.float32)
+                if embeddings is not None
+                else None
+            ),
+        )
+        retrieval_cache.put_hits(key, hits)
+        fetched = _to_chunks(ids, first("documents") or [], first("metadatas"))
+        retrieval_cache.put_chunks(doc_id, fetched, version)
+        by_id = {chunk.id: chunk for chunk in fetched}
+    else:
+        by_id = await _fetch_chunks(doc_id, hits.ids, version)
+
+    # chunks evicted from the text cache since the search drop out
+    present = [i for i, chunk_id in enumerate(hits.ids) if chunk_id in by_id]
+    return select_chunks(
+        query=vector,
+        ids=[hits.ids[i] for i in present],
+        texts=[by_id[hits.ids[i]].text for i in present],
+        distances=[hits.distances[i] for i in present],
+        metadatas=[_metadata(by_id[hits.ids[i]]) for i in present],
+        embeddings=(hits.embeddings[present] if hits.embeddings is not None else None),
+        settings=settings,
+    )
+
+
+def _to_chunks(
+    ids: list[str], texts: list[str], metadatas: list[dict] | None
+) -> list[RetrievedChunk]:
+    metadatas = metadatas or [None] * len(ids)
+    chunks = []
+    for chunk_id, text, metadata in zip(ids, texts, metadatas):
+        metadata = metadata or {}
+        chunks.append(
+            RetrievedChunk(
+                id=chunk_id,
+                text=str(text),
+                page=metadata.get("page"),
+                start=metadata.get("start"),
+                end=metadata.get("end"),
+            )
+        )
+    return chunks
+
+
+def _metadata(chunk: RetrievedChunk) -> dict:
+    return {"page": chunk.page, "start": chunk.start, "end": chunk.end}
+
+
+async def _fetch_chunks(
+    doc_id: int, ids: list[str], version: int | None = None
+) -> dict[str, RetrievedChunk]:
+    """Chunk texts by id, from the chunk cache where possible."""
+    found = retrieval_cache.get_chunks(ids, version)
+    missing = [chunk_id for chunk_id in ids if chunk_id not in found]
+    if missing:
+        collection = await async_docs.get_docs()
+        result = await collection.get(ids=missing, include=["documents", "metadatas"])
+        fetched = _to_chunks(
+            result["ids"], result.get("documents") or [], result.get("metadatas")
+        )
+        retrieval_cache.put_chunks(doc_id, fetched, version)
+        found.update((chunk.id, chunk) for chunk in fetched)
+    return found
+
+
+async def _fuse_lexical(
+    doc_id: int,
+    query: str,
+    chunks: list[RetrievedChunk],
+    settings: RetrievalSettings,
+    pool: int,
+    version: int | None = None,
+) -> list[RetrievedChunk]:
+    try:
+        hits = await run_in_threadpool(
+            lexical_search, doc_id, query, settings.lexical_k, version
+        )
+    except Exception as e:
+        logger.error(f"Lexical search failed for doc_id {doc_id}: {e}")
+        return chunks
+    if not hits:
+        return chunks
+
+    by_id = {chunk.id: chunk for chunk in chunks}
+    fused = reciprocal_rank_fusion([list(by_id), hits], k=settings.rrf_k)[:pool]
+
+    # lexical-only hits still need their text
+    missing = [chunk_id for chunk_id in fused if chunk_id not in by_id]
+    if missing:
+        by_id.update(await _fetch_chunks(doc_id, missing, version))
+    return [by_id[chunk_id] for chunk_id in fused if chunk_id in by_id]
@@ -1,9 +1,16 @@
+import hashlib
 import uuid
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import BinaryIO
+
 import boto3
-import httpx
+from botocore.config import Config as BotoConfig
 
 from app.config import Config
-from app.schemas.s3 import GeneratePresignedURLResponseSchema
+from app.core.logger import get_logger
+from app.schemas.s3 import GeneratePresignedURLResponseSchema, UploadResultSchema
+
+logger = get_logger(__name__)
 
 ALLOWED_CONTENT_TYPES = {
     "application/pdf": ".pdf",
@@ -12,16 +19,29 @@ ALLOWED_CONTENT_TYPES = {
     "text/plain": ".txt",
 }
 
+# S3 rejects multipart parts smaller than 5 MiB (except the last one)
+MIN_PART_SIZE = 5 * 1024 * 1024
+
 
 class S3Client:
-    def __init__(self, bucket_name: str):
+    def __init__(
+        self,
+        bucket_name: str,
+        part_size: int = 8 * 1024 * 1024,
+        concurrency: int = 4,
+        client=None,
+    ):
         self._bucket = bucket_name
-        self._client = boto3.client(
+        self._part_size = max(part_size, MIN_PART_SIZE)
+        self._concurrency = max(1, concurrency)
+        self._client = client or boto3.client(
             "s3",
             aws_access_key_id=Config["Env"].aws_access_key,
             aws_secret_access_key=Config["Env"].aws_secret_key,
             region_name=Config["Env"].aws_region,
+            config=BotoConfig(max_pool_connections=max(10, self._concurrency * 2)),
         )
+        self._executor: ThreadPoolExecutor | None = None
 
     def generate_put_presigned_url(self, content_type: str, expires_in: int = 300):
         self._validate_upload(content_type)
@@ -46,23 +66,132 @@ class S3Client:
             upload_url=url,
         )
 
-    def upload_file_to_presigned_url(
-        self, url: str, object_key: str, file: bytes, content_type: str
-    ):
-        print("uploading to s3...", url, "object_key", object_key)
-        response = httpx.put(
-            url,
-            headers={
-                "Content-Type": content_type,
-            },
-            content=file,
-            timeout=60,
+    def upload_fileobj(self, file: BinaryIO, content_type: str) -> UploadResultSchema:
+        """Stream a file object to S3, hashing and sizing it on the way.
+
+        Files up to one part go up in a single PUT. Larger ones use a
+        multipart upload, with at most `concurrency` parts buffered and in
+        flight at a time, so memory use is bounded by part_size * concurrency
+        whatever the file size.
+        """
+        self._validate_upload(content_type)
+        object_key = self._generate_object_key(content_type)
+        digest = hashlib.sha256()
+
+        first = file.read(self._part_size)
+        digest.update(first)
+        size = len(first)
+        if len(first) < self._part_size:
+            self._client.put_object(
+                Bucket=self._bucket,
+                Key=object_key,
+                Body=first,
+                ContentType=content_type,
+            )
+        else:
+            size = self._upload_multipart(
+                file=file,
+                object_key=object_key,
+                content_type=content_type,
+                first_part=first,
+                digest=digest,
+            )
+
+        logger.info(f"Uploaded {object_key} ({size} bytes)")
+        return UploadResultSchema(
+            object_key=object_key,
+            url=f"{Config["Env"].aws_cloudfront_url}/{object_key}",
+            size=size,
+            sha256=digest.hexdigest(),
+        )
+
+    def download_fileobj(self, object_key: str, file: BinaryIO) -> None:
+        self._client.download_fileobj(Bucket=self._bucket, Key=object_key, Fileobj=file)
+
+    def _upload_multipart(
+        self,
+        file: BinaryIO,
+        object_key: str,
+        content_type: str,
+        first_part: bytes,
+        digest,
+    ) -> int:
+        upload_id = self._client.create_multipart_upload(
+            Bucket=self._bucket, Key=object_key, ContentType=content_type
+        )["UploadId"]
+
+        parts: dict[int, str] = {}
+        in_flight: set[Future] = set()
+        size = 0
+        try:
+            part_number, body = 1, first_part
+            while body:
+                # wait for a free slot before reading the next part
+                if len(in_flight) >= self._concurrency:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        number, etag = future.result()
+                        parts[number] = etag
+
+                size += len(body)
+                in_flight.add(
+                    self._pool().submit(
+                        self._upload_part, object_key, upload_id, part_number, body
+                    )
+                )
+
+                body = file.read(self._part_size)
+                digest.update(body)
+                part_number += 1
+
+            for future in in_flight:
+                number, etag = future.result()
+                parts[number] = etag
+
+            self._client.complete_multipart_upload(
+                Bucket=self._bucket,
+                Key=object_key,
+                UploadId=upload_id,
+                MultipartUpload={
+                    "Parts": [
+                        {"PartNumber": number, "ETag": parts[number]}
+                        for number in sorted(parts)
+                    ]
+                },
+            )
+        except Exception:
+            for future in in_flight:
+                future.cancel()
+            self._client.abort_multipart_upload(
+                Bucket=self._bucket, Key=object_key, UploadId=upload_id
+            )
+            raise
+        return size
+
+    def _upload_part(
+        self, object_key: str, upload_id: str, part_number: int, body: bytes
+    ) -> tuple[int, str]:
+        response = self._client.upload_part(
+            Bucket=self._bucket,
+            Key=object_key,
+            UploadId=upload_id,
+            PartNumber=part_number,
+            Body=body,
         )
+        return part_number, response["ETag"]
 
-        response.raise_for_status()
-        print("s3 upload response", response.status_code)
+    def _pool(self) -> ThreadPoolExecutor:
+        # shared by all uploads in the process
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self._concurrency * 2, thread_name_prefix="s3-upload"
+            )
+        return self._executor
 
-        return f"{Config["Env"].aws_cloudfront_url}/{object_key}"
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
 
     def _generate_object_key(self, content_type: str):
         ext = ALLOWED_CONTENT_TYPES[content_type]
@@ -73,4 +202,8 @@ class S3Client:
             raise ValueError("Unsupported file type")
 
 
-s3 = S3Client(bucket_name=Config["Env"].aws_bucket)
+s3 = S3Client(
+    bucket_name=Config["Env"].aws_bucket,
+    part_size=Config["Env"].s3_part_size,
+    concurrency=Config["Env"].s3_upload_concurrency,
+)
@@ -53,3 +53,13 @@ class InvalidCredentials(AuthError):
             message="Invalid email or password",
             status_code=401,
         )
+
+
+class HashingOverloaded(AuthError):
+    code = "hashing_overloaded"
+
+    def __init__(self):
+        super().__init__(
+            message="Too many authentication requests, please retry shortly",
+            status_code=503,
+        )
@@ -103,3 +103,33 @@ class ChatsNotFound(DomainError):
             message="No chat messages found for this session",
             status_code=404,
         )
+
+
+class DocumentNotReady(DomainError):
+    code = "document_not_ready"
+
+    def __init__(self, status: str):
+        super().__init__(
+            message=f"Document is not ready for chat yet (status: {status})",
+            status_code=409,
+        )
+
+
+class DocumentNotFailed(DomainError):
+    code = "document_not_failed"
+
+    def __init__(self, status: str):
+        super().__init__(
+            message=f"Only failed documents can be re-ingested (status: {status})",
+            status_code=409,
+        )
+
+
+class InvalidCursor(DomainError):
+    code = "invalid_cursor"
+
+    def __init__(self):
+        super().__init__(
+            message="Invalid pagination cursor",
+            status_code=400,
+        )
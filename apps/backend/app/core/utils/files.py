@@ -0,0 +1,38 @@
+import hashlib
+import shutil
+import tempfile
+from typing import BinaryIO
+
+READ_CHUNK_SIZE = 1024 * 1024
+
+
+def hash_file(file: BinaryIO) -> tuple[str, int]:
+    """Return the sha256 hex digest and size of a file object.
+
+    The file is read in fixed-size chunks and rewound afterwards, so large
+    uploads spooled to disk are never held in memory.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    file.seek(0)
+    while chunk := file.read(READ_CHUNK_SIZE):
+        digest.update(chunk)
+        size += len(chunk)
+    file.seek(0)
+    return digest.hexdigest(), size
+
+
+def spool_to_disk(
+    file: BinaryIO, suffix: str = "", directory: str | None = None
+) -> str:
+    """Copy a file object to a new temporary file and return its path.
+
+    The caller owns the returned file and must delete it when done.
+    """
+    file.seek(0)
+    with tempfile.NamedTemporaryFile(
+        suffix=suffix, prefix="ingest-", dir=directory or None, delete=False
+    ) as tmp:
+        shutil.copyfileobj(file, tmp, READ_CHUNK_SIZE)
+    file.seek(0)
+    return tmp.name
@@ -1,31 +1,121 @@
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 from bcrypt import gensalt, hashpw, checkpw
 from jwt import encode, decode
 
 from app.schemas.auth import JwtPayload
 from app.config import Config
+from app.core.utils.exceptions.auth import HashingOverloaded
 
 
-class Security:
-    def __init__(self, secret):
-        self._secret = secret
+def _hash_password(password: str, rounds: int) -> str:
+    return hashpw(password.encode("utf-8"), gensalt(rounds=rounds)).decode("utf-8")
+
 
-    def hash_text(self, password: str):
-        return hashpw(password.encode("utf-8"), gensalt()).decode("utf-8")
+def _check_password(password: str, hash_password: str) -> bool:
+    return checkpw(
+        password=password.encode("utf-8"),
+        hashed_password=hash_password.encode("utf-8"),
+    )
 
-    def check_hash(self, password: str, hash_password: str) -> bool:
-        return checkpw(
-            password=password.encode("utf-8"),
-            hashed_password=hash_password.encode("utf-8"),
-        )
+
+def bcrypt_rounds(hash_password: str) -> int | None:
+    # bcrypt hashes look like $2b$12$<salt+digest>; the second field is the cost
+    parts = hash_password.split("$")
+    if len(parts) < 4 or not parts[2].isdigit():
+        return None
+    return int(parts[2])
+
+
+class Security:
+    def __init__(self, secret, token_ttl: int = 0):
+        self._secret = secret
+        self._token_ttl = token_ttl
 
     def generate_token(self, user_data: JwtPayload):
-        return encode(
-            payload=user_data.model_dump(), key=self._secret, algorithm="HS256"
-        )
+        payload = user_data.model_dump(exclude_none=True)
+        if self._token_ttl > 0:
+            payload["exp"] = datetime.now(timezone.utc) + timedelta(
+                seconds=self._token_ttl
+            )
+        return encode(payload=payload, key=self._secret, algorithm="HS256")
 
     def decode_token(self, token: str):
         data = decode(token, self._secret, algorithms=["HS256"])
         return data
 
 
-security = Security(secret=Config["Env"].access_token_secret)
+class HashingService:
+    """Runs bcrypt on a dedicated, bounded pool.
+
+    Hashing never shares the request threadpool, and once `max_pending` jobs
+    are queued or running, new ones are rejected with HashingOverloaded
+    instead of piling up behind a login burst.
+    """
+
+    def __init__(
+        self, rounds: int, mode: str, max_workers: int, max_pending: int
+    ) -> None:
+        self.rounds = rounds
+        self._mode = mode
+        self._max_workers = max_workers
+        self._max_pending = max_pending
+        self._pending = 0
+        self._executor: Executor | None = None
+
+    def _pool(self) -> Executor:
+        # created lazily so forked server workers each get their own pool
+        if self._executor is None:
+            if self._mode == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self._max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self._max_workers, thread_name_prefix="hashing"
+                )
+        return self._executor
+
+    async def _run(self, fn, *args):
+        if self._pending >= self._max_pending:
+            raise HashingOverloaded()
+
+        self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._pool(), fn, *args)
+        finally:
+            self._pending -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run(_hash_password, password, self.rounds)
+
+    async def verify(self, password: str, hash_password: str) -> bool:
+        return await self._run(_check_password, password, hash_password)
+
+    def needs_rehash(self, hash_password: str) -> bool:
+        return bcrypt_rounds(hash_password) != self.rounds
+
+    def stats(self) -> dict:
+        return {
+            "pending": self._pending,
+            "max_pending": self._max_pending,
+            "rounds": self.rounds,
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+security = Security(
+    secret=Config["Env"].access_token_secret,
+    token_ttl=Config["Env"].access_token_ttl,
+)
+
+hasher = HashingService(
+    rounds=Config["Env"].bcrypt_rounds,
+    mode=Config["Env"].hashing_mode,
+    max_workers=Config["Env"].hashing_workers,
+    max_pending=Config["Env"].hashing_max_pending,
+)
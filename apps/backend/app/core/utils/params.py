@@ -5,3 +5,8 @@ def get_pagination(req: Request):
     limit = int(req.query_params.get("limit", 10))
     offset = int(req.query_params.get("offset", 0))
     return limit, offset
+
+
+def get_cursor(req: Request) -> str | None:
+    # keyset cursor from a previous page; takes precedence over offset
+    return req.query_params.get("cursor") or None
@@ -1,4 +1,4 @@
-from .llm import llm_response
-from .embedding import generate_embeddings, HuggingFaceAdapter
-from .loader import load_document
-from .text_splitter import chunk_text
+from .llm import llm_response, llm_stream
+from .embedding import embed_batches, generate_embeddings, HuggingFaceAdapter
+from .loader import iter_pages, load_document
+from .text_splitter import chunk_documents, chunk_text
@@ -1,28 +1,145 @@
-from typing import List
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import islice
+from typing import Callable, Iterable, Iterator, List, TypeVar
 from chromadb.api.types import EmbeddingFunction, Documents
 from langchain_huggingface import HuggingFaceEmbeddings
 
+from app.config import Config
+from app.core.logger import get_logger
 
-def embedding_function():
-    return HuggingFaceEmbeddings(
-        model_name="BAAI/bge-small-en",
-        model_kwargs={"device": "cpu"},
-        encode_kwargs={"normalize_embeddings": True},
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+
+class EmbeddingRegistry:
+    """Process-wide cache of loaded embedding models.
+
+    Models are keyed by (model name, device, normalize) and built at most once
+    per process, so every caller shares the same weights in memory.
+    """
+
+    def __init__(self) -> None:
+        self._models: dict[tuple[str, str, bool], HuggingFaceEmbeddings] = {}
+        self._lock = threading.Lock()
+
+    def get(
+        self, model_name: str, device: str, normalize: bool
+    ) -> HuggingFaceEmbeddings:
+        key = (model_name, device, normalize)
+        model = self._models.get(key)
+        if model is not None:
+            return model
+
+        with self._lock:
+            # another thread may have loaded it while we waited for the lock
+            model = self._models.get(key)
+            if model is None:
+                logger.info(f"Loading embedding model {model_name} on {device}")
+                _configure_torch_threads()
+                model = HuggingFaceEmbeddings(
+                    model_name=model_name,
+                    model_kwargs={"device": device},
+                    encode_kwargs={"normalize_embeddings": normalize},
+                )
+                self._models[key] = model
+        return model
+
+    def clear(self) -> None:
+        with self._lock:
+            self._models.clear()
+
+
+embedding_registry = EmbeddingRegistry()
+
+_embedding_pool: ThreadPoolExecutor | None = None
+_embedding_pool_lock = threading.Lock()
+
+
+def _configure_torch_threads() -> None:
+    # cap intra-op threads so parallel batches don't oversubscribe the cpu
+    threads = Config["Env"].embedding_torch_threads
+    if threads > 0:
+        import torch
+
+        torch.set_num_threads(threads)
+
+
+def _pool() -> ThreadPoolExecutor:
+    global _embedding_pool
+    if _embedding_pool is None:
+        with _embedding_pool_lock:
+            if _embedding_pool is None:
+                _embedding_pool = ThreadPoolExecutor(
+                    max_workers=Config["Env"].embedding_workers,
+                    thread_name_prefix="embedding",
+                )
+    return _embedding_pool
+
+
+def embedding_function() -> HuggingFaceEmbeddings:
+    return embedding_registry.get(
+        model_name=Config["Env"].embedding_model,
+        device=Config["Env"].embedding_device,
+        normalize=Config["Env"].embedding_normalize,
     )
 
 
+def warmup_embeddings() -> None:
+    # load the default model and run one tiny batch so the first request
+    # doesn't pay for weight loading and lazy kernel initialisation
+    embedding_function().embed_query("warmup")
+
+
 def generate_embeddings(chunk_data: List[str]) -> list[list[float]]:
     hf = embedding_function()
     vec = hf.embed_documents(chunk_data)
     return vec
 
 
-class HuggingFaceEmbeddingAdapter(EmbeddingFunction):
-    def __init__(self, hf_embeddings):
-        self.hf_embeddings = hf_embeddings
+def embed_batches(
+    chunks: Iterable[T],
+    batch_size: int | None = None,
+    text: Callable[[T], str] | None = None,
+) -> Iterator[tuple[list[T], list[list[float]]]]:
+    """Embed chunks in fixed-size batches spread over the embedding pool.
+
+    Batches are yielded in input order as (chunks, vectors). `text` maps a
+    chunk to the string to embed when chunks aren't plain strings. At most
+    two batches per worker are in flight, so memory stays bounded no matter
+    how many chunks the input produces.
+    """
+    batch_size = batch_size or Config["Env"].embedding_batch_size
+    max_in_flight = max(1, Config["Env"].embedding_workers * 2)
+    chunks = iter(chunks)
+    in_flight: deque[tuple[list[str], Future]] = deque()
+
+    def submit() -> bool:
+        batch = list(islice(chunks, batch_size))
+        if not batch:
+            return False
+        texts = [text(c) for c in batch] if text else batch
+        in_flight.append((batch, _pool().submit(generate_embeddings, texts)))
+        return True
 
+    try:
+        while len(in_flight) < max_in_flight and submit():
+            pass
+        while in_flight:
+            batch, future = in_flight.popleft()
+            vectors = future.result()
+            submit()
+            yield batch, vectors
+    finally:
+        for _, future in in_flight:
+            future.cancel()
+
+
+class HuggingFaceEmbeddingAdapter(EmbeddingFunction):
     def __call__(self, input: Documents) -> list[list[float]]:
-        return self.hf_embeddings.embed_documents(input)
+        return embedding_function().embed_documents(input)
 
 
-HuggingFaceAdapter = HuggingFaceEmbeddingAdapter(embedding_function())
+HuggingFaceAdapter = HuggingFaceEmbeddingAdapter()
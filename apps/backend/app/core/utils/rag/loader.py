@@ -1,15 +1,45 @@
-from langchain_community.document_loaders import S3FileLoader
+import io
+import os
+import tempfile
+from pathlib import Path
+from typing import BinaryIO, Iterator
+
 from langchain_core.documents import Document
 
-from app.config import Config
+from app.core.s3.aws import s3
+from app.core.utils.rag.parsers import parse
+
+# a path on local disk, raw bytes, or an open binary file handle
+DocumentSource = str | os.PathLike | bytes | BinaryIO
+
+
+def load_document(key: str, source: DocumentSource | None = None) -> list[Document]:
+    return list(iter_pages(key, source))
+
+
+def iter_pages(key: str, source: DocumentSource | None = None) -> Iterator[Document]:
+    """Yield the document's pages one at a time.
+
+    The parser is chosen from the key's extension, so `source` only has to
+    provide the bytes.
+    """
+    if source is None:
+        yield from _iter_from_s3(key)
+        return
+
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as file:
+            yield from parse(file, key)
+        return
+
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+    yield from parse(source, key)
 
 
-def load_document(key: str) -> list[Document]:
-    loader = S3FileLoader(
-        bucket=Config["Env"].aws_bucket,
-        key=key,
-        aws_access_key_id=Config["Env"].aws_access_key,
-        aws_secret_access_key=Config["Env"].aws_secret_key,
-        region_name=Config["Env"].aws_region,
-    )
-    return loader.load()
+def _iter_from_s3(key: str) -> Iterator[Document]:
+    # fallback for re-ingest jobs that have no local copy of the upload
+    with tempfile.NamedTemporaryFile(suffix=Path(key).suffix) as tmp:
+        s3.download_fileobj(key, tmp)
+        tmp.flush()
+        yield from parse(tmp, key)
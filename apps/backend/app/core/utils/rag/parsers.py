@@ -0,0 +1,170 @@
+import codecs
+import io
+import zipfile
+from pathlib import Path
+from typing import BinaryIO, Callable, Iterator
+from xml.etree import ElementTree
+
+from langchain_community.document_loaders import UnstructuredFileIOLoader
+from langchain_core.documents import Document
+from pypdf import PdfReader, PdfWriter
+
+from app.config import Config
+from app.core.logger import get_logger
+from app.database.models.documents import ContentType
+
+logger = get_logger(__name__)
+
+# a parser reads an open binary file and yields one Document per page
+Parser = Callable[[BinaryIO, str], Iterator[Document]]
+
+PARSERS: dict[ContentType, Parser] = {}
+
+# plain text has no pages, so it is cut into blocks of roughly this size
+TEXT_BLOCK_SIZE = 64 * 1024
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+
+def register_parser(content_type: ContentType) -> Callable[[Parser], Parser]:
+    def decorator(parser: Parser) -> Parser:
+        PARSERS[content_type] = parser
+        return parser
+
+    return decorator
+
+
+def content_type_for(key: str) -> ContentType | None:
+    try:
+        return ContentType(Path(key).suffix.lstrip(".").lower())
+    except ValueError:
+        return None
+
+
+def parse(file: BinaryIO, key: str) -> Iterator[Document]:
+    """Yield the pages of `file`, picking the parser from the key's extension.
+
+    Formats without a registered parser go through unstructured.
+    """
+    content_type = content_type_for(key)
+    parser = PARSERS.get(content_type, parse_unstructured)
+    yield from parser(file, key)
+
+
+def _page(text: str, key: str, page: int) -> Document:
+    return Document(page_content=text, metadata={"source": key, "page": page})
+
+
+def parse_unstructured(file: BinaryIO, key: str) -> Iterator[Document]:
+    file.seek(0)
+    loader = UnstructuredFileIOLoader(file, metadata_filename=key)
+    for page, doc in enumerate(loader.lazy_load(), start=1):
+        doc.metadata.setdefault("page", page)
+        yield doc
+
+
+@register_parser(ContentType.TEXT)
+@register_parser(ContentType.MARKDOWN)
+def parse_text(file: BinaryIO, key: str) -> Iterator[Document]:
+    # decode incrementally and cut on line boundaries so a block never
+    # splits a line (or a markdown heading) in two
+    file.seek(0)
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    buffer = ""
+    page = 1
+    while chunk := file.read(TEXT_BLOCK_SIZE):
+        buffer += decoder.decode(chunk)
+        cut = buffer.rfind("\n")
+        if cut == -1:
+            continue
+        block, buffer = buffer[: cut + 1], buffer[cut + 1 :]
+        if block.strip():
+            yield _page(block, key, page)
+            page += 1
+    buffer += decoder.decode(b"", final=True)
+    if buffer.strip():
+        yield _page(buffer, key, page)
+
+
+@register_parser(ContentType.PDF)
+def parse_pdf(file: BinaryIO, key: str) -> Iterator[Document]:
+    # the text layer is enough for most PDFs; scanned ones have none and
+    # need unstructured's OCR/layout pipeline. Pages of a mixed PDF without
+    # text are OCR'd after the rest, so they come last
+    file.seek(0)
+    found = False
+    blank: list[int] = []
+    try:
+        reader = PdfReader(file)
+        for page, pdf_page in enumerate(reader.pages, start=1):
+            text = pdf_page.extract_text() or ""
+            if text.strip():
+                found = True
+                yield _page(text, key, page)
+            else:
+                blank.append(page)
+    except Exception as e:
+        if found:
+            raise
+        logger.warning(f"Text layer extraction failed for {key}: {e}")
+
+    if not found:
+        logger.info(f"No text layer in {key}, falling back to unstructured")
+        yield from parse_unstructured(file, key)
+        return
+
+    # a stray empty page isn't worth an OCR pass, a run of scans is
+    if blank and len(blank) / len(reader.pages) >= Config["Env"].pdf_ocr_min_share:
+        logger.info(f"OCR'ing {len(blank)} pages without a text layer in {key}")
+        yield from _ocr_pages(reader, key, blank)
+
+
+def _ocr_pages(reader: PdfReader, key: str, pages: list[int]) -> Iterator[Document]:
+    # each page goes through unstructured as its own one-page PDF, so the
+    # text keeps the page number it had in the original
+    for page in pages:
+        writer = PdfWriter()
+        writer.add_page(reader.pages[page - 1])
+        single = io.BytesIO()
+        writer.write(single)
+        text = "\n".join(doc.page_content for doc in parse_unstructured(single, key))
+        if text.strip():
+            yield _page(text, key, page)
+
+
+@register_parser(ContentType.DOCX)
+def parse_docx(file: BinaryIO, key: str) -> Iterator[Document]:
+    # stream word/document.xml and split pages on explicit page breaks
+    file.seek(0)
+    with zipfile.ZipFile(file) as archive, archive.open("word/document.xml") as xml:
+        paragraphs: list[str] = []
+        parts: list[str] = []
+        page = 1
+        for event, elem in ElementTree.iterparse(xml, events=("start", "end")):
+            tag = elem.tag
+            if event == "start":
+                if tag == f"{_W}br" and elem.get(f"{_W}type") == "page":
+                    paragraphs.append("".join(parts))
+                    parts = []
+                    text = "\n".join(p for p in paragraphs if p.strip())
+                    if text:
+                        yield _page(text, key, page)
+                        page += 1
+                    paragraphs = []
+                continue
+
+            if tag == f"{_W}t":
+                parts.append(elem.text or "")
+            elif tag == f"{_W}tab":
+                parts.append("\t")
+            elif tag == f"{_W}br":
+                if elem.get(f"{_W}type") != "page":
+                    parts.append("\n")
+            elif tag == f"{_W}p":
+                paragraphs.append("".join(parts))
+                parts = []
+                elem.clear()
+
+        text = "\n".join(p for p in paragraphs if p.strip())
+        if text:
+            yield _page(text, key, page)
@@ -0,0 +1,230 @@
+import re
+from dataclasses import dataclass
+
+from langchain_core.messages import (
+    AIMessage,
+    BaseMessage,
+    HumanMessage,
+    SystemMessage,
+)
+
+from app.config import Config
+from app.core.utils.rag.text_splitter import get_tokenizer
+from app.schemas.rag import History, LlmQuery, RetrievedChunk, Role
+
+SYSTEM_PROMPT = """You are a helpful document assistant.
+INSTRUCTIONS:
+1. Answer questions based ONLY on the provided document context
+2. If the answer isn't in the context, clearly state "I don't have enough information in the provided documents to answer that"
+3. When answering, cite relevant parts of the context when possible
+4. Be concise but complete in your responses
+5. If asked about previous conversation, use the session history provided
+6. Stay professional and helpful in tone
+Remember: Stay within the document scope. Don't make assumptions beyond what's explicitly stated in the context."""
+
+# chunks this close together on a page are merged into one passage
+MERGE_GAP = 1
+
+
+@dataclass(frozen=True)
+class PromptBudget:
+    max_tokens: int
+    history_tokens: int
+    memory_tokens: int
+
+
+@dataclass
+class _Passage:
+    text: str
+    page: int | None
+    start: int | None
+    end: int | None
+    rank: int
+
+
+class TokenCounter:
+    """Counts tokens with the embedding model's tokenizer.
+
+    Gemini's tokenizer isn't available offline; the WordPiece count of the
+    embedder tracks it closely enough for budgeting.
+    """
+
+    def __init__(self, model_name: str) -> None:
+        self._tokenizer = get_tokenizer(model_name)
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        return len(
+            self._tokenizer(text, add_special_tokens=False, verbose=False)["input_ids"]
+        )
+
+    def truncate(self, text: str, max_tokens: int, keep_end: bool = False) -> str:
+        if max_tokens <= 0:
+            return ""
+        offsets = self._tokenizer(
+            text,
+            add_special_tokens=False,
+            return_offsets_mapping=True,
+            verbose=False,
+        )["offset_mapping"]
+        if len(offsets) <= max_tokens:
+            return text
+        if keep_end:
+            return text[offsets[-max_tokens][0] :]
+        return text[: offsets[max_tokens - 1][1]]
+
+
+def _normalize(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+def merge_chunks(chunks: list[RetrievedChunk]) -> list[_Passage]:
+    """Drop duplicate chunks and merge ones that overlap or touch on a page.
+
+    Input order is relevance order; a merged passage keeps the best rank of
+    its parts and the result is sorted by that rank.
+    """
+    passages: list[_Passage] = []
+    seen: set[str] = set()
+    for rank, chunk in enumerate(chunks):
+        key = _normalize(chunk.text)
+        if not key or key in seen:
+            continue
+        seen.add(key)
+        passages.append(
+            _Passage(chunk.text, chunk.page, chunk.start, chunk.end, rank=rank)
+        )
+
+    unlocated = [p for p in passages if p.start is None or p.end is None]
+    located = [p for p in passages if p.start is not None and p.end is not None]
+    located.sort(key=lambda p: (p.page or 0, p.start))
+    merged: list[_Passage] = []
+    for passage in located:
+        last = merged[-1] if merged else None
+        if (
+            last is not None
+            and last.page == passage.page
+            and passage.start <= last.end + MERGE_GAP
+        ):
+            if passage.end > last.end:
+                overlap = max(0, last.end - passage.start)
+                last.text += passage.text[overlap:]
+                last.end = passage.end
+            last.rank = min(last.rank, passage.rank)
+            continue
+        merged.append(passage)
+
+    return sorted(merged + unlocated, key=lambda p: p.rank)
+
+
+class PromptBuilder:
+    """Assembles chat messages within a token budget.
+
+    The system prompt and question are always sent. Session memory and
+    history get capped slices of what's left (newest turns first), and
+    the remaining tokens are filled with document passages in relevance
+    order.
+    """
+
+    def __init__(self, counter: TokenCounter, budget: PromptBudget) -> None:
+        self._counter = counter
+        self._budget = budget
+
+    def build(self, input_data: LlmQuery) -> list[BaseMessage]:
+        count = self._counter.count
+        question = f"[Current Question]: {input_data.query}"
+        remaining = self._budget.max_tokens - count(SYSTEM_PROMPT) - count(question)
+
+        memory = ""
+        if input_data.context:
+            memory = self._counter.truncate(
+                input_data.context,
+                min(self._budget.memory_tokens, max(remaining, 0)),
+                keep_end=True,
+            )
+            remaining -= count(memory)
+
+        history, used = self._fit_history(
+            input_data.history or [], min(self._budget.history_tokens, remaining)
+        )
+        remaining -= used
+
+        context = self._pack_context(input_data, remaining)
+
+        messages: list[BaseMessage] = [SystemMessage(content=SYSTEM_PROMPT)]
+        if memory:
+            messages.append(SystemMessage(content=f"SESSION MEMORY:\n{memory}"))
+        messages.extend(history)
+        messages.append(
+            HumanMessage(
+                content=f"""DOCUMENT CONTEXT:
+{context}
+
+Please use the above context to answer the following question."""
+            )
+        )
+        messages.append(HumanMessage(content=question))
+        return messages
+
+    def _fit_history(
+        self, history: list[History], budget: int
+    ) -> tuple[list[BaseMessage], int]:
+        # walk back from the newest turn and stop at the first that won't fit
+        kept: list[BaseMessage] = []
+        used = 0
+        for turn in reversed(history):
+            cost = self._counter.count(turn.content)
+            if used + cost > budget:
+                break
+            used += cost
+            if turn.role == Role.user:
+                kept.append(
+                    HumanMessage(content=f"[Previous Question]: {turn.content}")
+                )
+            else:
+                kept.append(AIMessage(content=turn.content))
+        kept.reverse()
+        return kept, used
+
+    def _pack_context(self, input_data: LlmQuery, budget: int) -> str:
+        if input_data.chunks is not None:
+            passages = merge_chunks(input_data.chunks)
+        else:
+            passages = [
+                _Passage(text, None, None, None, rank=i)
+                for i, text in enumerate(input_data.doc_data)
+            ]
+
+        blocks: list[str] = []
+        used = 0
+        for passage in passages:
+            label = f"[{len(blocks) + 1}]"
+            if passage.page:
+                label += f" (page {passage.page})"
+            block = f"{label}\n{passage.text.strip()}"
+            cost = self._counter.count(block)
+            # a passage that doesn't fit is skipped; a smaller, less relevant
+            # one may still fit in what's left
+            if used + cost > budget:
+                continue
+            blocks.append(block)
+            used += cost
+        return "\n\n".join(blocks)
+
+
+_builder: PromptBuilder | None = None
+
+
+def prompt_builder() -> PromptBuilder:
+    global _builder
+    if _builder is None:
+        _builder = PromptBuilder(
+            counter=TokenCounter(Config["Env"].embedding_model),
+            budget=PromptBudget(
+                max_tokens=Config["Env"].prompt_max_tokens,
+                history_tokens=Config["Env"].prompt_history_tokens,
+                memory_tokens=Config["Env"].prompt_memory_tokens,
+            ),
+        )
+    return _builder
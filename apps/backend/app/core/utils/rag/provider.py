@@ -0,0 +1,335 @@
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Callable
+
+import httpx
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+
+from app.config import Config
+from app.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+# HTTP statuses worth another attempt: timeouts, rate limits, overload
+_RETRYABLE_STATUSES = {408, 429, 500, 502, 503, 504}
+
+
+class LlmTimeout(TimeoutError):
+    pass
+
+
+def _status_code(error: BaseException) -> int | None:
+    # SDK errors carry the HTTP status as `code` (google-genai, api_core) or
+    # `status_code`, or on the response they wrap
+    for value in (
+        getattr(error, "code", None),
+        getattr(error, "status_code", None),
+        getattr(getattr(error, "response", None), "status_code", None),
+    ):
+        if isinstance(value, int) and not isinstance(value, bool):
+            return value
+    return None
+
+
+def _is_retryable(error: BaseException | None) -> bool:
+    # provider wrappers re-raise the SDK error as their cause, so walk the
+    # chain until something says what went wrong
+    seen: set[int] = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        if isinstance(error, (TimeoutError, ConnectionError, httpx.TransportError)):
+            return True
+        status = _status_code(error)
+        if status is not None:
+            return status in _RETRYABLE_STATUSES
+        # langchain ModelError subclasses classify themselves
+        retryable = getattr(error, "is_retryable", None)
+        if isinstance(retryable, bool):
+            return retryable
+        error = error.__cause__ or error.__context__
+    return False
+
+
+def content_text(content) -> str:
+    # responses carry either a plain string or a list of content parts
+    if isinstance(content, str):
+        return content
+    return "".join(
+        part if isinstance(part, str) else part.get("text", "")
+        for part in content
+        if isinstance(part, (str, dict))
+    )
+
+
+class LlmClient:
+    """Long-lived chat model with bounded concurrency, retries and metrics.
+
+    The model is built once on first use, so its HTTP/gRPC connections are
+    kept alive across calls. Every call runs under a deadline; retryable
+    errors back off with full jitter for as long as the deadline allows.
+    Streams are only retried before their first token; once tokens flow the
+    deadline no longer applies and only a gap of `idle_timeout` between
+    chunks ends them.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], BaseChatModel],
+        max_concurrency: int,
+        timeout: float,
+        max_retries: int,
+        backoff_base: float,
+        backoff_max: float,
+        idle_timeout: float | None = None,
+    ) -> None:
+        self._factory = factory
+        self._model: BaseChatModel | None = None
+        self._model_lock = threading.Lock()
+        self._max_concurrency = max_concurrency
+        self._async_slots: asyncio.Semaphore | None = None
+        self._sync_slots = threading.BoundedSemaphore(max_concurrency)
+        self._sync_executor: ThreadPoolExecutor | None = None
+        self._timeout = timeout
+        self._idle_timeout = idle_timeout or timeout
+        self._max_retries = max_retries
+        self._backoff_base = backoff_base
+        self._backoff_max = backoff_max
+        self._lock = threading.Lock()
+        self._latencies: deque[float] = deque(maxlen=1024)
+        self._stats = {
+            "calls": 0,
+            "errors": 0,
+            "retries": 0,
+            "timeouts": 0,
+            "input_tokens": 0,
+            "output_tokens": 0,
+        }
+
+    @property
+    def model(self) -> BaseChatModel:
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    self._model = self._factory()
+        return self._model
+
+    def _slots(self) -> asyncio.Semaphore:
+        # created on first use so it binds to the serving event loop
+        if self._async_slots is None:
+            self._async_slots = asyncio.Semaphore(self._max_concurrency)
+        return self._async_slots
+
+    def _backoff(self, attempt: int, deadline: float) -> float | None:
+        delay = random.uniform(
+            0, min(self._backoff_max, self._backoff_base * 2**attempt)
+        )
+        if attempt >= self._max_retries or time.monotonic() + delay >= deadline:
+            return None
+        return delay
+
+    async def ainvoke(self, messages: list[BaseMessage]) -> str:
+        deadline = time.monotonic() + self._timeout
+        attempt = 0
+        while True:
+            start = time.monotonic()
+            try:
+                async with self._slots():
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise LlmTimeout("LLM deadline exceeded")
+                    response = await asyncio.wait_for(
+                        self.model.ainvoke(messages), remaining
+                    )
+            except Exception as e:
+                delay = self._on_error(e, attempt, deadline)
+                if delay is None:
+                    raise
+                attempt += 1
+                await asyncio.sleep(delay)
+                continue
+            self._record(start, response)
+            return content_text(response.content)
+
+    async def astream(self, messages: list[BaseMessage]) -> AsyncIterator[str]:
+        deadline = time.monotonic() + self._timeout
+        attempt = 0
+        while True:
+            start = time.monotonic()
+            started = False
+            usage = None
+            try:
+                async with self._slots():
+                    stream = self.model.astream(messages)
+                    try:
+                        while True:
+                            # the deadline bounds time to first token; after
+                            # that the answer may take as long as it keeps
+                            # producing chunks
+                            if started:
+                                remaining = self._idle_timeout
+                            else:
+                                remaining = deadline - time.monotonic()
+                                if remaining <= 0:
+                                    raise LlmTimeout("LLM deadline exceeded")
+                            try:
+                                chunk = await asyncio.wait_for(anext(stream), remaining)
+                            except StopAsyncIteration:
+                                break
+                            except asyncio.TimeoutError:
+                                if started:
+                                    raise LlmTimeout("LLM stream stalled") from None
+                                raise
+                            usage = getattr(chunk, "usage_metadata", None) or usage
+                            text = content_text(chunk.content)
+                            if text:
+                                started = True
+                                yield text
+                    finally:
+                        await stream.aclose()
+            except (GeneratorExit, asyncio.CancelledError):
+                raise
+            except Exception as e:
+                delay = None if started else self._on_error(e, attempt, deadline)
+                if delay is None:
+                    if started:
+                        self._count_error(e)
+                    raise
+                attempt += 1
+                await asyncio.sleep(delay)
+                continue
+            self._record(start, None, usage)
+            return
+
+    def invoke(self, messages: list[BaseMessage]) -> str:
+        # blocking variant for worker threads (session naming, memory)
+        deadline = time.monotonic() + self._timeout
+        attempt = 0
+        while True:
+            start = time.monotonic()
+            try:
+                response = self._invoke_until(messages, deadline)
+            except Exception as e:
+                delay = self._on_error(e, attempt, deadline)
+                if delay is None:
+                    raise
+                attempt += 1
+                time.sleep(delay)
+                continue
+            self._record(start, response)
+            return content_text(response.content)
+
+    def _invoke_until(self, messages: list[BaseMessage], deadline: float):
+        # a blocking call can't be cancelled, so it runs on a helper thread
+        # and the caller stops waiting at the deadline; its slot is only
+        # released once the abandoned call returns
+        remaining = deadline - time.monotonic()
+        if remaining <= 0 or not self._sync_slots.acquire(timeout=remaining):
+            raise LlmTimeout("LLM deadline exceeded")
+        try:
+            future = self._sync_pool().submit(self.model.invoke, messages)
+        except BaseException:
+            self._sync_slots.release()
+            raise
+        future.add_done_callback(lambda _: self._sync_slots.release())
+        try:
+            return future.result(timeout=max(0.0, deadline - time.monotonic()))
+        except TimeoutError:
+            if future.done():
+                raise
+            raise LlmTimeout("LLM deadline exceeded") from None
+
+    def _sync_pool(self) -> ThreadPoolExecutor:
+        if self._sync_executor is None:
+            with self._model_lock:
+                if self._sync_executor is None:
+                    self._sync_executor = ThreadPoolExecutor(
+                        max_workers=self._max_concurrency, thread_name_prefix="llm"
+                    )
+        return self._sync_executor
+
+    def _on_error(
+        self, error: Exception, attempt: int, deadline: float
+    ) -> float | None:
+        delay = self._backoff(attempt, deadline) if _is_retryable(error) else None
+        if delay is None:
+            self._count_error(error)
+            return None
+        with self._lock:
+            self._stats["retries"] += 1
+        logger.warning(f"LLM call failed ({error!r}), retrying in {delay:.2f}s")
+        return delay
+
+    def _count_error(self, error: Exception) -> None:
+        with self._lock:
+            self._stats["errors"] += 1
+            if isinstance(error, (asyncio.TimeoutError, TimeoutError)):
+                self._stats["timeouts"] += 1
+
+    def _record(self, start: float, response, usage: dict | None = None) -> None:
+        usage = usage or getattr(response, "usage_metadata", None) or {}
+        with self._lock:
+            self._stats["calls"] += 1
+            self._stats["input_tokens"] += usage.get("input_tokens", 0)
+            self._stats["output_tokens"] += usage.get("output_tokens", 0)
+            self._latencies.append(time.monotonic() - start)
+
+    def stats(self) -> dict:
+        with self._lock:
+            latencies = sorted(self._latencies)
+            stats = dict(self._stats)
+        if latencies:
+            stats["latency_p50"] = latencies[len(latencies) // 2]
+            stats["latency_p95"] = latencies[int(len(latencies) * 0.95)]
+        return stats
+
+
+def gemini_model() -> BaseChatModel:
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
+    # retries are handled by LlmClient, under its own deadline
+    return ChatGoogleGenerativeAI(
+        model=Config["Env"].llm_model,
+        timeout=Config["Env"].llm_timeout,
+        max_retries=0,
+    )
+
+
+def fake_model() -> BaseChatModel:
+    # canned, offline responses for tests and load benchmarks
+    from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+    return FakeListChatModel(
+        responses=["This is a canned answer from the local fake model."],
+        sleep=0.01,
+    )
+
+
+PROVIDERS: dict[str, Callable[[], BaseChatModel]] = {
+    "gemini": gemini_model,
+    "fake": fake_model,
+}
+
+
+def _build_client(factory: Callable[[], BaseChatModel]) -> LlmClient:
+    return LlmClient(
+        factory=factory,
+        max_concurrency=Config["Env"].llm_max_concurrency,
+        timeout=Config["Env"].llm_timeout,
+        max_retries=Config["Env"].llm_max_retries,
+        backoff_base=Config["Env"].llm_backoff_base,
+        backoff_max=Config["Env"].llm_backoff_max,
+        idle_timeout=Config["Env"].llm_stream_idle_timeout,
+    )
+
+
+llm_client = _build_client(PROVIDERS[Config["Env"].llm_provider])
+
+
+def client_for(model: BaseChatModel) -> LlmClient:
+    """Wrap an explicit model (e.g. a test double) with the same policies."""
+    return _build_client(lambda: model)
@@ -1,9 +1,110 @@
-from typing import List
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+from functools import lru_cache
+from typing import Iterable, Iterator, List
+
 from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from transformers import AutoTokenizer, PreTrainedTokenizerBase
+
+from app.config import Config
+
+
+@lru_cache(maxsize=4)
+def get_tokenizer(model_name: str) -> PreTrainedTokenizerBase:
+    return AutoTokenizer.from_pretrained(model_name)
+
+
+def max_chunk_tokens(tokenizer: PreTrainedTokenizerBase) -> int:
+    # the embedder truncates at model_max_length including [CLS]/[SEP], so
+    # anything past this many content tokens would never be embedded
+    return tokenizer.model_max_length - tokenizer.num_special_tokens_to_add()
+
+
+class TokenChunker:
+    """Split pages into chunks measured in embedding-model tokens.
+
+    Pages are consumed one at a time and chunks are yielded as they are cut,
+    so memory is bounded by the largest page, not the document. Each chunk
+    carries its page number and character offsets within that page.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        chunk_tokens: int,
+        overlap_tokens: int = 0,
+    ) -> None:
+        self._tokenizer = get_tokenizer(model_name)
+        self.chunk_tokens = min(chunk_tokens, max_chunk_tokens(self._tokenizer))
+        self.overlap_tokens = min(overlap_tokens, self.chunk_tokens // 2)
+        self._splitter = RecursiveCharacterTextSplitter(
+            chunk_size=self.chunk_tokens,
+            chunk_overlap=self.overlap_tokens,
+            length_function=self.count_tokens,
+            add_start_index=True,
+        )
+
+    def count_tokens(self, text: str) -> int:
+        return len(
+            self._tokenizer(text, add_special_tokens=False, verbose=False)["input_ids"]
+        )
+
+    def split(self, pages: Iterable[Document]) -> Iterator[Document]:
+        for page in pages:
+            for chunk in self._splitter.split_documents([page]):
+                yield from self._enforce_limit(chunk)
+
+    def _enforce_limit(self, chunk: Document) -> Iterator[Document]:
+        # the recursive splitter sums token counts of the pieces it merges,
+        # which can undercount slightly; re-cut on token offsets if needed
+        text = chunk.page_content
+        start = chunk.metadata.pop("start_index", 0)
+        encoded = self._tokenizer(
+            text,
+            add_special_tokens=False,
+            return_offsets_mapping=True,
+            verbose=False,
+        )
+        offsets = encoded["offset_mapping"]
+        if len(offsets) <= self.chunk_tokens:
+            yield self._chunk(text, chunk.metadata, start, len(offsets))
+            return
+
+        step = self.chunk_tokens - self.overlap_tokens
+        for i in range(0, len(offsets), step):
+            window = offsets[i : i + self.chunk_tokens]
+            begin, end = window[0][0], window[-1][1]
+            yield self._chunk(
+                text[begin:end], chunk.metadata, start + begin, len(window)
+            )
+            if i + self.chunk_tokens >= len(offsets):
+                break
+
+    @staticmethod
+    def _chunk(text: str, metadata: dict, start: int, tokens: int) -> Document:
+        return Document(
+            page_content=text,
+            metadata={
+                **metadata,
+                "start": start,
+                "end": start + len(text),
+                "tokens": tokens,
+            },
+        )
+
+
+def default_chunker() -> TokenChunker:
+    return TokenChunker(
+        model_name=Config["Env"].embedding_model,
+        chunk_tokens=Config["Env"].chunk_tokens,
+        overlap_tokens=Config["Env"].chunk_overlap_tokens,
+    )
+
+
+def chunk_documents(
+    pages: Iterable[Document], chunker: TokenChunker | None = None
+) -> Iterator[Document]:
+    return (chunker or default_chunker()).split(pages)
 
 
 def chunk_text(document: List[Document]) -> List[str]:
-    text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=0)
-    chunks = text_splitter.split_documents(document)
-    return [chunk.page_content for chunk in chunks]
+    return [chunk.page_content for chunk in chunk_documents(document)]
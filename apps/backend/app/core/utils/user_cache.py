@@ -0,0 +1,77 @@
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import event
+
+from app.config import Config
+from app.database.models.user import User
+
+
+class UserCache:
+    """Bounded LRU + TTL cache from user id to the request principal.
+
+    Entries are dropped whenever a User row is updated or deleted through the
+    ORM in this process; other workers see the change once the TTL expires.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float) -> None:
+        self._max_entries = max_entries
+        self._ttl = ttl_seconds
+        self._entries: OrderedDict[int, tuple[float, dict]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self._max_entries > 0 and self._ttl > 0
+
+    def get(self, user_id: int) -> dict | None:
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[0] <= time.monotonic():
+                self._entries.pop(user_id, None)
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self._stats["hits"] += 1
+            return dict(entry[1])
+
+    def set(self, user_id: int, principal: dict) -> None:
+        if not self.enabled:
+            return
+
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + self._ttl, dict(principal))
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def invalidate(self, user_id: int) -> None:
+        with self._lock:
+            self._entries.pop(user_id, None)
+            self._stats["invalidations"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self._stats, "entries": len(self._entries)}
+
+
+user_cache = UserCache(
+    max_entries=Config["Env"].user_cache_size,
+    ttl_seconds=Config["Env"].user_cache_ttl,
+)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_user(mapper, connection, target: User) -> None:
+    user_cache.invalidate(target.id)
@@ -0,0 +1 @@
+from .local import AsyncLocalVectorStore, LocalVectorStore
@@ -0,0 +1,497 @@
+import asyncio
+import heapq
+import json
+import shutil
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+
+from app.core.logger import get_logger
+from app.core.vectorstore.quantization import codecs_for
+
+logger = get_logger(__name__)
+
+CHUNKS_FILE = "chunks.jsonl"
+SCALES_FILE = "scales.f32"
+NORMS_FILE = "norms.f32"
+META_FILE = "meta.json"
+GRAPH_FILE = "graph.npy"
+
+# distances held in memory at once while building the neighbour graph
+_BUILD_CELLS = 1 << 25
+# evenly spaced rows scored exactly to pick where a graph search starts;
+# a plain kNN graph falls apart into clusters, so starting near the query
+# matters more than the edges
+_ROUTING_ROWS = 1024
+
+
+def _doc_key(where: dict | None, ids: list[str] | None = None) -> list[str]:
+    # chunks are always scoped to one document: by filter, or by the
+    # `{doc_id}_chunk_{n}` id convention
+    if where:
+        if set(where) != {"doc_id"}:
+            raise ValueError(f"Unsupported filter for local vector store: {where}")
+        return [str(where["doc_id"])]
+    if ids:
+        return list(dict.fromkeys(i.rsplit("_chunk_", 1)[0] for i in ids))
+    raise ValueError("Local vector store needs a doc_id filter or chunk ids")
+
+
+def _rows(path: Path, dtype, width: int = 1) -> int:
+    try:
+        return path.stat().st_size // (np.dtype(dtype).itemsize * width)
+    except FileNotFoundError:
+        return 0
+
+
+def _map(path: Path, dtype, rows: int, width: int | None = None) -> np.ndarray:
+    shape = (rows, width) if width is not None else (rows,)
+    if not rows:
+        return np.zeros(shape, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", shape=shape)
+
+
+class _DocIndex:
+    """One document's chunks: memory-mapped vectors plus texts and metadata."""
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+        self.size_on_disk = (directory / CHUNKS_FILE).stat().st_size
+        meta = json.loads((directory / META_FILE).read_text())
+        self.codec, self.coarse = codecs_for(
+            meta.get("encoding", "float32"), meta["dim"]
+        )
+
+        self.ids: list[str] = []
+        self.documents: list[str] = []
+        self.metadatas: list[dict] = []
+        with open(directory / CHUNKS_FILE, encoding="utf-8") as f:
+            for line in f:
+                if not line.endswith("\n"):
+                    break  # torn write
+                row = json.loads(line)
+                self.ids.append(row["id"])
+                self.documents.append(row["document"])
+                self.metadatas.append(row["metadata"])
+
+        codec = self.codec
+        codes_path = directory / codec.filename
+        rows = min(len(self.ids), _rows(codes_path, codec.dtype, codec.width))
+        if codec.scaled:
+            rows = min(rows, _rows(directory / SCALES_FILE, np.float32))
+        if self.coarse is not None:
+            coarse_path = directory / self.coarse.filename
+            rows = min(rows, _rows(coarse_path, self.coarse.dtype, self.coarse.width))
+        has_norms = bool(meta.get("norms"))
+        if has_norms:
+            rows = min(rows, _rows(directory / NORMS_FILE, np.float32))
+        del self.ids[rows:], self.documents[rows:], self.metadatas[rows:]
+
+        self.codes = _map(codes_path, codec.dtype, rows, codec.width)
+        self.scales = (
+            _map(directory / SCALES_FILE, np.float32, rows) if codec.scaled else None
+        )
+        self.coarse_codes = (
+            _map(coarse_path, self.coarse.dtype, rows, self.coarse.width)
+            if self.coarse is not None
+            else None
+        )
+        if has_norms:
+            self.norms = _map(directory / NORMS_FILE, np.float32, rows)
+        else:
+            vectors = codec.decode(self.codes, self.scales)
+            self.norms = np.einsum("ij,ij->i", vectors, vectors)
+
+        # a re-upserted id keeps only its latest row
+        self.position = {chunk_id: row for row, chunk_id in enumerate(self.ids)}
+        self.live: np.ndarray | None = None
+        if len(self.position) < rows:
+            self.live = np.zeros(rows, dtype=bool)
+            self.live[list(self.position.values())] = True
+        self.graph: np.ndarray | None = None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def vectors(self, rows=slice(None)) -> np.ndarray:
+        scales = self.scales[rows] if self.scales is not None else None
+        return self.codec.decode(self.codes[rows], scales)
+
+    def distances(self, query: np.ndarray, rows=slice(None)) -> np.ndarray:
+        # squared L2, same as Chroma's default space; norms are exact, only
+        # the dot product goes through the quantised codes
+        scales = self.scales[rows] if self.scales is not None else None
+        dots = self.codec.scores(self.codes[rows], scales, query)
+        return self.norms[rows] - 2 * dots + query @ query
+
+    def brute_force(
+        self, query: np.ndarray, k: int, rescore: int
+    ) -> tuple[np.ndarray, np.ndarray]:
+        if self.coarse is not None:
+            # short-list by Hamming distance, re-score only the short list
+            hamming = self.coarse.hamming(self.coarse_codes, query).astype(np.float32)
+            if self.live is not None:
+                hamming[~self.live] = np.inf
+            n = min(max(k, k * rescore), int(np.isfinite(hamming).sum()))
+            if n == 0:
+                return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+            rows = np.sort(np.argpartition(hamming, n - 1)[:n])
+            dist = self.distances(query, rows)
+        else:
+            rows = np.arange(len(self))
+            dist = self.distances(query)
+            if self.live is not None:
+                dist = np.where(self.live, dist, np.inf)
+        k = min(k, int(np.isfinite(dist).sum()))
+        if k == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        top = np.argpartition(dist, k - 1)[:k]
+        top = top[np.argsort(dist[top])]
+        return rows[top], dist[top]
+
+    def routing_rows(self) -> np.ndarray:
+        step = max(1, len(self) // _ROUTING_ROWS)
+        return np.arange(0, len(self), step, dtype=np.int64)
+
+    def graph_search(
+        self, query: np.ndarray, k: int, ef: int
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Best-first beam search over the neighbour graph."""
+        ef = max(ef, k)
+        routing = self.routing_rows()
+        routing_dist = self.distances(query, routing)
+        seeds = np.argsort(routing_dist)[:ef]
+
+        visited = set(routing.tolist())
+        candidates = list(zip(routing_dist[seeds].tolist(), routing[seeds].tolist()))
+        heapq.heapify(candidates)
+        # max-heap (negated) of the best ef rows found so far
+        best = [(-d, r) for d, r in candidates]
+        heapq.heapify(best)
+
+        while candidates:
+            dist, row = heapq.heappop(candidates)
+            if len(best) >= ef and dist > -best[0][0]:
+                break
+            # a mutual neighbour shows up as both a forward and reverse edge
+            neighbours = [
+                n
+                for n in dict.fromkeys(self.graph[row].tolist())
+                if n >= 0 and n not in visited
+            ]
+            if not neighbours:
+                continue
+            visited.update(neighbours)
+            for d, n in zip(self.distances(query, neighbours).tolist(), neighbours):
+                if len(best) < ef or d < -best[0][0]:
+                    heapq.heappush(candidates, (d, n))
+                    heapq.heappush(best, (-d, n))
+                    if len(best) > ef:
+                        heapq.heappop(best)
+
+        found = sorted((-d, r) for d, r in best)
+        if self.live is not None:
+            found = [(d, r) for d, r in found if self.live[r]]
+        found = found[:k]
+        return (
+            np.array([r for _, r in found], dtype=np.int64),
+            np.array([d for d, _ in found], dtype=np.float32),
+        )
+
+
+def build_graph(vectors: np.ndarray, degree: int) -> np.ndarray:
+    """Exact k-nearest-neighbour graph plus reverse edges.
+
+    Row i holds up to `degree` nearest rows followed by up to `degree` rows
+    that list i among their own nearest, padded with -1. The reverse edges
+    keep outlying rows reachable during search.
+    """
+    n = len(vectors)
+    degree = min(degree, n - 1)
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.einsum("ij,ij->i", vectors, vectors)
+    forward = np.empty((n, degree), dtype=np.int32)
+    step = max(1, _BUILD_CELLS // n)
+    for start in range(0, n, step):
+        block = np.asarray(vectors[start : start + step])
+        dist = norms[None, :] - 2 * (block @ vectors.T)
+        rows = np.arange(start, start + len(block))
+        dist[rows - start, rows] = np.inf
+        nearest = np.argpartition(dist, degree - 1, axis=1)[:, :degree]
+        order = np.take_along_axis(dist, nearest, axis=1).argsort(axis=1)
+        forward[start : start + len(block)] = np.take_along_axis(nearest, order, axis=1)
+
+    graph = np.full((n, 2 * degree), -1, dtype=np.int32)
+    graph[:, :degree] = forward
+    filled = np.full(n, degree, dtype=np.int64)
+    lists = forward.tolist()
+    for source, targets in enumerate(lists):
+        for target in targets:
+            if filled[target] < 2 * degree and source not in lists[target]:
+                graph[target, filled[target]] = source
+                filled[target] += 1
+    return graph
+
+
+class LocalVectorStore:
+    """Embedded vector store with the subset of Chroma's collection API we use.
+
+    Each document lives in its own directory: vectors as fixed-width rows in
+    the store's encoding (float32, int8, or int8 plus packed sign bits that
+    short-list candidates; appended as batches arrive and memory-mapped for
+    search), and chunk texts and metadata as JSON lines. Documents up to `graph_threshold`
+    chunks are searched exactly with one matrix-vector product; larger ones
+    get a neighbour graph, built at the end of ingestion (or on first query)
+    and saved next to the vectors, and are searched approximately.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        max_loaded: int,
+        graph_threshold: int,
+        graph_degree: int,
+        search_ef: int,
+        encoding: str = "float32",
+        rescore_factor: int = 10,
+    ) -> None:
+        codecs_for(encoding, 1)  # fail fast on a bad setting
+        self._directory = Path(directory)
+        self._encoding = encoding
+        self._rescore_factor = rescore_factor
+        self._max_loaded = max_loaded
+        self._graph_threshold = graph_threshold
+        self._graph_degree = graph_degree
+        self._search_ef = search_ef
+        self._loaded: OrderedDict[str, _DocIndex] = OrderedDict()
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+
+    def _path(self, doc_id: str) -> Path:
+        return self._directory / doc_id
+
+    def upsert(
+        self,
+        ids: list[str],
+        embeddings,
+        documents: list[str] | None = None,
+        metadatas: list[dict] | None = None,
+    ) -> None:
+        vectors = np.ascontiguousarray(embeddings, dtype=np.float32)
+        documents = documents or [""] * len(ids)
+        metadatas = metadatas or [{} for _ in ids]
+        groups: dict[str, list[int]] = {}
+        for i, metadata in enumerate(metadatas):
+            doc_id = str(metadata.get("doc_id") or _doc_key(None, [ids[i]])[0])
+            groups.setdefault(doc_id, []).append(i)
+
+        with self._write_lock:
+            for doc_id, rows in groups.items():
+                path = self._path(doc_id)
+                path.mkdir(parents=True, exist_ok=True)
+                meta = path / META_FILE
+                if not meta.exists():
+                    meta.write_text(
+                        json.dumps(
+                            {
+                                "dim": vectors.shape[1],
+                                "encoding": self._encoding,
+                                "norms": True,
+                            }
+                        )
+                    )
+                # a document keeps the encoding it was created with
+                meta = json.loads(meta.read_text())
+                codec, coarse = codecs_for(meta.get("encoding", "float32"), meta["dim"])
+                codes, scales = codec.encode(vectors[rows])
+                # exact norms keep distances on the same scale as float32
+                norms = np.einsum("ij,ij->i", vectors[rows], vectors[rows])
+
+                # vectors first: a reader trusts only rows present in every file
+                if scales is not None:
+                    with open(path / SCALES_FILE, "ab") as f:
+                        f.write(scales.tobytes())
+                if meta.get("norms"):
+                    with open(path / NORMS_FILE, "ab") as f:
+                        f.write(norms.astype(np.float32).tobytes())
+                with open(path / codec.filename, "ab") as f:
+                    f.write(np.ascontiguousarray(codes).tobytes())
+                if coarse is not None:
+                    with open(path / coarse.filename, "ab") as f:
+                        f.write(coarse.encode(vectors[rows])[0].tobytes())
+                with open(path / CHUNKS_FILE, "a", encoding="utf-8") as f:
+                    for i in rows:
+                        f.write(
+                            json.dumps(
+                                {
+                                    "id": ids[i],
+                                    "document": documents[i],
+                                    "metadata": metadatas[i],
+                                }
+                            )
+                            + "\n"
+                        )
+                (path / GRAPH_FILE).unlink(missing_ok=True)
+                self._forget(doc_id)
+
+    def delete(self, ids: list[str] | None = None, where: dict | None = None) -> None:
+        if ids:
+            raise ValueError("Local vector store deletes whole documents only")
+        for doc_id in _doc_key(where):
+            with self._write_lock:
+                shutil.rmtree(self._path(doc_id), ignore_errors=True)
+                self._forget(doc_id)
+
+    def get(
+        self,
+        ids: list[str] | None = None,
+        where: dict | None = None,
+        limit: int | None = None,
+        include: list[str] | None = None,
+    ) -> dict:
+        include = include or ["documents", "metadatas"]
+        result = {"ids": [], "documents": [], "metadatas": [], "embeddings": []}
+        for doc_id in _doc_key(where, ids):
+            index = self._index(doc_id)
+            if index is None:
+                continue
+            if ids:
+                rows = [index.position[i] for i in ids if i in index.position]
+            else:
+                rows = sorted(index.position.values())
+            self._collect(result, index, rows, include)
+        if limit is not None:
+            result = {field: values[:limit] for field, values in result.items()}
+        return self._shape(result, include)
+
+    def query(
+        self,
+        query_embeddings,
+        n_results: int = 10,
+        where: dict | None = None,
+        include: list[str] | None = None,
+    ) -> dict:
+        include = include or ["documents", "metadatas", "distances"]
+        (doc_id,) = _doc_key(where)
+        index = self._index(doc_id)
+        result = {
+            "ids": [],
+            "documents": [],
+            "metadatas": [],
+            "distances": [],
+            "embeddings": [],
+        }
+        for query in np.asarray(query_embeddings, dtype=np.float32):
+            hits = {field: [] for field in result}
+            if index is not None and len(index):
+                rows, distances = self._search(index, query, n_results)
+                self._collect(hits, index, rows.tolist(), include)
+                hits["distances"] = distances.tolist()
+            for field, values in hits.items():
+                result[field].append(values)
+        return self._shape(result, include)
+
+    def prepare(self, where: dict) -> None:
+        """Build the search graph of a large document ahead of its first query."""
+        for doc_id in _doc_key(where):
+            index = self._index(doc_id)
+            if index is not None and len(index) >= self._graph_threshold:
+                self._load_graph(index)
+
+    def _search(
+        self, index: _DocIndex, query: np.ndarray, k: int
+    ) -> tuple[np.ndarray, np.ndarray]:
+        if len(index) < self._graph_threshold:
+            return index.brute_force(query, k, self._rescore_factor)
+        if index.graph is None:
+            self._load_graph(index)
+        return index.graph_search(query, k, self._search_ef)
+
+    def _load_graph(self, index: _DocIndex) -> None:
+        with self._write_lock:
+            if index.graph is not None:
+                return
+            path = index.directory / GRAPH_FILE
+            if path.exists():
+                graph = np.load(path, mmap_mode="r")
+                if len(graph) == len(index):
+                    index.graph = graph
+                    return
+            logger.info(f"Building vector graph for {index.directory.name}")
+            graph = build_graph(index.vectors(), self._graph_degree)
+            tmp = path.with_suffix(".tmp.npy")
+            np.save(tmp, graph)
+            tmp.replace(path)
+            index.graph = graph
+
+    @staticmethod
+    def _collect(result: dict, index: _DocIndex, rows: list[int], include) -> None:
+        result["ids"].extend(index.ids[r] for r in rows)
+        if "documents" in include:
+            result["documents"].extend(index.documents[r] for r in rows)
+        if "metadatas" in include:
+            result["metadatas"].extend(index.metadatas[r] for r in rows)
+        if "embeddings" in include:
+            result["embeddings"].extend(index.vectors(rows))
+
+    @staticmethod
+    def _shape(result: dict, include: list[str]) -> dict:
+        shaped = {"ids": result["ids"]}
+        for field in ("documents", "metadatas", "distances", "embeddings"):
+            shaped[field] = result[field] if field in include else None
+        return shaped
+
+    def _index(self, doc_id: str) -> _DocIndex | None:
+        path = self._path(doc_id)
+        try:
+            size = (path / CHUNKS_FILE).stat().st_size
+        except FileNotFoundError:
+            self._forget(doc_id)
+            return None
+
+        with self._lock:
+            index = self._loaded.get(doc_id)
+            # another process may have appended to the document since
+            if index is not None and index.size_on_disk == size:
+                self._loaded.move_to_end(doc_id)
+                return index
+
+        index = _DocIndex(path)
+        with self._lock:
+            self._loaded[doc_id] = index
+            self._loaded.move_to_end(doc_id)
+            while len(self._loaded) > self._max_loaded:
+                self._loaded.popitem(last=False)
+        return index
+
+    def _forget(self, doc_id: str) -> None:
+        with self._lock:
+            self._loaded.pop(doc_id, None)
+
+
+class AsyncLocalVectorStore:
+    """Async facade over LocalVectorStore, mirroring AsyncChromaClient.
+
+    Searches run in a worker thread; NumPy releases the GIL for the heavy
+    parts, so they don't stall the event loop.
+    """
+
+    def __init__(self, store: LocalVectorStore) -> None:
+        self._store = store
+
+    async def get_docs(self) -> "AsyncLocalVectorStore":
+        return self
+
+    async def query(self, **kwargs) -> dict:
+        return await asyncio.to_thread(self._store.query, **kwargs)
+
+    async def get(self, **kwargs) -> dict:
+        return await asyncio.to_thread(self._store.get, **kwargs)
+
+    async def upsert(self, **kwargs) -> None:
+        await asyncio.to_thread(self._store.upsert, **kwargs)
+
+    async def delete(self, **kwargs) -> None:
+        await asyncio.to_thread(self._store.delete, **kwargs)
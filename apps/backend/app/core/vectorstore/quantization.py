@@ -0,0 +1,96 @@
+import numpy as np
+
+
+class Float32Codec:
+    """Vectors stored as they come out of the embedder."""
+
+    name = "float32"
+    filename = "vectors.f32"
+    dtype = np.float32
+    scaled = False
+
+    def __init__(self, dim: int) -> None:
+        self.dim = dim
+        self.width = dim
+
+    def encode(self, vectors: np.ndarray) -> tuple[np.ndarray, np.ndarray | None]:
+        return vectors.astype(np.float32), None
+
+    def decode(self, codes: np.ndarray, scales: np.ndarray | None) -> np.ndarray:
+        return np.asarray(codes, dtype=np.float32)
+
+    def scores(
+        self, codes: np.ndarray, scales: np.ndarray | None, query: np.ndarray
+    ) -> np.ndarray:
+        return codes @ query
+
+
+class Int8Codec:
+    """Scalar quantisation: one int8 per dimension and a float scale per vector.
+
+    Each vector is scaled so its largest component maps to ±127, which keeps
+    dot products within about 1% of float32 at a quarter of the size.
+    """
+
+    name = "int8"
+    filename = "vectors.i8"
+    dtype = np.int8
+    scaled = True
+
+    def __init__(self, dim: int) -> None:
+        self.dim = dim
+        self.width = dim
+
+    def encode(self, vectors: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        scales = np.abs(vectors).max(axis=1) / 127
+        scales[scales == 0] = 1.0
+        codes = np.clip(np.rint(vectors / scales[:, None]), -127, 127)
+        return codes.astype(np.int8), scales.astype(np.float32)
+
+    def decode(self, codes: np.ndarray, scales: np.ndarray) -> np.ndarray:
+        return codes.astype(np.float32) * scales[:, None]
+
+    def scores(
+        self, codes: np.ndarray, scales: np.ndarray, query: np.ndarray
+    ) -> np.ndarray:
+        return (codes.astype(np.float32) @ query) * scales
+
+
+class BinaryCodec:
+    """One sign bit per dimension, packed eight to a byte.
+
+    Too coarse to rank on its own: it only short-lists candidates by
+    Hamming distance to the query's sign bits, which are then re-scored
+    with the float query against their int8 codes.
+    """
+
+    name = "binary"
+    filename = "vectors.bin"
+    dtype = np.uint8
+    scaled = False
+
+    def __init__(self, dim: int) -> None:
+        self.dim = dim
+        self.width = (dim + 7) // 8
+
+    def encode(self, vectors: np.ndarray) -> tuple[np.ndarray, None]:
+        return np.packbits(vectors > 0, axis=1), None
+
+    def hamming(self, codes: np.ndarray, query: np.ndarray) -> np.ndarray:
+        bits = np.packbits(query > 0)
+        return np.bitwise_count(codes ^ bits).sum(axis=1, dtype=np.int32)
+
+
+# encoding -> (codec that scores, codec that short-lists)
+ENCODINGS = {
+    "float32": (Float32Codec, None),
+    "int8": (Int8Codec, None),
+    "binary": (Int8Codec, BinaryCodec),
+}
+
+
+def codecs_for(encoding: str, dim: int):
+    if encoding not in ENCODINGS:
+        raise ValueError(f"Unknown vector encoding: {encoding}")
+    fine, coarse = ENCODINGS[encoding]
+    return fine(dim), coarse(dim) if coarse else None
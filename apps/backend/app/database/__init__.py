@@ -1 +1 @@
-from .main import Base, get_db
+from .main import Base, AsyncSessionLocal, SessionLocal, get_db
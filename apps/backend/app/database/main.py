@@ -1,17 +1,93 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 
 from app.config import Config
 
 
+def _async_database_uri(uri: str) -> str:
+    # reuse DATABASE_URI with the asyncpg driver unless one is set explicitly
+    if Config["Env"].database_async_uri:
+        return Config["Env"].database_async_uri
+    for prefix in ("postgresql+psycopg2://", "postgresql://", "postgres://"):
+        if uri.startswith(prefix):
+            return "postgresql+asyncpg://" + uri[len(prefix) :]
+    return uri
+
+
+_pool_options = dict(
+    pool_size=Config["Env"].db_pool_size,
+    max_overflow=Config["Env"].db_max_overflow,
+    pool_timeout=Config["Env"].db_pool_timeout,
+    pool_recycle=Config["Env"].db_pool_recycle,
+    pool_pre_ping=Config["Env"].db_pool_pre_ping,
+)
+
 Base = declarative_base()
-engine = create_engine(Config["Env"].database_uri)
+
+# request handlers use the async engine; ingestion workers, background jobs
+# and migrations keep using the sync one
+engine = create_engine(Config["Env"].database_uri, **_pool_options)
+async_engine = create_async_engine(
+    _async_database_uri(Config["Env"].database_uri), **_pool_options
+)
+
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, autoflush=False, expire_on_commit=False
+)
+
+
+def _instrument(engine: Engine) -> dict:
+    # cumulative pool events, read together with the live pool gauges
+    counters = {"checkouts": 0, "checkins": 0, "connects": 0, "invalidated": 0}
+
+    @event.listens_for(engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        counters["checkouts"] += 1
+
+    @event.listens_for(engine, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        counters["checkins"] += 1
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        counters["connects"] += 1
+
+    @event.listens_for(engine, "invalidate")
+    def _on_invalidate(dbapi_connection, connection_record, exception):
+        counters["invalidated"] += 1
+
+    return counters
+
+
+_pool_counters = {
+    "sync": _instrument(engine),
+    "async": _instrument(async_engine.sync_engine),
+}
+
+
+def _engine_pool_stats(engine: Engine, counters: dict) -> dict:
+    pool = engine.pool
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": pool.overflow(),
+        "max_overflow": Config["Env"].db_max_overflow,
+        **counters,
+    }
+
+
+def pool_stats() -> dict:
+    return {
+        "async": _engine_pool_stats(async_engine.sync_engine, _pool_counters["async"]),
+        "sync": _engine_pool_stats(engine, _pool_counters["sync"]),
+    }
 
 
-def get_db():
-    db = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-    try:
-        yield db()
-    finally:
-        db().close()
+async def get_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -2,7 +2,7 @@ from datetime import datetime
 from enum import Enum
 from typing import TYPE_CHECKING
 from sqlalchemy.sql import func
-from sqlalchemy import DateTime, ForeignKey, Integer, String, Enum as SQLEnum
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, String, Enum as SQLEnum
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 
 from app.database.main import Base
@@ -20,6 +20,10 @@ class Role(Enum):
 
 class Chat(Base):
     __tablename__ = "chats"
+    __table_args__ = (
+        # history pages walk a session's chats newest first
+        Index("ix_chats_session_id_created_at_id", "session_id", "created_at", "id"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     session_id: Mapped[str] = mapped_column(
@@ -19,6 +19,14 @@ class ContentType(str, Enum):
     TEXT = "txt"
 
 
+class DocumentStatus(str, Enum):
+    PENDING = "pending"
+    PARSING = "parsing"
+    EMBEDDING = "embedding"
+    READY = "ready"
+    FAILED = "failed"
+
+
 class Document(Base):
     __tablename__ = "documents"
 
@@ -32,6 +40,25 @@ class Document(Base):
     content_type: Mapped[ContentType] = mapped_column(
         SQLEnum(ContentType), nullable=False
     )
+    status: Mapped[DocumentStatus] = mapped_column(
+        SQLEnum(DocumentStatus),
+        nullable=False,
+        default=DocumentStatus.PENDING,
+        index=True,
+    )
+    error: Mapped[str | None] = mapped_column(String(500), nullable=True)
+    # sha256 of the uploaded bytes, used to spot repeat uploads
+    content_hash: Mapped[str | None] = mapped_column(
+        String(64), nullable=True, index=True
+    )
+    # id of the document whose chunks in the vector store serve this one;
+    # null when the document was ingested itself
+    vector_doc_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    # bumped on every ingestion claim, so derived per-document state (the
+    # lexical index, cached answers) can tell which version it was built from
+    index_version: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
     created_at: Mapped[datetime] = mapped_column(
         DateTime, nullable=False, server_default=func.now()
     )
@@ -43,3 +70,7 @@ class Document(Base):
         "Session", back_populates="document", cascade="all, delete-orphan"
     )
     user: Mapped["User"] = relationship("User", back_populates="documents")
+
+    @property
+    def index_id(self) -> int:
+        return self.vector_doc_id or self.id
@@ -1,9 +1,37 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.api import api_router
+from app.config import Config
+from app.core.ingestion import ingestion_queue
+from app.core.rag.memory import memory_queue
+from app.core.rag.rerank import reranker
+from app.core.s3.aws import s3
+from app.core.utils.hash import hasher
+from app.database.main import async_engine
+from app.core.utils.rag.embedding import warmup_embeddings
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # load the embedding model once per worker before serving traffic
+    if Config["Env"].embedding_warmup:
+        await run_in_threadpool(warmup_embeddings)
+        if reranker.enabled:
+            await run_in_threadpool(reranker.warmup)
+    await run_in_threadpool(ingestion_queue.start)
+    yield
+    await run_in_threadpool(ingestion_queue.shutdown)
+    await run_in_threadpool(memory_queue.shutdown)
+    await run_in_threadpool(reranker.shutdown)
+    await run_in_threadpool(hasher.shutdown)
+    await run_in_threadpool(s3.shutdown)
+    await async_engine.dispose()
+
+
+app = FastAPI(lifespan=lifespan)
 
 origins = [
     "http://localhost:3000",
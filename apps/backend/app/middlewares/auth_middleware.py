@@ -1,12 +1,14 @@
 from fastapi import Depends, HTTPException, Request
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import Config
 from app.core.utils.hash import security
+from app.core.utils.user_cache import user_cache
 from app.database.main import get_db
 from app.database.models.user import User
 
 
-def auth_middleware(req: Request, db: Session = Depends(get_db)):
+async def auth_middleware(req: Request, db: AsyncSession = Depends(get_db)):
 
     token = req.headers.get("Authorization")
     if not token:
@@ -19,11 +21,30 @@ def auth_middleware(req: Request, db: Session = Depends(get_db)):
     try:
         user_data = security.decode_token(token=token)
 
-        user = db.query(User).filter(User.id == user_data["user_id"]).first()
-        if not user:
-            raise HTTPException(status_code=401, detail="User not found")
-
-        req.state.user = {"id": user.id, "email": user.email, "username": user.username}
+        # expiring tokens that carry the principal are trusted as-is when
+        # enabled, which skips both the cache and the database
+        if (
+            Config["Env"].auth_trust_claims
+            and "exp" in user_data
+            and user_data.get("email")
+        ):
+            req.state.user = {
+                "id": user_data["user_id"],
+                "email": user_data["email"],
+                "username": user_data.get("username"),
+            }
+            return None
+
+        principal = user_cache.get(user_data["user_id"])
+        if principal is None:
+            user = await db.get(User, user_data["user_id"])
+            if not user:
+                raise HTTPException(status_code=401, detail="User not found")
+
+            principal = {"id": user.id, "email": user.email, "username": user.username}
+            user_cache.set(user.id, principal)
+
+        req.state.user = principal
     except HTTPException as e:
         raise e
     except Exception as e:
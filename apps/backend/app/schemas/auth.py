@@ -24,6 +24,8 @@ class AuthSchema(BaseModel):
 
 class JwtPayload(BaseModel):
     user_id: int
+    email: str | None = None
+    username: str | None = None
 
     class Config:
         from_attributes = True
@@ -4,12 +4,90 @@ from pydantic import BaseModel, Field
 class EnvSchema(BaseModel):
     port: int = Field(default=8080)
     database_uri: str
+    database_async_uri: str = Field(default="")
+    db_pool_size: int = Field(default=5)
+    db_max_overflow: int = Field(default=10)
+    db_pool_timeout: float = Field(default=30.0)
+    db_pool_recycle: int = Field(default=1800)
+    db_pool_pre_ping: bool = Field(default=True)
     access_token_secret: str
+    access_token_ttl: int = Field(default=0)
+    auth_trust_claims: bool = Field(default=False)
+    user_cache_size: int = Field(default=10000)
+    user_cache_ttl: float = Field(default=60.0)
+    bcrypt_rounds: int = Field(default=12)
+    hashing_mode: str = Field(default="process")
+    hashing_workers: int = Field(default=2)
+    hashing_max_pending: int = Field(default=32)
     aws_bucket: str
     aws_region: str
     aws_access_key: str
     aws_secret_key: str
     aws_cloudfront_url: str
+    s3_part_size: int = Field(default=8 * 1024 * 1024)
+    s3_upload_concurrency: int = Field(default=4)
     chromadb_host: str
     chromadb_port: int
     chromadb_ssl: bool
+    vector_store: str = Field(default="chroma")
+    vector_index_dir: str = Field(default="data/vectors")
+    vector_cache_size: int = Field(default=64)
+    vector_graph_threshold: int = Field(default=20000)
+    vector_graph_degree: int = Field(default=16)
+    vector_search_ef: int = Field(default=64)
+    vector_encoding: str = Field(default="float32")
+    vector_rescore_factor: int = Field(default=10)
+    embedding_model: str = Field(default="BAAI/bge-small-en")
+    embedding_device: str = Field(default="cpu")
+    embedding_normalize: bool = Field(default=True)
+    embedding_warmup: bool = Field(default=True)
+    embedding_batch_size: int = Field(default=64)
+    embedding_workers: int = Field(default=2)
+    embedding_torch_threads: int = Field(default=0)
+    chunk_tokens: int = Field(default=256)
+    chunk_overlap_tokens: int = Field(default=0)
+    pdf_ocr_min_share: float = Field(default=0.1)
+    retrieval_top_k: int = Field(default=5)
+    retrieval_fetch_k: int = Field(default=20)
+    retrieval_mmr_lambda: float = Field(default=0.7)
+    retrieval_max_distance: float = Field(default=0.0)
+    rerank_enabled: bool = Field(default=False)
+    rerank_model: str = Field(default="cross-encoder/ms-marco-MiniLM-L-6-v2")
+    rerank_candidates: int = Field(default=20)
+    rerank_batch_size: int = Field(default=16)
+    rerank_budget_ms: float = Field(default=300.0)
+    rerank_cache_size: int = Field(default=10000)
+    hybrid_enabled: bool = Field(default=True)
+    lexical_top_k: int = Field(default=10)
+    rrf_k: int = Field(default=60)
+    lexical_index_dir: str = Field(default="data/lexical")
+    lexical_cache_size: int = Field(default=64)
+    prompt_max_tokens: int = Field(default=6000)
+    prompt_history_tokens: int = Field(default=1000)
+    prompt_memory_tokens: int = Field(default=500)
+    llm_provider: str = Field(default="gemini")
+    llm_model: str = Field(default="gemini-2.5-flash")
+    llm_max_concurrency: int = Field(default=8)
+    llm_timeout: float = Field(default=60.0)
+    llm_stream_idle_timeout: float = Field(default=30.0)
+    llm_max_retries: int = Field(default=3)
+    llm_backoff_base: float = Field(default=0.5)
+    llm_backoff_max: float = Field(default=8.0)
+    memory_enabled: bool = Field(default=True)
+    memory_recent_turns: int = Field(default=2)
+    memory_summary_every: int = Field(default=4)
+    memory_summary_words: int = Field(default=200)
+    ingestion_mode: str = Field(default="local")
+    ingestion_workers: int = Field(default=2)
+    ingestion_poll_interval: float = Field(default=2.0)
+    ingestion_lease: float = Field(default=600.0)
+    ingestion_spool_dir: str = Field(default="")
+    answer_cache_enabled: bool = Field(default=True)
+    answer_cache_size: int = Field(default=2048)
+    answer_cache_ttl: float = Field(default=3600.0)
+    answer_cache_threshold: float = Field(default=0.95)
+    retrieval_cache_enabled: bool = Field(default=True)
+    retrieval_cache_mb: float = Field(default=32.0)
+    chunk_cache_mb: float = Field(default=64.0)
+    retrieval_cache_ttl: float = Field(default=600.0)
+    retrieval_cache_step: float = Field(default=0.02)
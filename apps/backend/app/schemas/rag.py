@@ -1,11 +1,12 @@
 from enum import Enum
 from typing import List
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class RagStore(BaseModel):
     doc_id: int
     doc_key: str
+    index_version: int = 0
 
     class Config:
         from_attributes = True
@@ -21,9 +22,33 @@ class History(BaseModel):
     content: str
 
 
+class RetrievalParams(BaseModel):
+    """Per-request overrides of the deployment's retrieval settings."""
+
+    top_k: int | None = Field(default=None, ge=1, le=50)
+    fetch_k: int | None = Field(default=None, ge=1, le=200)
+    mmr_lambda: float | None = Field(default=None, ge=0.0, le=1.0)
+    max_distance: float | None = Field(default=None, ge=0.0)
+    rerank: bool | None = None
+    hybrid: bool | None = None
+
+
+class RetrievedChunk(BaseModel):
+    id: str
+    text: str
+    distance: float | None = None
+    score: float | None = None
+    page: int | None = None
+    start: int | None = None
+    end: int | None = None
+
+
 class LlmQuery(BaseModel):
     query: str
     doc_data: List[str]
+    # retrieved chunks in relevance order; when set, the prompt builder uses
+    # their offsets to merge overlaps instead of the bare doc_data texts
+    chunks: List[RetrievedChunk] | None = None
     context: str | None = None
     history: List[History] | None = None
 
@@ -34,8 +59,11 @@ class LlmQuery(BaseModel):
 class RagQuery(BaseModel):
     query: str
     doc_id: int
+    # ingestion version of doc_id; None accepts whatever index is on hand
+    index_version: int | None = None
     context: str | None = None
     history: List[History] | None = None
+    retrieval: RetrievalParams | None = None
 
     class Config:
         from_attributes = True
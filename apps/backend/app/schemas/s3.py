@@ -4,3 +4,10 @@ from pydantic import BaseModel
 class GeneratePresignedURLResponseSchema(BaseModel):
     upload_url: str
     object_key: str
+
+
+class UploadResultSchema(BaseModel):
+    object_key: str
+    url: str
+    size: int
+    sha256: str
@@ -1,10 +1,15 @@
+from datetime import datetime
+
 from pydantic import BaseModel
 
+from app.schemas.rag import RetrievalParams
+
 
 # params
 class ChatParams(BaseModel):
     session_id: str
     message: str
+    retrieval: RetrievalParams | None = None
 
 
 # response
@@ -14,3 +19,33 @@ class CreateSessionResponse(BaseModel):
     doc_url: str
     session_id: int
     session_token: str
+    status: str
+
+
+class IngestionStatusResponse(BaseModel):
+    doc_id: int
+    status: str
+    error: str | None = None
+
+
+class SessionItem(BaseModel):
+    id: int
+    title: str | None = None
+    session_token: str
+    document_id: int
+    user_id: int
+    created_at: datetime
+    updated_at: datetime
+
+
+class SessionDetail(SessionItem):
+    document_name: str
+    document_url: str
+
+
+class ChatItem(BaseModel):
+    id: int
+    session_id: str
+    message: str
+    role: str
+    created_at: datetime
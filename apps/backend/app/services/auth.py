@@ -1,7 +1,9 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession as Session
 
 from app.database.models import User
-from app.core.utils.hash import security
+from app.core.logger import get_logger
+from app.core.utils.hash import hasher, security
 from app.schemas.auth import AuthSchema, JwtPayload, UserResponse
 from app.core.utils.exceptions.auth import (
     EmailAlreadyRegistered,
@@ -9,18 +11,21 @@ from app.core.utils.exceptions.auth import (
     TokenGenerationFailed,
     UserNotFound,
     InvalidCredentials,
+    HashingOverloaded,
 )
 
+logger = get_logger(__name__)
+
 
 class AuthService:
     @staticmethod
-    def signup(input_data: AuthSchema, db: Session):
+    async def signup(input_data: AuthSchema, db: Session):
         # check user exist with current email
-        if db.query(User).filter(User.email == input_data.email).first():
+        if await db.scalar(select(User).where(User.email == input_data.email)):
             raise EmailAlreadyRegistered(email=input_data.email)
 
-        # hash password
-        hash_pass = security.hash_text(password=input_data.password)
+        # hash password on the dedicated hashing pool
+        hash_pass = await hasher.hash(password=input_data.password)
         if not hash_pass:
             raise PasswordHashFailed()
 
@@ -28,14 +33,18 @@ class AuthService:
         user = User(email=input_data.email, password=hash_pass)
         db.add(user)
         try:
-            db.commit()
-            db.refresh(user)
+            await db.commit()
+            await db.refresh(user)
         except Exception as e:
-            db.rollback()
+            await db.rollback()
             raise ValueError(f"Failed to create user: {str(e)}")
 
         # generate tokens
-        token = security.generate_token(user_data=JwtPayload(user_id=int(user.id)))
+        token = security.generate_token(
+            user_data=JwtPayload(
+                user_id=int(user.id), email=user.email, username=user.username
+            )
+        )
         if not token:
             raise TokenGenerationFailed()
 
@@ -43,22 +52,36 @@ class AuthService:
         return {"user": user_response.model_dump(), "token": token}
 
     @staticmethod
-    def signin(input_data: AuthSchema, db: Session):
+    async def signin(input_data: AuthSchema, db: Session):
         # check user in db
-        user = db.query(User).filter(User.email == input_data.email).first()
+        user = await db.scalar(select(User).where(User.email == input_data.email))
         if not user:
             raise UserNotFound(email=input_data.email)
 
         # match the password
-        check_pass = security.check_hash(
+        check_pass = await hasher.verify(
             password=input_data.password, hash_password=str(user.password)
         )
         if not check_pass:
             raise InvalidCredentials()
 
+        # upgrade hashes made with an older work factor while we have the
+        # plaintext; a failed upgrade never blocks the login itself
+        if hasher.needs_rehash(str(user.password)):
+            try:
+                user.password = await hasher.hash(password=input_data.password)
+                await db.commit()
+            except HashingOverloaded:
+                pass
+            except Exception as e:
+                await db.rollback()
+                logger.warning(f"Failed to rehash password for user {user.id}: {e}")
+
         # generate token
         token = security.generate_token(
-            user_data=JwtPayload(user_id=int(user.id))  # type: ignore
+            user_data=JwtPayload(
+                user_id=int(user.id), email=user.email, username=user.username
+            )  # type: ignore
         )
         if not token:
             raise TokenGenerationFailed()
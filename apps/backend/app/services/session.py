@@ -1,17 +1,40 @@
+import asyncio
+import json
 import uuid
-from fastapi import BackgroundTasks, UploadFile
-from sqlalchemy.orm import Session as db_session
+from pathlib import Path
+from typing import AsyncIterator
+from fastapi import UploadFile
+from fastapi.concurrency import run_in_threadpool
+from langchain_core.language_models import BaseChatModel
+from sqlalchemy import and_, func, or_, select, true, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession as db_session
+from sqlalchemy.orm import aliased
 
+from app.config import Config
 from app.core.s3.aws import s3
 from app.database.models import Document, Session
 from app.core.rag.rag import Rag
 from app.database.models.chats import Chat, Role
-from app.schemas.session import CreateSessionResponse
-from app.schemas.rag import RagQuery, RagStore
+from app.schemas.session import (
+    ChatItem,
+    CreateSessionResponse,
+    IngestionStatusResponse,
+    SessionDetail,
+    SessionItem,
+)
+from app.schemas.rag import RagQuery, RetrievalParams
 from app.schemas.rag import History, Role as RagRole
-from app.database.models.documents import ContentType
+from app.database.models.documents import ContentType, DocumentStatus
+from app.core.ingestion import ingestion_queue
+from app.core.rag.memory import memory_queue
+from app.core.logger import get_logger
+from app.core.utils.cursor import decode_cursor, encode_cursor
+from app.core.utils.files import hash_file, spool_to_disk
+from app.core.utils.exceptions.base import DomainError
 from app.core.utils.exceptions.session import (
     ChatsNotFound,
+    DocumentNotFailed,
+    DocumentNotReady,
     InvalidContentType,
     FileUploadFailed,
     DocumentSaveFailed,
@@ -29,117 +52,379 @@ CONTENT_TYPE_MAP = {
     "text/plain": ContentType.TEXT,
 }
 
+logger = get_logger(__name__)
+
+# read paths select plain columns and skip ORM identity-map hydration
+SESSION_COLUMNS = (
+    Session.id,
+    Session.title,
+    Session.session_token,
+    Session.document_id,
+    Session.user_id,
+    Session.created_at,
+    Session.updated_at,
+)
+CHAT_COLUMNS = (
+    Chat.id.label("chat_id"),
+    Chat.message,
+    Chat.role,
+    Chat.created_at.label("chat_created_at"),
+)
+
 
 class SessionService:
 
     @staticmethod
-    def create_session(
+    async def create_session(
         file: UploadFile,
         user_id: int,
         db: db_session,
-        background_tasks: BackgroundTasks,
     ) -> CreateSessionResponse:
         if not file.content_type:
             raise InvalidContentType()
 
-        file_data = s3.generate_put_presigned_url(content_type=file.content_type)
+        # hash the spooled upload first so duplicates never reach S3
+        content_hash, _ = await run_in_threadpool(hash_file, file.file)
+        content_type_enum = CONTENT_TYPE_MAP.get(file.content_type)
 
-        data = s3.upload_file_to_presigned_url(
-            url=file_data.upload_url,
-            object_key=file_data.object_key,
-            file=file.file.read(),
-            content_type=file.content_type,
+        # identical bytes were already ingested: share the stored object and
+        # its chunks instead of uploading, parsing and embedding them again
+        source = await db.scalar(
+            select(Document)
+            .where(
+                Document.content_hash == content_hash,
+                Document.content_type == content_type_enum,
+                Document.status == DocumentStatus.READY,
+            )
+            .order_by(Document.id)
+            .limit(1)
         )
-        if not data:
+        if source:
+            return await SessionService._create_deduplicated_session(
+                source=source, title=file.filename, user_id=user_id, db=db
+            )
+
+        # stream the file to S3 in bounded parts
+        try:
+            upload = await run_in_threadpool(
+                s3.upload_fileobj, file=file.file, content_type=file.content_type
+            )
+        except Exception as e:
+            logger.error(f"S3 upload failed: {str(e)}", exc_info=True)
+            raise FileUploadFailed()
+        if upload.sha256 != content_hash:
             raise FileUploadFailed()
 
-        content_type_enum = CONTENT_TYPE_MAP.get(file.content_type)
-        # save doc to db
+        # in-process workers get a local copy so they don't download the file
+        # again. It is made before anything is committed, and the document
+        # and its session are committed together, so a failure on the way
+        # leaves neither an orphaned pending row nor a stray spool file
+        source = None
+        if ingestion_queue.is_local:
+            source = await run_in_threadpool(
+                spool_to_disk,
+                file.file,
+                suffix=Path(upload.object_key).suffix,
+                directory=Config["Env"].ingestion_spool_dir,
+            )
+
         doc = Document(
-            key=file_data.object_key,
+            key=upload.object_key,
             title=file.filename,
-            url=data,
+            url=upload.url,
             content_type=content_type_enum,
             user_id=user_id,
+            status=DocumentStatus.PENDING,
+            content_hash=content_hash,
+        )
+        session = Session(
+            session_token=str(uuid.uuid4()), document=doc, user_id=user_id
         )
-        db.add(doc)
+        db.add_all([doc, session])
         try:
-            db.commit()
-            db.refresh(doc)
-            print("Saved document to DB with ID:", doc.id)
+            await db.commit()
         except Exception as e:
-            db.rollback()
+            await db.rollback()
+            if source:
+                Path(source).unlink(missing_ok=True)
             raise DocumentSaveFailed(details=str(e))
+        logger.info(f"Created session {session.id} for document {doc.id}")
 
-        # create session
-        session_token_id = uuid.uuid4()
-        session = Session(
-            session_token=session_token_id, document_id=doc.id, user_id=user_id
-        )
-        db.add(session)
+        # parse, embed and name the session off the request path
         try:
-            db.commit()
-            db.refresh(doc)
-            print("Created session with ID:", session.id)
+            ingestion_queue.enqueue(int(doc.id), source=source)
         except Exception as e:
-            db.rollback()
-            raise SessionCreationFailed(details=str(e))
+            # the job never started: fail it now so it can be retried,
+            # instead of leaving it pending for the sweeper
+            logger.error(f"Failed to enqueue document {doc.id}: {e}", exc_info=True)
+            if source:
+                Path(source).unlink(missing_ok=True)
+            doc.status = DocumentStatus.FAILED
+            doc.error = "Failed to queue ingestion"
+            await db.commit()
 
-        # store in vector db
-        Rag.store(RagStore(doc_id=int(doc.id), doc_key=str(doc.key)))
+        return CreateSessionResponse(
+            doc_id=int(doc.id),
+            doc_key=str(doc.key),
+            doc_url=str(doc.url),
+            session_id=int(session.id),
+            session_token=str(session.session_token),
+            status=doc.status.value,
+        )
+
+    @staticmethod
+    async def _create_deduplicated_session(
+        source: Document, title: str | None, user_id: int, db: db_session
+    ) -> CreateSessionResponse:
+        # reuse the name already generated for the same content, if any
+        session_title = await db.scalar(
+            select(Session.title)
+            .where(Session.document_id == source.id, Session.title.is_not(None))
+            .order_by(Session.id)
+            .limit(1)
+        )
 
-        # generate session name in background
-        background_tasks.add_task(
-            Rag.generate_session_name, session_token=str(session.session_token), db=db
+        doc = Document(
+            key=source.key,
+            title=title,
+            url=source.url,
+            content_type=source.content_type,
+            user_id=user_id,
+            status=DocumentStatus.READY,
+            content_hash=source.content_hash,
+            vector_doc_id=source.index_id,
         )
+        session = Session(
+            session_token=str(uuid.uuid4()),
+            document=doc,
+            user_id=user_id,
+            title=session_title or "Session",
+        )
+        db.add_all([doc, session])
+        try:
+            await db.commit()
+        except Exception as e:
+            await db.rollback()
+            raise SessionCreationFailed(details=str(e))
 
+        logger.info(f"Reused chunks of document {source.index_id} for {doc.id}")
         return CreateSessionResponse(
             doc_id=int(doc.id),
             doc_key=str(doc.key),
             doc_url=str(doc.url),
             session_id=int(session.id),
             session_token=str(session.session_token),
+            status=doc.status.value,
         )
 
     @staticmethod
-    def chat(session_id: str, user_id: int, message: str, db: db_session):
-        session = (
-            db.query(Session)
-            .filter(Session.session_token == session_id, Session.user_id == user_id)
-            .first()
+    async def get_ingestion_status(
+        session_id: str, user_id: int, db: db_session
+    ) -> IngestionStatusResponse:
+        doc = await db.scalar(
+            select(Document)
+            .join(Session)
+            .where(Session.session_token == session_id, Session.user_id == user_id)
         )
-        if not session:
+        if not doc:
             raise SessionNotFound(session_id=session_id)
 
-        input_data = RagQuery(query=message, doc_id=int(session.document_id))
+        return IngestionStatusResponse(
+            doc_id=int(doc.id), status=doc.status.value, error=doc.error
+        )
+
+    @staticmethod
+    async def retry_ingestion(
+        session_id: str, user_id: int, db: db_session
+    ) -> IngestionStatusResponse:
+        doc = await db.scalar(
+            select(Document)
+            .join(Session)
+            .where(Session.session_token == session_id, Session.user_id == user_id)
+        )
+        if not doc:
+            raise SessionNotFound(session_id=session_id)
+        if doc.status != DocumentStatus.FAILED:
+            raise DocumentNotFailed(status=doc.status.value)
 
-        # get last two chats (one chat of user and other of assistance)
-        latest_chats = (
-            db.query(Chat)
-            .filter(Chat.session_id == session.session_token)
-            .order_by(Chat.created_at.desc(), Chat.id.desc())
-            .limit(2)
-            .all()
+        # the conditional update loses to a concurrent retry, which is fine:
+        # the document is pending again either way
+        await run_in_threadpool(ingestion_queue.retry, int(doc.id))
+        return IngestionStatusResponse(
+            doc_id=int(doc.id), status=DocumentStatus.PENDING.value
         )
 
-        if latest_chats and len(latest_chats) == 2:
-            latest_chats.reverse()
+    @staticmethod
+    async def chat(
+        session_id: str,
+        user_id: int,
+        message: str,
+        db: db_session,
+        retrieval: RetrievalParams | None = None,
+    ):
+        session_token, input_data = await SessionService._prepare_chat(
+            session_id=session_id,
+            user_id=user_id,
+            message=message,
+            db=db,
+            retrieval=retrieval,
+        )
+
+        try:
+            response = await Rag.query(input_data)
+        except Exception as e:
+            raise RagQueryFailed(details=str(e))
+
+        await SessionService._save_chat(
+            session_token=session_token, message=message, response=response, db=db
+        )
+
+        return {"response": response}
+
+    @staticmethod
+    async def chat_stream(
+        session_id: str,
+        user_id: int,
+        message: str,
+        db: db_session,
+        llm: BaseChatModel | None = None,
+        retrieval: RetrievalParams | None = None,
+    ) -> AsyncIterator[str]:
+        session_token, input_data = await SessionService._prepare_chat(
+            session_id=session_id,
+            user_id=user_id,
+            message=message,
+            db=db,
+            retrieval=retrieval,
+        )
+
+        try:
+            tokens = await Rag.query_stream(input_data, llm=llm)
+        except Exception as e:
+            raise RagQueryFailed(details=str(e))
+
+        return SessionService._stream_chat(
+            session_token=session_token, message=message, tokens=tokens, db=db
+        )
+
+    @staticmethod
+    async def _stream_chat(
+        session_token: str, message: str, tokens: AsyncIterator[str], db: db_session
+    ) -> AsyncIterator[str]:
+        # ndjson events: one "token" line per chunk, then "done" or "error"
+        parts: list[str] = []
+        try:
+            async for token in tokens:
+                parts.append(token)
+                yield json.dumps({"type": "token", "content": token}) + "\n"
+
+            response = "".join(parts)
+            if not response:
+                raise RagQueryFailed(details="LLM returned empty response")
+
+            await SessionService._save_chat(
+                session_token=session_token,
+                message=message,
+                response=response,
+                db=db,
+            )
+            yield json.dumps({"type": "done", "response": response}) + "\n"
+
+        except (GeneratorExit, asyncio.CancelledError):
+            # client went away mid-stream; drop the partial answer
+            logger.info(
+                f"Chat stream aborted for session {session_token} "
+                f"after {len(parts)} chunks"
+            )
+            raise
+        except DomainError as e:
+            yield json.dumps({"type": "error", "message": e.message}) + "\n"
+        except Exception as e:
+            logger.error(f"Chat stream failed: {str(e)}", exc_info=True)
+            yield json.dumps(
+                {"type": "error", "message": RagQueryFailed(details=str(e)).message}
+            ) + "\n"
+        finally:
+            await tokens.aclose()
+
+    @staticmethod
+    async def _prepare_chat(
+        session_id: str,
+        user_id: int,
+        message: str,
+        db: db_session,
+        retrieval: RetrievalParams | None = None,
+    ) -> tuple[str, RagQuery]:
+        # session, document state and every turn not yet folded into the
+        # summary in one round trip; PromptBuilder trims them to the history
+        # budget, so nothing between the summary and the newest turns is lost
+        on_chat = and_(
+            Chat.session_id == Session.session_token,
+            or_(Session.summarized_until.is_(None), Chat.id > Session.summarized_until),
+        )
+        # deduplicated documents are served from their source's chunks
+        index_doc = aliased(Document)
+        query = (
+            select(
+                Session.session_token,
+                Session.memory_summary,
+                Document.status,
+                index_doc.id.label("index_id"),
+                index_doc.index_version,
+                *CHAT_COLUMNS,
+            )
+            .join(Document, Session.document_id == Document.id)
+            .join(
+                index_doc,
+                index_doc.id == func.coalesce(Document.vector_doc_id, Document.id),
+            )
+            .outerjoin(Chat, on_chat)
+            .where(Session.session_token == session_id, Session.user_id == user_id)
+            .order_by(*_newest_first(Chat))
+        )
+        if not memory_queue.enabled:
+            # without a summary only the recent window is ever sent; the
+            # session filter matches one row, so the limit applies to its
+            # chats (a session without chats still yields one row)
+            query = query.limit(max(memory_queue.recent_messages, 1))
+        rows = (await db.execute(query)).all()
+        if not rows:
+            raise SessionNotFound(session_id=session_id)
+
+        session = rows[0]
+        if session.status != DocumentStatus.READY:
+            raise DocumentNotReady(status=session.status.value)
+
+        input_data = RagQuery(
+            query=message,
+            doc_id=int(session.index_id),
+            index_version=int(session.index_version),
+            retrieval=retrieval,
+        )
+
+        # unsummarised turns go in verbatim; older ones live in the summary
+        chats = [row for row in rows if row.chat_id is not None]
+        if chats:
+            chats.reverse()
             input_data.history = [
                 History(
-                    role=RagRole.user if chat.role.value == "user" else RagRole.system,
+                    role=RagRole.user if chat.role == Role.USER else RagRole.system,
                     content=str(chat.message),
                 )
-                for chat in latest_chats
+                for chat in chats
             ]
+        if session.memory_summary:
+            input_data.context = session.memory_summary
 
-        try:
-            response = Rag.query(input_data)
-        except Exception as e:
-            raise RagQueryFailed(details=str(e))
+        return session.session_token, input_data
 
+    @staticmethod
+    async def _save_chat(
+        session_token: str, message: str, response: str, db: db_session
+    ):
         # Save user message to chat
         user_chat = Chat(
-            session_id=session.session_token,
+            session_id=session_token,
             message=message,
             role=Role.USER,
         )
@@ -147,55 +432,114 @@ class SessionService:
 
         # Save assistant response to chat
         assistant_chat = Chat(
-            session_id=session.session_token,
+            session_id=session_token,
             message=response,
             role=Role.ASSISTANT,
         )
         db.add(assistant_chat)
 
         try:
-            db.commit()
+            await db.commit()
         except Exception as e:
-            db.rollback()
+            await db.rollback()
             raise ChatSaveFailed(details=str(e))
 
-        return {"response": response}
+        # fold older turns into the session summary in the background
+        memory_queue.submit(session_token)
 
     @staticmethod
-    def get_sessions(user_id: int, db: db_session, limit: int = 10, offset: int = 0):
-        sessions = (
-            db.query(Session)
-            .filter(Session.user_id == user_id)
-            .order_by(Session.created_at.desc())
-            .limit(limit)
-            .offset(offset)
-            .all()
-        )
-        if not sessions:
+    async def get_sessions(
+        user_id: int,
+        db: db_session,
+        limit: int = 10,
+        offset: int = 0,
+        cursor: str | None = None,
+    ) -> tuple[list[SessionItem], str | None]:
+        query = select(*SESSION_COLUMNS).where(Session.user_id == user_id)
+        query = _paginate(query, Session, limit, offset, cursor)
+        rows = (await db.execute(query)).all()
+
+        rows, next_cursor = _page(rows, limit)
+        if not rows and not cursor and not offset:
             raise SessionsNotFound()
-        return sessions
+        return [
+            SessionItem.model_validate(row, from_attributes=True) for row in rows
+        ], next_cursor
 
     @staticmethod
-    def get_session(
-        user_id: str, session_id: str, db: db_session, limit: int = 10, offset: int = 0
-    ):
-        # First, find the session by session_token (UUID string)
-        session = (
-            db.query(Session)
-            .filter(Session.session_token == session_id, Session.user_id == user_id)
-            .first()
+    async def get_session(
+        user_id: str,
+        session_id: str,
+        db: db_session,
+        limit: int = 10,
+        offset: int = 0,
+        cursor: str | None = None,
+    ) -> tuple[SessionDetail, list[ChatItem], str | None]:
+        # session, its document and one page of chats in a single query. The
+        # page is cut in a subquery joined on true, so a session with no
+        # (more) chats still comes back as one row with null chat columns;
+        # ownership is checked by the outer filter
+        page = select(Chat.id, Chat.message, Chat.role, Chat.created_at).where(
+            Chat.session_id == session_id
         )
-        if not session:
+        page = _paginate(page, Chat, limit, offset, cursor).subquery("page")
+        query = (
+            select(
+                *SESSION_COLUMNS,
+                Document.title.label("document_name"),
+                Document.url.label("document_url"),
+                page.c.id.label("chat_id"),
+                page.c.message,
+                page.c.role,
+                page.c.created_at.label("chat_created_at"),
+            )
+            .join(Document, Session.document_id == Document.id)
+            .outerjoin(page, true())
+            .where(Session.session_token == session_id, Session.user_id == user_id)
+            .order_by(*_newest_first(page.c))
+        )
+        rows = (await db.execute(query)).all()
+        if not rows:
             raise SessionNotFound(session_id=session_id)
 
-        # Then query chats using the session's integer id
-        chats = (
-            db.query(Chat)
-            .filter(Chat.session_id == session.session_token)
-            .order_by(Chat.created_at.desc(), Chat.id.desc())
-            .limit(limit)
-            .offset(offset)
-            .all()
-        )
+        session = SessionDetail.model_validate(rows[0], from_attributes=True)
+        chats = [
+            ChatItem(
+                id=row.chat_id,
+                session_id=session.session_token,
+                message=row.message,
+                role=row.role.value,
+                created_at=row.chat_created_at,
+            )
+            for row in rows
+            if row.chat_id is not None
+        ]
+        chats, next_cursor = _page(chats, limit)
+        return session, chats, next_cursor
+
+
+def _newest_first(model):
+    # id breaks ties between rows created in the same instant
+    return model.created_at.desc(), model.id.desc()
+
+
+def _before_cursor(model, cursor: str):
+    created_at, row_id = decode_cursor(cursor)
+    return tuple_(model.created_at, model.id) < tuple_(created_at, row_id)
+
+
+def _paginate(query, model, limit: int, offset: int, cursor: str | None):
+    # a cursor seeks straight to the next page through the
+    # (owner, created_at, id) index, offset is kept for old clients.
+    # One extra row tells whether another page exists.
+    query = query.order_by(*_newest_first(model)).limit(limit + 1)
+    if cursor:
+        return query.where(_before_cursor(model, cursor))
+    return query.offset(offset)
+
 
-        return {"session": session, "chats": chats}
+def _page(rows: list, limit: int) -> tuple[list, str | None]:
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1].created_at, rows[-1].id)
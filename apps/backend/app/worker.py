@@ -0,0 +1,52 @@
+import signal
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from app.config import Config
+from app.core.ingestion.queue import pending_document_ids, run_ingestion
+from app.core.logger import get_logger
+from app.core.utils.rag.embedding import warmup_embeddings
+
+logger = get_logger(__name__)
+
+
+def main() -> None:
+    """Standalone ingestion worker: `python -m app.worker`."""
+    max_workers = Config["Env"].ingestion_workers
+    poll_interval = Config["Env"].ingestion_poll_interval
+    running = True
+
+    def stop(signum, frame):
+        nonlocal running
+        logger.info("Shutting down ingestion worker")
+        running = False
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    if Config["Env"].embedding_warmup:
+        warmup_embeddings()
+
+    in_flight: dict[int, Future] = {}
+    with ThreadPoolExecutor(
+        max_workers=max_workers, thread_name_prefix="ingestion"
+    ) as pool:
+        logger.info(f"Ingestion worker started with {max_workers} threads")
+        while running:
+            for doc_id, future in list(in_flight.items()):
+                if future.done():
+                    del in_flight[doc_id]
+
+            # only fetch as many jobs as there are free threads; abandoned
+            # jobs (lease lapsed) come back here alongside pending ones
+            free = max_workers - len(in_flight)
+            if free > 0:
+                for doc_id in pending_document_ids(limit=free + len(in_flight)):
+                    if doc_id not in in_flight and len(in_flight) < max_workers:
+                        in_flight[doc_id] = pool.submit(run_ingestion, doc_id)
+
+            time.sleep(poll_interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""document ingestion status
+
+Revision ID: 3b9f1c2d7a41
+Revises: affd84af011b
+Create Date: 2026-10-18 10:12:31.204518
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "3b9f1c2d7a41"
+down_revision: Union[str, Sequence[str], None] = "affd84af011b"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+document_status = sa.Enum(
+    "PENDING", "PARSING", "EMBEDDING", "READY", "FAILED", name="documentstatus"
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    document_status.create(op.get_bind(), checkfirst=True)
+    # documents uploaded before this revision were ingested inline
+    op.add_column(
+        "documents",
+        sa.Column("status", document_status, nullable=False, server_default="READY"),
+    )
+    op.alter_column("documents", "status", server_default=None)
+    op.add_column("documents", sa.Column("error", sa.String(length=500), nullable=True))
+    op.create_index(op.f("ix_documents_status"), "documents", ["status"], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_documents_status"), table_name="documents")
+    op.drop_column("documents", "error")
+    op.drop_column("documents", "status")
+    document_status.drop(op.get_bind(), checkfirst=True)
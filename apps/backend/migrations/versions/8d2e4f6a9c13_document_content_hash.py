@@ -0,0 +1,37 @@
+"""document content hash
+
+Revision ID: 8d2e4f6a9c13
+Revises: 3b9f1c2d7a41
+Create Date: 2026-10-18 11:02:47.381920
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "8d2e4f6a9c13"
+down_revision: Union[str, Sequence[str], None] = "3b9f1c2d7a41"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "documents", sa.Column("content_hash", sa.String(length=64), nullable=True)
+    )
+    op.add_column("documents", sa.Column("vector_doc_id", sa.Integer(), nullable=True))
+    op.create_index(
+        op.f("ix_documents_content_hash"), "documents", ["content_hash"], unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_documents_content_hash"), table_name="documents")
+    op.drop_column("documents", "vector_doc_id")
+    op.drop_column("documents", "content_hash")
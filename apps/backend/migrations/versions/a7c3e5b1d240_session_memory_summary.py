@@ -0,0 +1,33 @@
+"""session memory summary
+
+Revision ID: a7c3e5b1d240
+Revises: 8d2e4f6a9c13
+Create Date: 2026-10-18 14:26:09.517304
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a7c3e5b1d240"
+down_revision: Union[str, Sequence[str], None] = "8d2e4f6a9c13"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("sessions", sa.Column("memory_summary", sa.Text(), nullable=True))
+    op.add_column(
+        "sessions", sa.Column("summarized_until", sa.Integer(), nullable=True)
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("sessions", "summarized_until")
+    op.drop_column("sessions", "memory_summary")
@@ -0,0 +1,40 @@
+"""keyset pagination indexes
+
+Revision ID: b4d8f2a6c913
+Revises: a7c3e5b1d240
+Create Date: 2026-10-18 15:40:52.208316
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b4d8f2a6c913"
+down_revision: Union[str, Sequence[str], None] = "a7c3e5b1d240"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_chats_session_id_created_at_id",
+        "chats",
+        ["session_id", "created_at", "id"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_sessions_user_id_created_at_id",
+        "sessions",
+        ["user_id", "created_at", "id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_sessions_user_id_created_at_id", table_name="sessions")
+    op.drop_index("ix_chats_session_id_created_at_id", table_name="chats")
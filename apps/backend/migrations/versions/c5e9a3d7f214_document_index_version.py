@@ -0,0 +1,32 @@
+"""document index version
+
+Revision ID: c5e9a3d7f214
+Revises: b4d8f2a6c913
+Create Date: 2026-10-18 17:12:05.903144
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c5e9a3d7f214"
+down_revision: Union[str, Sequence[str], None] = "b4d8f2a6c913"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "documents",
+        sa.Column("index_version", sa.Integer(), server_default="0", nullable=False),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("documents", "index_version")
@@ -0,0 +1,179 @@
+"""Benchmark document parsing per format.
+
+Compares the fast-path parsers with the unstructured pipeline they replace,
+reporting wall time, peak Python memory and page/character counts.
+
+    python -m scripts.bench_parsers                 # synthetic fixtures
+    python -m scripts.bench_parsers a.pdf b.docx    # your own files
+    python -m scripts.bench_parsers --no-unstructured --repeat 5
+"""
+
+import argparse
+import io
+import time
+import tracemalloc
+import zipfile
+from pathlib import Path
+
+from app.core.utils.rag.parsers import parse, parse_unstructured
+
+WORDS = (
+    "retrieval augmented generation grounds answers in the uploaded document "
+    "so every response can be traced back to a passage"
+).split()
+
+
+def _paragraphs(count: int) -> list[str]:
+    return [
+        " ".join(WORDS[(i + j) % len(WORDS)] for j in range(60)) for i in range(count)
+    ]
+
+
+def make_text(paragraphs: int) -> bytes:
+    return "\n\n".join(_paragraphs(paragraphs)).encode()
+
+
+def make_markdown(paragraphs: int) -> bytes:
+    lines = []
+    for i, para in enumerate(_paragraphs(paragraphs)):
+        if i % 10 == 0:
+            lines.append(f"## Section {i // 10 + 1}\n")
+        lines.append(para + "\n")
+    return "\n".join(lines).encode()
+
+
+def make_docx(paragraphs: int, per_page: int = 20) -> bytes:
+    body = []
+    for i, para in enumerate(_paragraphs(paragraphs)):
+        body.append(f"<w:p><w:r><w:t>{para}</w:t></w:r></w:p>")
+        if (i + 1) % per_page == 0:
+            body.append('<w:p><w:r><w:br w:type="page"/></w:r></w:p>')
+    document = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<w:document xmlns:w="http://schemas.openxmlformats.org/'
+        'wordprocessingml/2006/main"><w:body>'
+        + "".join(body)
+        + "</w:body></w:document>"
+    )
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr(
+            "[Content_Types].xml",
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/'
+            'content-types"><Default Extension="xml" ContentType="application/'
+            'xml"/><Override PartName="/word/document.xml" ContentType="'
+            "application/vnd.openxmlformats-officedocument.wordprocessingml."
+            'document.main+xml"/></Types>',
+        )
+        archive.writestr("word/document.xml", document)
+    return buffer.getvalue()
+
+
+def make_pdf(paragraphs: int, per_page: int = 5) -> bytes:
+    # a bare-bones PDF with a Helvetica text layer, one stream per page
+    paras = _paragraphs(paragraphs)
+    pages = [paras[i : i + per_page] for i in range(0, len(paras), per_page)]
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    kids = []
+    for page in pages:
+        lines = [" ".join(p.split()[k : k + 12]) for p in page for k in (0, 12, 24)]
+        ops = ["BT /F1 10 Tf 14 TL 40 760 Td"]
+        ops += [f"({line}) Tj T*" for line in lines]
+        ops.append("ET")
+        stream = "\n".join(ops).encode()
+        objects.append(
+            b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream)
+        )
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+        kids.append(b"%d 0 R" % len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(kids),
+        len(kids),
+    )
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n%s\nendobj\n" % (number, body))
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for offset in offsets:
+        out.write(b"%010d 00000 n \n" % offset)
+    out.write(
+        b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+        % (len(objects) + 1, xref)
+    )
+    return out.getvalue()
+
+
+def fixtures(paragraphs: int) -> dict[str, bytes]:
+    return {
+        "sample.txt": make_text(paragraphs),
+        "sample.md": make_markdown(paragraphs),
+        "sample.docx": make_docx(paragraphs),
+        "sample.pdf": make_pdf(paragraphs),
+    }
+
+
+def measure(parser, data: bytes, key: str, repeat: int) -> dict:
+    best = float("inf")
+    peak = pages = chars = 0
+    for _ in range(repeat):
+        tracemalloc.start()
+        start = time.perf_counter()
+        pages = chars = 0
+        for page in parser(io.BytesIO(data), key):
+            pages += 1
+            chars += len(page.page_content)
+        best = min(best, time.perf_counter() - start)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return {"seconds": best, "peak_mb": peak / 2**20, "pages": pages, "chars": chars}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("files", nargs="*", type=Path)
+    parser.add_argument("--paragraphs", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-unstructured", action="store_true")
+    args = parser.parse_args()
+
+    if args.files:
+        inputs = {path.name: path.read_bytes() for path in args.files}
+    else:
+        inputs = fixtures(args.paragraphs)
+
+    engines = [("fast", parse)]
+    if not args.no_unstructured:
+        engines.append(("unstructured", parse_unstructured))
+
+    header = f"{'file':<24}{'engine':<14}{'size KB':>9}{'pages':>7}"
+    header += f"{'chars':>10}{'seconds':>10}{'peak MB':>9}"
+    print(header)
+    for key, data in inputs.items():
+        for name, engine in engines:
+            try:
+                r = measure(engine, data, key, args.repeat)
+            except Exception as e:
+                print(f"{key:<24}{name:<14} failed: {e}")
+                continue
+            print(
+                f"{key:<24}{name:<14}{len(data) / 1024:>9.0f}{r['pages']:>7}"
+                f"{r['chars']:>10}{r['seconds']:>10.3f}{r['peak_mb']:>9.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Recall versus memory for the local store's vector encodings.
+
+Stores the same synthetic embeddings as float32, int8 and binary (with a
+range of re-scoring factors), searches them exactly, and reports recall@k
+against float32 ground truth, bytes per vector (on disk, and scanned per
+query), index size and latency.
+
+    python -m scripts.bench_quantization
+    python -m scripts.bench_quantization --size 100000 --rescore 1 4 10 20
+"""
+
+import argparse
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from app.core.vectorstore import LocalVectorStore
+from app.core.vectorstore.quantization import codecs_for
+from scripts.bench_vectorstore import (
+    disk_bytes,
+    exact_top_k,
+    make_queries,
+    make_vectors,
+    write,
+)
+
+
+def run(encoding: str, rescore: int, vectors, queries, truth, k: int) -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        store = LocalVectorStore(
+            directory=directory,
+            max_loaded=4,
+            graph_threshold=len(vectors) + 1,
+            graph_degree=16,
+            search_ef=64,
+            encoding=encoding,
+            rescore_factor=rescore,
+        )
+        write(store, "1", vectors)
+        chunks = Path(directory) / "1" / "chunks.jsonl"
+        size = disk_bytes(Path(directory)) - chunks.stat().st_size
+
+        latencies, hits = [], 0
+        for query, expected in zip(queries, truth):
+            start = time.perf_counter()
+            result = store.query(
+                query_embeddings=[query.tolist()],
+                n_results=k,
+                where={"doc_id": "1"},
+                include=["distances"],
+            )
+            latencies.append(time.perf_counter() - start)
+            found = {int(i.rsplit("_chunk_", 1)[1]) for i in result["ids"][0]}
+            hits += len(found & expected)
+
+    # the full scan reads the short-listing layer when there is one
+    fine, coarse = codecs_for(encoding, vectors.shape[1])
+    scanned = coarse or fine
+    return {
+        "scan": scanned.width * np.dtype(scanned.dtype).itemsize,
+        "bytes": size / len(vectors),
+        "mb": size / 1024**2,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "recall": hits / (len(truth) * k),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--rescore", type=int, nargs="+", default=[1, 4, 10])
+    args = parser.parse_args()
+
+    vectors = make_vectors(args.size, args.dim)
+    queries = make_queries(vectors, args.queries)
+    truth = exact_top_k(vectors, queries, args.k)
+
+    runs = [("float32", 1), ("int8", 1)]
+    runs += [("binary", factor) for factor in args.rescore]
+
+    print(f"{args.size} vectors x {args.dim} dims, recall@{args.k}")
+    header = (
+        f"{'encoding':<10}{'rescore':>8}{'B/vector':>10}{'scan B':>8}{'index MB':>10}"
+    )
+    header += f"{'vs f32':>8}{'p50 ms':>9}{'recall':>8}"
+    print(header)
+    baseline = None
+    for encoding, rescore in runs:
+        r = run(encoding, rescore, vectors, queries, truth, args.k)
+        baseline = baseline or r["bytes"]
+        label = str(rescore) if encoding == "binary" else "-"
+        print(
+            f"{encoding:<10}{label:>8}{r['bytes']:>10.0f}{r['scan']:>8}{r['mb']:>10.1f}"
+            f"{baseline / r['bytes']:>7.1f}x{r['p50_ms']:>9.2f}{r['recall']:>8.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
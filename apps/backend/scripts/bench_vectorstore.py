@@ -0,0 +1,165 @@
+"""Benchmark the local vector store against the Chroma server.
+
+Writes synthetic clustered embeddings for one document per size, then
+replays queries through each engine, reporting write time, query latency,
+recall@k against exact search and bytes on disk.
+
+    python -m scripts.bench_vectorstore
+    python -m scripts.bench_vectorstore --sizes 1000 50000 --queries 200
+    python -m scripts.bench_vectorstore --chroma      # needs CHROMADB_HOST
+"""
+
+import argparse
+import statistics
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+import numpy as np
+
+from app.core.vectorstore import LocalVectorStore
+
+BATCH = 1000
+
+
+def make_vectors(n: int, dim: int, seed: int = 0) -> np.ndarray:
+    # clustered unit vectors look more like real chunk embeddings than
+    # uniform noise, which makes every neighbour equally far
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((max(1, n // 200), dim)).astype(np.float32)
+    vectors = centres[rng.integers(0, len(centres), n)]
+    vectors += 0.6 * rng.standard_normal((n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def make_queries(vectors: np.ndarray, count: int, seed: int = 1) -> np.ndarray:
+    # a query sits near one chunk (cosine ~0.85), like a question about it
+    rng = np.random.default_rng(seed)
+    picks = vectors[rng.integers(0, len(vectors), count)]
+    noise = rng.standard_normal(picks.shape).astype(np.float32)
+    queries = picks + 0.6 * noise / np.sqrt(picks.shape[1])
+    return queries / np.linalg.norm(queries, axis=1, keepdims=True)
+
+
+def exact_top_k(vectors: np.ndarray, queries: np.ndarray, k: int) -> list[set[int]]:
+    scores = queries @ vectors.T
+    return [set(np.argsort(-row)[:k].tolist()) for row in scores]
+
+
+def write(collection, doc_id: str, vectors: np.ndarray) -> float:
+    start = time.perf_counter()
+    for offset in range(0, len(vectors), BATCH):
+        batch = vectors[offset : offset + BATCH]
+        collection.upsert(
+            ids=[f"{doc_id}_chunk_{offset + i}" for i in range(len(batch))],
+            embeddings=batch.tolist(),
+            documents=[f"chunk {offset + i}" for i in range(len(batch))],
+            metadatas=[{"doc_id": doc_id} for _ in range(len(batch))],
+        )
+    return time.perf_counter() - start
+
+
+def replay(collection, doc_id: str, queries: np.ndarray, truth, k: int) -> dict:
+    # the first query pays for loading (and for the graph, if one is built)
+    start = time.perf_counter()
+    collection.query(
+        query_embeddings=[queries[0].tolist()],
+        n_results=k,
+        where={"doc_id": doc_id},
+        include=["distances"],
+    )
+    first = time.perf_counter() - start
+
+    latencies, hits = [], 0
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        result = collection.query(
+            query_embeddings=[query.tolist()],
+            n_results=k,
+            where={"doc_id": doc_id},
+            include=["distances"],
+        )
+        latencies.append(time.perf_counter() - start)
+        found = {int(i.rsplit("_chunk_", 1)[1]) for i in result["ids"][0]}
+        hits += len(found & expected)
+
+    latencies.sort()
+    return {
+        "first_ms": first * 1000,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95)] * 1000,
+        "recall": hits / (len(truth) * k),
+    }
+
+
+def disk_bytes(path: Path) -> int:
+    return sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+
+
+def chroma_collection():
+    import chromadb
+
+    from app.config import Config
+
+    client = chromadb.HttpClient(
+        host=Config["Env"].chromadb_host,
+        port=Config["Env"].chromadb_port,
+        ssl=Config["Env"].chromadb_ssl,
+    )
+    name = f"bench-{uuid.uuid4().hex[:8]}"
+    return client, client.create_collection(name=name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=20)
+    parser.add_argument("--degree", type=int, default=16)
+    parser.add_argument("--ef", type=int, default=64)
+    parser.add_argument("--chroma", action="store_true")
+    args = parser.parse_args()
+
+    header = f"{'chunks':>8}  {'engine':<14}{'write s':>9}{'first ms':>10}"
+    header += f"{'p50 ms':>9}{'p95 ms':>9}{'recall':>8}{'disk MB':>9}"
+    print(header)
+    for n in args.sizes:
+        vectors = make_vectors(n, args.dim)
+        queries = make_queries(vectors, args.queries)
+        truth = exact_top_k(vectors, queries, args.k)
+
+        engines = [("local-exact", n + 1), ("local-graph", 0)]
+        for name, threshold in engines:
+            with tempfile.TemporaryDirectory() as directory:
+                store = LocalVectorStore(
+                    directory=directory,
+                    max_loaded=4,
+                    graph_threshold=threshold,
+                    graph_degree=args.degree,
+                    search_ef=args.ef,
+                )
+                seconds = write(store, "1", vectors)
+                r = replay(store, "1", queries, truth, args.k)
+                size = disk_bytes(Path(directory)) / 1024**2
+            print(
+                f"{n:>8}  {name:<14}{seconds:>9.2f}{r['first_ms']:>10.1f}"
+                f"{r['p50_ms']:>9.2f}{r['p95_ms']:>9.2f}{r['recall']:>8.3f}{size:>9.1f}"
+            )
+
+        if args.chroma:
+            client, collection = chroma_collection()
+            try:
+                seconds = write(collection, "1", vectors)
+                r = replay(collection, "1", queries, truth, args.k)
+            finally:
+                client.delete_collection(collection.name)
+            print(
+                f"{n:>8}  {'chroma':<14}{seconds:>9.2f}{r['first_ms']:>10.1f}"
+                f"{r['p50_ms']:>9.2f}{r['p95_ms']:>9.2f}{r['recall']:>8.3f}{'-':>9}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""Offline evaluation of retrieval settings.
+
+Embeds a fixture corpus once, then replays its queries through the same
+selection logic Rag.query uses (distance cut-off + MMR, optionally fused
+with BM25 hits) for a grid of settings, reporting recall, hit rate, MRR,
+chunks sent and latency.
+
+    python -m scripts.eval_retrieval
+    python -m scripts.eval_retrieval --top-k 3 5 --fetch-k 5 20 --lambda 0.5 1.0
+    python -m scripts.eval_retrieval --embedder hashing --hybrid on
+"""
+
+import argparse
+import hashlib
+import itertools
+import json
+import re
+import statistics
+import time
+from pathlib import Path
+
+import numpy as np
+
+from app.core.rag.lexical import BM25Builder
+from app.core.rag.retrieval import (
+    RetrievalSettings,
+    reciprocal_rank_fusion,
+    select_chunks,
+)
+
+FIXTURE = Path(__file__).parent / "fixtures" / "retrieval_corpus.json"
+
+
+def hashing_embedder(texts: list[str], dim: int = 512) -> list[list[float]]:
+    # bag of hashed words; only useful for smoke-testing the harness
+    vectors = np.zeros((len(texts), dim), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for word in re.findall(r"\w+", text.lower()):
+            bucket = int(hashlib.md5(word.encode()).hexdigest(), 16) % dim
+            vectors[row, bucket] += 1.0
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return (vectors / np.where(norms == 0, 1.0, norms)).tolist()
+
+
+def model_embedder(texts: list[str]) -> list[list[float]]:
+    from app.core.utils.rag.embedding import generate_embeddings
+
+    return generate_embeddings(texts)
+
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def evaluate(corpus: dict, settings: RetrievalSettings) -> dict:
+    ids = [p["id"] for p in corpus["passages"]]
+    texts = [p["text"] for p in corpus["passages"]]
+    by_id = dict(zip(ids, texts))
+    matrix = np.asarray(corpus["_vectors"], dtype=np.float32)
+    lexical = corpus["_lexical"]
+
+    recalls, hits, ranks, sent, chars, latencies = [], [], [], [], [], []
+    for item, query in zip(corpus["queries"], corpus["_query_vectors"]):
+        start = time.perf_counter()
+        q = np.asarray(query, dtype=np.float32)
+        # squared l2, the same distance chroma reports by default
+        distances = ((matrix - q) ** 2).sum(axis=1)
+        order = np.argsort(distances)[: settings.n_results]
+        chunks = select_chunks(
+            query=query,
+            ids=[ids[i] for i in order],
+            texts=[texts[i] for i in order],
+            distances=[float(distances[i]) for i in order],
+            metadatas=None,
+            embeddings=[corpus["_vectors"][i] for i in order],
+            settings=settings,
+        )
+        got = [chunk.id for chunk in chunks]
+        if settings.hybrid:
+            matches = [
+                ids[i] for i, _ in lexical.search(item["query"], settings.lexical_k)
+            ]
+            fused = reciprocal_rank_fusion([got, matches], settings.rrf_k)
+            got = fused[: settings.top_k]
+        latencies.append(time.perf_counter() - start)
+
+        relevant = set(item["relevant"])
+        recalls.append(len(relevant & set(got)) / len(relevant))
+        hits.append(1.0 if relevant & set(got) else 0.0)
+        rank = next((n for n, cid in enumerate(got, 1) if cid in relevant), None)
+        ranks.append(1.0 / rank if rank else 0.0)
+        sent.append(len(got))
+        chars.append(sum(len(by_id[chunk_id]) for chunk_id in got))
+
+    return {
+        "recall": statistics.mean(recalls),
+        "hit": statistics.mean(hits),
+        "mrr": statistics.mean(ranks),
+        "chunks": statistics.mean(sent),
+        "chars": statistics.mean(chars),
+        "p50_ms": percentile(latencies, 0.5) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fixture", type=Path, default=FIXTURE)
+    parser.add_argument("--embedder", choices=["model", "hashing"], default="model")
+    parser.add_argument("--top-k", type=int, nargs="+", default=[3, 5])
+    parser.add_argument("--fetch-k", type=int, nargs="+", default=[5, 20])
+    parser.add_argument("--lambda", dest="lambdas", type=float, nargs="+")
+    parser.add_argument("--max-distance", type=float, nargs="+", default=[0.0, 0.8])
+    parser.add_argument("--lexical-k", type=int, default=10)
+    parser.add_argument("--hybrid", choices=["off", "on", "both"], default="both")
+    args = parser.parse_args()
+    lambdas = args.lambdas or [0.7, 1.0]
+
+    corpus = json.loads(args.fixture.read_text())
+    embed = model_embedder if args.embedder == "model" else hashing_embedder
+
+    start = time.perf_counter()
+    corpus["_vectors"] = embed([p["text"] for p in corpus["passages"]])
+    corpus["_query_vectors"] = embed([q["query"] for q in corpus["queries"]])
+    builder = BM25Builder()
+    builder.add([p["text"] for p in corpus["passages"]])
+    corpus["_lexical"] = builder.build()
+    elapsed = time.perf_counter() - start
+    print(
+        f"embedded {len(corpus['passages'])} passages and "
+        f"{len(corpus['queries'])} queries in {elapsed:.2f}s\n"
+    )
+
+    hybrid = {"off": [False], "on": [True], "both": [False, True]}[args.hybrid]
+    header = f"{'top_k':>5}{'fetch_k':>8}{'lambda':>7}{'max_d':>6}{'hybrid':>7}"
+    header += f"{'recall':>8}{'hit':>6}{'mrr':>6}{'chunks':>7}{'chars':>7}"
+    header += f"{'p50 ms':>8}{'p95 ms':>8}"
+    print(header)
+    grid = itertools.product(
+        args.top_k, args.fetch_k, lambdas, args.max_distance, hybrid
+    )
+    for top_k, fetch_k, lambda_, max_distance, use_hybrid in grid:
+        settings = RetrievalSettings(
+            top_k=top_k,
+            fetch_k=fetch_k,
+            mmr_lambda=lambda_,
+            max_distance=max_distance,
+            hybrid=use_hybrid,
+            lexical_k=args.lexical_k,
+        )
+        r = evaluate(corpus, settings)
+        print(
+            f"{top_k:>5}{fetch_k:>8}{lambda_:>7.2f}{max_distance:>6.2f}"
+            f"{'on' if use_hybrid else 'off':>7}"
+            f"{r['recall']:>8.3f}{r['hit']:>6.2f}{r['mrr']:>6.2f}"
+            f"{r['chunks']:>7.2f}{r['chars']:>7.0f}"
+            f"{r['p50_ms']:>8.3f}{r['p95_ms']:>8.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
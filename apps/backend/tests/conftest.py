@@ -0,0 +1,33 @@
+import os
+import tempfile
+
+# app.config reads the environment at import time; point it at throwaway
+# local resources so modules import without Postgres, S3 or Chroma
+_scratch = tempfile.mkdtemp(prefix="backend-tests-")
+os.environ.setdefault("DATABASE_URI", f"sqlite:///{_scratch}/app.db")
+os.environ.setdefault("DATABASE_ASYNC_URI", f"sqlite+aiosqlite:///{_scratch}/app.db")
+os.environ.setdefault("AWS_REGION", "us-east-1")
+os.environ.setdefault("AWS_BUCKET", "test-bucket")
+os.environ.setdefault("VECTOR_STORE", "local")
+os.environ.setdefault("VECTOR_INDEX_DIR", f"{_scratch}/vectors")
+os.environ.setdefault("INGESTION_MODE", "external")
+
+import pytest  # noqa: E402
+from sqlalchemy.ext.asyncio import create_async_engine  # noqa: E402
+
+from app.database.main import Base  # noqa: E402
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def engine(tmp_path):
+    # a fresh sqlite schema per test
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/test.db")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield engine
+    await engine.dispose()
@@ -0,0 +1,133 @@
+import pytest
+
+from app.core.rag import cache
+from app.core.rag.cache import AnswerCache
+from app.core.rag.rag import Rag
+from app.schemas.rag import History, RagQuery, RetrievalParams, Role
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache.time, "monotonic", clock)
+    return clock
+
+
+def answers(threshold: float = 0.9, max_entries: int = 8, ttl: float = 60):
+    return AnswerCache(
+        max_entries=max_entries, ttl_seconds=ttl, threshold=threshold, enabled=True
+    )
+
+
+def test_exact_hit_ignores_case_whitespace_and_punctuation():
+    cached = answers()
+    cached.put(1, "What is the deadline?", [1.0, 0.0], "Friday")
+
+    assert cached.get(1, "  what IS the   deadline ", [0.0, 1.0]) == "Friday"
+    assert cached.get(2, "What is the deadline?", [1.0, 0.0]) is None
+    assert cached.stats()["exact_hits"] == 1
+
+
+def test_semantic_hit_at_threshold_and_miss_below():
+    cached = answers(threshold=1.0)
+    cached.put(1, "When is it due?", [1.0, 0.0], "Friday")
+
+    # same direction, different wording: similarity exactly 1.0
+    assert cached.get(1, "Due date?", [2.0, 0.0]) == "Friday"
+    assert cached.get(1, "Due date?", [1.0, 0.01]) is None
+
+
+def test_semantic_hit_picks_neighbours_above_threshold():
+    cached = answers(threshold=0.9)
+    cached.put(1, "When is it due?", [1.0, 0.0], "Friday")
+
+    assert cached.get(1, "What's the due date?", [1.0, 0.1]) == "Friday"
+    assert cached.get(1, "Who wrote it?", [1.0, 1.0]) is None
+    stats = cached.stats()
+    assert (stats["semantic_hits"], stats["misses"]) == (1, 1)
+
+
+def test_entries_expire_after_ttl(clock):
+    cached = answers(ttl=60)
+    cached.put(1, "When is it due?", [1.0, 0.0], "Friday")
+
+    clock.now += 59
+    assert cached.get(1, "When is it due?", [1.0, 0.0]) == "Friday"
+    clock.now += 2
+    assert cached.get(1, "When is it due?", [1.0, 0.0]) is None
+    assert cached.get(1, "Due date?", [1.0, 0.0]) is None
+    assert cached.stats()["entries"] == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cached = answers(max_entries=2)
+    cached.put(1, "first", [1.0, 0.0], "a")
+    cached.put(1, "second", [0.0, 1.0], "b")
+    cached.get(1, "first", [1.0, 0.0])
+    cached.put(1, "third", [-1.0, 0.0], "c")
+
+    assert cached.get(1, "first", [1.0, 0.0]) == "a"
+    assert cached.get(1, "second", [0.0, 1.0]) is None
+    assert cached.get(1, "third", [-1.0, 0.0]) == "c"
+    assert cached.stats()["evictions"] == 1
+
+
+def test_answers_from_another_index_version_never_hit():
+    cached = answers()
+    cached.put(1, "When is it due?", [1.0, 0.0], "Friday", version=1)
+
+    assert cached.get(1, "When is it due?", [1.0, 0.0], version=2) is None
+    assert cached.get(1, "Due date?", [1.0, 0.0], version=2) is None
+
+    # an answer for the new version drops the old ones
+    cached.put(1, "Who wrote it?", [0.0, 1.0], "Ada", version=2)
+    assert cached.get(1, "When is it due?", [1.0, 0.0], version=1) is None
+    assert cached.get(1, "Who wrote it?", [0.0, 1.0], version=2) == "Ada"
+    assert cached.stats()["entries"] == 1
+
+
+def test_invalidate_drops_only_that_document():
+    cached = answers()
+    cached.put(1, "q", [1.0, 0.0], "a")
+    cached.put(2, "q", [1.0, 0.0], "b")
+    cached.invalidate(1)
+
+    assert cached.get(1, "q", [1.0, 0.0]) is None
+    assert cached.get(2, "q", [1.0, 0.0]) == "b"
+
+
+def test_disabled_cache_stores_nothing():
+    cached = AnswerCache(max_entries=8, ttl_seconds=60, threshold=0.9, enabled=False)
+    cached.put(1, "q", [1.0, 0.0], "a")
+
+    assert cached.get(1, "q", [1.0, 0.0]) is None
+
+
+@pytest.mark.parametrize(
+    "query, history, retrieval, cacheable",
+    [
+        ("When is the report due?", None, None, True),
+        ("What about it?", None, None, True),
+        ("When is the report due?", "earlier turn", None, True),
+        ("What about it?", "earlier turn", None, False),
+        ("And the one above?", "earlier turn", None, False),
+        ("When is the report due?", None, RetrievalParams(top_k=3), False),
+    ],
+)
+def test_is_cacheable(query, history, retrieval, cacheable):
+    input_data = RagQuery(
+        query=query,
+        doc_id=1,
+        history=[History(role=Role.user, content=history)] if history else None,
+        retrieval=retrieval,
+    )
+
+    assert Rag._is_cacheable(input_data) is cacheable
@@ -0,0 +1,102 @@
+import json
+
+import pytest
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.messages import HumanMessage
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.core.rag import rag
+from app.core.rag.cache import answer_cache
+from app.core.rag.memory import memory_queue
+from app.core.utils.rag import llm
+from app.database.models import Document, Session, User
+from app.database.models.chats import Chat, Role
+from app.database.models.documents import ContentType, DocumentStatus
+from app.schemas.rag import RetrievedChunk
+from app.services.session import SessionService
+
+pytestmark = pytest.mark.anyio
+
+ANSWER = "Paris is the capital"
+
+
+@pytest.fixture(autouse=True)
+def offline_rag(monkeypatch):
+    # everything around the LLM is replaced, so only the stream is exercised
+    async def retrieve(doc_id, query, vector, settings, version=None):
+        return [RetrievedChunk(id=f"{doc_id}_chunk_0", text="Paris is in France.")]
+
+    monkeypatch.setattr(
+        rag, "generate_embeddings", lambda texts: [[0.1] * 8 for _ in texts]
+    )
+    monkeypatch.setattr(rag, "retrieve", retrieve)
+    monkeypatch.setattr(
+        llm, "build_messages", lambda input_data: [HumanMessage(input_data.query)]
+    )
+    monkeypatch.setattr(answer_cache, "enabled", False)
+    monkeypatch.setattr(memory_queue, "enabled", False)
+
+
+@pytest.fixture
+async def db(engine):
+    async with async_sessionmaker(engine, expire_on_commit=False)() as db:
+        user = User(email="reader@example.com")
+        doc = Document(
+            url="https://cdn.example.com/doc.pdf",
+            key="doc.pdf",
+            title="doc.pdf",
+            user=user,
+            content_type=ContentType.PDF,
+            status=DocumentStatus.READY,
+        )
+        db.add_all([user, doc, Session(session_token="token", document=doc, user=user)])
+        await db.commit()
+        yield db
+
+
+async def open_stream(db, model):
+    return await SessionService.chat_stream(
+        session_id="token",
+        user_id=1,
+        message="What is the capital?",
+        db=db,
+        llm=model,
+    )
+
+
+async def saved_chats(db) -> list[tuple[Role, str]]:
+    rows = await db.execute(select(Chat.role, Chat.message).order_by(Chat.id))
+    return [tuple(row) for row in rows]
+
+
+async def test_tokens_then_done_and_answer_saved(db):
+    events = await open_stream(db, FakeListChatModel(responses=[ANSWER]))
+    lines = [json.loads(line) async for line in events]
+
+    types = [line["type"] for line in lines]
+    assert types == ["token"] * (len(types) - 1) + ["done"]
+    assert "".join(line["content"] for line in lines[:-1]) == ANSWER
+    assert lines[-1]["response"] == ANSWER
+    assert await saved_chats(db) == [
+        (Role.USER, "What is the capital?"),
+        (Role.ASSISTANT, ANSWER),
+    ]
+
+
+async def test_stream_closed_midway_saves_nothing(db):
+    events = await open_stream(db, FakeListChatModel(responses=[ANSWER]))
+    first = json.loads(await anext(events))
+    await events.aclose()
+
+    assert first["type"] == "token"
+    assert await saved_chats(db) == []
+
+
+async def test_stream_failing_partway_emits_error_and_saves_nothing(db):
+    model = FakeListChatModel(responses=[ANSWER], error_on_chunk_number=3)
+    events = await open_stream(db, model)
+    lines = [json.loads(line) async for line in events]
+
+    assert [line["type"] for line in lines] == ["token"] * 3 + ["error"]
+    assert await saved_chats(db) == []
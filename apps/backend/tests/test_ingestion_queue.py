@@ -0,0 +1,250 @@
+import hashlib
+import io
+import threading
+from datetime import datetime
+
+import pytest
+from fastapi import UploadFile
+from sqlalchemy import delete, update
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from starlette.datastructures import Headers
+
+from app.config import Config
+from app.core.ingestion import queue
+from app.core.ingestion.queue import (
+    IngestionQueue,
+    claim_document,
+    pending_document_ids,
+    renew_lease,
+    requeue_document,
+)
+from app.database.main import Base, SessionLocal, async_engine, engine
+from app.database.models import Document, Session, User
+from app.database.models.documents import ContentType, DocumentStatus
+from app.schemas.s3 import UploadResultSchema
+from app.services import session as session_service
+from app.services.session import SessionService
+
+LONG_AGO = datetime(2000, 1, 1)
+
+
+@pytest.fixture(autouse=True)
+def tables():
+    # the queue talks to the app's own (sync) database
+    Base.metadata.create_all(engine)
+    yield
+    with SessionLocal() as db:
+        for table in reversed(Base.metadata.sorted_tables):
+            db.execute(delete(table))
+        db.commit()
+
+
+def add_document(status: DocumentStatus, updated_at: datetime | None = None) -> int:
+    with SessionLocal() as db:
+        user = User(email=f"{status.value}-{datetime.now().timestamp()}@example.com")
+        doc = Document(
+            url="https://cdn.example.com/doc.pdf",
+            key="doc.pdf",
+            title="doc.pdf",
+            user=user,
+            content_type=ContentType.PDF,
+            status=status,
+        )
+        db.add(doc)
+        db.commit()
+        if updated_at is not None:
+            set_updated_at(doc.id, updated_at)
+        return doc.id
+
+
+def set_updated_at(doc_id: int, updated_at: datetime) -> None:
+    with SessionLocal() as db:
+        db.execute(
+            update(Document).where(Document.id == doc_id).values(updated_at=updated_at)
+        )
+        db.commit()
+
+
+def document(doc_id: int) -> Document:
+    with SessionLocal() as db:
+        return db.get(Document, doc_id)
+
+
+def test_pending_document_is_claimed_once():
+    doc_id = add_document(DocumentStatus.PENDING)
+
+    assert claim_document(doc_id)
+    assert not claim_document(doc_id)
+    claimed = document(doc_id)
+    assert claimed.status == DocumentStatus.PARSING
+    assert claimed.index_version == 1
+
+
+def test_concurrent_claims_have_one_winner():
+    doc_id = add_document(DocumentStatus.PENDING)
+    barrier = threading.Barrier(6)
+    wins = []
+
+    def claim():
+        barrier.wait()
+        wins.append(claim_document(doc_id))
+
+    threads = [threading.Thread(target=claim) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(wins) == [False] * 5 + [True]
+    assert document(doc_id).index_version == 1
+
+
+@pytest.mark.parametrize("status", [DocumentStatus.PARSING, DocumentStatus.EMBEDDING])
+def test_in_progress_document_is_reclaimed_once_its_lease_expires(status):
+    doc_id = add_document(status)
+
+    # a live worker holds the lease
+    assert not claim_document(doc_id)
+
+    set_updated_at(doc_id, LONG_AGO)
+    assert claim_document(doc_id)
+    assert document(doc_id).status == DocumentStatus.PARSING
+    assert not claim_document(doc_id)
+
+
+def test_renewed_lease_is_not_reclaimed():
+    doc_id = add_document(DocumentStatus.EMBEDDING, updated_at=LONG_AGO)
+
+    renew_lease(doc_id)
+
+    assert not claim_document(doc_id)
+
+
+def test_renewing_leaves_finished_documents_alone():
+    doc_id = add_document(DocumentStatus.READY, updated_at=LONG_AGO)
+
+    renew_lease(doc_id)
+
+    assert document(doc_id).updated_at == LONG_AGO
+
+
+def test_pending_ids_cover_pending_and_abandoned_jobs():
+    pending = add_document(DocumentStatus.PENDING)
+    abandoned = add_document(DocumentStatus.PARSING, updated_at=LONG_AGO)
+    add_document(DocumentStatus.EMBEDDING)
+    add_document(DocumentStatus.READY, updated_at=LONG_AGO)
+    add_document(DocumentStatus.FAILED, updated_at=LONG_AGO)
+
+    assert pending_document_ids(limit=10) == [pending, abandoned]
+
+
+def test_failed_document_is_requeued():
+    doc_id = add_document(DocumentStatus.FAILED)
+    with SessionLocal() as db:
+        db.execute(
+            update(Document).where(Document.id == doc_id).values(error="parse error")
+        )
+        db.commit()
+
+    assert requeue_document(doc_id)
+    requeued = document(doc_id)
+    assert (requeued.status, requeued.error) == (DocumentStatus.PENDING, None)
+    assert claim_document(doc_id)
+
+
+@pytest.mark.parametrize(
+    "status", [DocumentStatus.PENDING, DocumentStatus.PARSING, DocumentStatus.READY]
+)
+def test_only_failed_documents_are_requeued(status):
+    doc_id = add_document(status)
+
+    assert not requeue_document(doc_id)
+    assert document(doc_id).status == status
+
+
+def test_retry_runs_the_job_again_in_local_mode(monkeypatch):
+    ran = []
+    monkeypatch.setattr(
+        queue, "run_ingestion", lambda doc_id, source=None: ran.append(doc_id)
+    )
+    local = IngestionQueue(mode="local", max_workers=1, lease=600)
+    failed = add_document(DocumentStatus.FAILED)
+    ready = add_document(DocumentStatus.READY)
+
+    try:
+        assert local.retry(failed)
+        assert not local.retry(ready)
+    finally:
+        local.shutdown()
+
+    assert ran == [failed]
+
+
+def test_resume_submits_pending_and_abandoned_jobs(monkeypatch):
+    ran = []
+    monkeypatch.setattr(
+        queue, "run_ingestion", lambda doc_id, source=None: ran.append(doc_id)
+    )
+    local = IngestionQueue(mode="local", max_workers=1, lease=600)
+    pending = add_document(DocumentStatus.PENDING)
+    abandoned = add_document(DocumentStatus.EMBEDDING, updated_at=LONG_AGO)
+    add_document(DocumentStatus.PARSING)
+
+    try:
+        assert local.resume_pending() == 2
+    finally:
+        local.shutdown()
+
+    assert sorted(ran) == [pending, abandoned]
+
+
+class FakeS3:
+    def upload_fileobj(self, file, content_type):
+        file.seek(0)
+        data = file.read()
+        return UploadResultSchema(
+            object_key="uploads/doc.pdf",
+            url="https://cdn.example.com/uploads/doc.pdf",
+            size=len(data),
+            sha256=hashlib.sha256(data).hexdigest(),
+        )
+
+
+class BrokenQueue:
+    is_local = True
+
+    def enqueue(self, doc_id, source=None):
+        raise RuntimeError("cannot schedule new futures after shutdown")
+
+
+@pytest.mark.anyio
+async def test_upload_that_cannot_be_queued_is_failed_and_unspooled(
+    monkeypatch, tmp_path
+):
+    monkeypatch.setattr(session_service, "s3", FakeS3())
+    monkeypatch.setattr(session_service, "ingestion_queue", BrokenQueue())
+    monkeypatch.setattr(Config["Env"], "ingestion_spool_dir", str(tmp_path))
+    with SessionLocal() as db:
+        user = User(email="uploader@example.com")
+        db.add(user)
+        db.commit()
+        user_id = user.id
+    upload = UploadFile(
+        io.BytesIO(b"%PDF-1.4 test"),
+        filename="doc.pdf",
+        headers=Headers({"content-type": "application/pdf"}),
+    )
+
+    try:
+        async with async_sessionmaker(async_engine, expire_on_commit=False)() as db:
+            created = await SessionService.create_session(
+                upload, user_id=user_id, db=db
+            )
+    finally:
+        await async_engine.dispose()
+
+    assert created.status == DocumentStatus.FAILED.value
+    assert document(created.doc_id).status == DocumentStatus.FAILED
+    with SessionLocal() as db:
+        assert db.get(Session, created.session_id) is not None
+    assert list(tmp_path.iterdir()) == []
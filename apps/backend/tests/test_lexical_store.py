@@ -0,0 +1,82 @@
+import threading
+import time
+
+import numpy as np
+
+from app.core.chroma import docs
+from app.core.rag.lexical import BM25Builder, LexicalStore
+
+
+def seed(doc_id: int, texts: list[str]) -> None:
+    docs.upsert(
+        ids=[f"{doc_id}_chunk_{i}" for i in range(len(texts))],
+        embeddings=np.random.default_rng(doc_id).random((len(texts), 8)).tolist(),
+        documents=texts,
+        metadatas=[{"doc_id": str(doc_id)} for _ in texts],
+    )
+
+
+def build(texts: list[str]):
+    builder = BM25Builder()
+    builder.add(texts)
+    return builder.build()
+
+
+def test_concurrent_first_queries_share_one_rebuild(tmp_path):
+    seed(101, ["alpha beta", "gamma delta"])
+    store = LexicalStore(directory=str(tmp_path), max_loaded=4)
+    rebuild = store._rebuild
+    calls = []
+
+    def slow_rebuild(doc_id, version):
+        calls.append(doc_id)
+        time.sleep(0.05)
+        return rebuild(doc_id, version)
+
+    store._rebuild = slow_rebuild
+    barrier = threading.Barrier(8)
+    results = []
+
+    def query():
+        barrier.wait()
+        results.append(store.get(101, version=1))
+
+    threads = [threading.Thread(target=query) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert calls == [101]
+    assert len({id(index) for index in results}) == 1
+    assert [position for position, _ in results[0].search("gamma", 1)] == [1]
+
+
+def test_newer_index_version_replaces_loaded_index(tmp_path):
+    api = LexicalStore(directory=str(tmp_path), max_loaded=4)
+    worker = LexicalStore(directory=str(tmp_path), max_loaded=4)
+    worker.save(102, build(["old text"]), version=1)
+    assert api.get(102, version=1).search("old", 1)
+
+    # the worker re-ingests; the api never sees its in-process invalidation
+    worker.save(102, build(["new text"]), version=2)
+
+    assert api.get(102, version=1).search("old", 1)
+    index = api.get(102, version=2)
+    assert index.version == 2
+    assert index.search("new", 1) and not index.search("old", 1)
+
+
+def test_stale_index_is_rebuilt_from_chunks(tmp_path):
+    seed(103, ["fresh chunk"])
+    store = LexicalStore(directory=str(tmp_path), max_loaded=4)
+    store.save(103, build(["stale chunk"]), version=1)
+
+    index = store.get(103, version=2)
+
+    assert index.version == 2
+    assert index.search("fresh", 1) and not index.search("stale", 1)
+    # the rebuilt index replaced the file for the next process
+    assert (
+        LexicalStore(str(tmp_path), max_loaded=4).get(103, version=2).search("fresh", 1)
+    )
@@ -0,0 +1,269 @@
+import asyncio
+import threading
+import time
+
+import httpx
+import pytest
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage
+
+from app.core.utils.rag import provider
+from app.core.utils.rag.provider import LlmClient, LlmTimeout, _is_retryable
+
+pytestmark = pytest.mark.anyio
+
+MESSAGES = [HumanMessage("hello")]
+
+
+class StatusError(Exception):
+    def __init__(self, code: int) -> None:
+        super().__init__(f"status {code}")
+        self.code = code
+
+
+class ScriptedModel:
+    """Chat-model double whose calls fail, stall or stream on demand.
+
+    Streams raise their next scripted failure just before chunk `fail_at`
+    and sleep `gap` seconds between chunks.
+    """
+
+    def __init__(
+        self, failures=(), chunks=("Hello", " world"), fail_at=1, gap=0.0, hold=0.0
+    ):
+        self.failures = list(failures)
+        self.chunks = chunks
+        self.fail_at = fail_at
+        self.gap = gap
+        self.hold = hold
+        self.calls = 0
+        self.active = 0
+        self.peak = 0
+        self._count = threading.Lock()
+
+    def _enter(self):
+        with self._count:
+            self.calls += 1
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+
+    def _leave(self):
+        with self._count:
+            self.active -= 1
+
+    def _next_failure(self):
+        return self.failures.pop(0) if self.failures else None
+
+    async def ainvoke(self, messages):
+        self._enter()
+        try:
+            await asyncio.sleep(self.hold)
+            if failure := self._next_failure():
+                raise failure
+            return AIMessage("".join(self.chunks))
+        finally:
+            self._leave()
+
+    def invoke(self, messages):
+        self._enter()
+        try:
+            time.sleep(self.hold)
+            if failure := self._next_failure():
+                raise failure
+            return AIMessage("".join(self.chunks))
+        finally:
+            self._leave()
+
+    async def astream(self, messages):
+        self._enter()
+        try:
+            failure = self._next_failure()
+            for i, chunk in enumerate(self.chunks):
+                if failure and i == self.fail_at:
+                    raise failure
+                if i:
+                    await asyncio.sleep(self.gap)
+                yield AIMessageChunk(chunk)
+        finally:
+            self._leave()
+
+
+def client(model, **overrides) -> LlmClient:
+    settings = {
+        "max_concurrency": 4,
+        "timeout": 5.0,
+        "max_retries": 3,
+        "backoff_base": 0.01,
+        "backoff_max": 0.02,
+        **overrides,
+    }
+    return LlmClient(factory=lambda: model, **settings)
+
+
+async def collect(stream) -> list[str]:
+    return [token async for token in stream]
+
+
+@pytest.mark.parametrize(
+    "error, retryable",
+    [
+        (StatusError(429), True),
+        (StatusError(503), True),
+        (StatusError(500), True),
+        (StatusError(400), False),
+        (StatusError(404), False),
+        (ConnectionError("reset"), True),
+        (TimeoutError(), True),
+        (httpx.ConnectTimeout("slow"), True),
+        (ValueError("rate limit exceeded, 429"), False),
+    ],
+)
+def test_is_retryable(error, retryable):
+    assert _is_retryable(error) is retryable
+
+
+def test_is_retryable_walks_the_cause_chain():
+    def wrapped(cause):
+        try:
+            raise cause
+        except Exception as e:
+            try:
+                raise RuntimeError("provider call failed") from e
+            except RuntimeError as wrapper:
+                return wrapper
+
+    assert _is_retryable(wrapped(StatusError(503)))
+    assert not _is_retryable(wrapped(StatusError(400)))
+    assert _is_retryable(wrapped(ConnectionError("reset")))
+
+
+async def test_retryable_errors_are_retried_until_success():
+    model = ScriptedModel(failures=[StatusError(429), StatusError(503)])
+    llm = client(model)
+
+    assert await llm.ainvoke(MESSAGES) == "Hello world"
+    assert model.calls == 3
+    assert llm.stats()["retries"] == 2
+
+
+async def test_client_errors_are_not_retried():
+    model = ScriptedModel(failures=[StatusError(400)])
+    llm = client(model)
+
+    with pytest.raises(StatusError):
+        await llm.ainvoke(MESSAGES)
+    assert model.calls == 1
+    assert llm.stats()["errors"] == 1
+
+
+async def test_backoff_stops_at_the_deadline():
+    model = ScriptedModel(failures=[StatusError(503)] * 1000)
+    llm = client(model, timeout=0.3, max_retries=1000, backoff_max=0.05)
+
+    start = time.monotonic()
+    with pytest.raises(StatusError):
+        await llm.ainvoke(MESSAGES)
+
+    assert time.monotonic() - start < 0.35
+    assert model.calls > 1
+
+
+def test_backoff_is_jittered_and_refuses_to_sleep_past_the_deadline(monkeypatch):
+    llm = client(ScriptedModel(), backoff_base=1.0, backoff_max=4.0, max_retries=5)
+    lows = []
+    # always draw the top of the jitter range
+    monkeypatch.setattr(
+        provider.random, "uniform", lambda low, high: lows.append(low) or high
+    )
+    deadline = time.monotonic() + 10
+
+    assert [llm._backoff(attempt, deadline) for attempt in range(4)] == [
+        1.0,
+        2.0,
+        4.0,
+        4.0,
+    ]
+    assert llm._backoff(0, time.monotonic() + 0.5) is None
+    assert llm._backoff(5, deadline) is None
+    # full jitter: every delay is drawn from [0, cap]
+    assert set(lows) == {0}
+
+
+async def test_stream_retries_before_the_first_token():
+    model = ScriptedModel(failures=[StatusError(503)], fail_at=0)
+    llm = client(model)
+
+    assert await collect(llm.astream(MESSAGES)) == ["Hello", " world"]
+    assert model.calls == 2
+
+
+async def test_stream_is_not_retried_after_the_first_token():
+    model = ScriptedModel(failures=[StatusError(503)])
+    llm = client(model)
+    tokens = []
+
+    with pytest.raises(StatusError):
+        async for token in llm.astream(MESSAGES):
+            tokens.append(token)
+
+    assert tokens == ["Hello"]
+    assert model.calls == 1
+    assert llm.stats()["retries"] == 0
+
+
+async def test_long_stream_outlives_the_deadline_while_tokens_flow():
+    model = ScriptedModel(chunks=tuple("abcdefgh"), gap=0.05)
+    llm = client(model, timeout=0.2, idle_timeout=0.15)
+
+    assert "".join(await collect(llm.astream(MESSAGES))) == "abcdefgh"
+
+
+async def test_stalled_stream_times_out_between_chunks():
+    model = ScriptedModel(chunks=("a", "b"), gap=0.3)
+    llm = client(model, timeout=1.0, idle_timeout=0.1)
+    tokens = []
+
+    with pytest.raises(LlmTimeout):
+        async for token in llm.astream(MESSAGES):
+            tokens.append(token)
+
+    assert tokens == ["a"]
+    assert llm.stats()["timeouts"] == 1
+
+
+async def test_async_calls_are_bounded_by_max_concurrency():
+    model = ScriptedModel(hold=0.05)
+    llm = client(model, max_concurrency=2)
+
+    await asyncio.gather(*(llm.ainvoke(MESSAGES) for _ in range(6)))
+
+    assert model.calls == 6
+    assert model.peak == 2
+
+
+def test_sync_calls_are_bounded_by_max_concurrency():
+    model = ScriptedModel(hold=0.05)
+    llm = client(model, max_concurrency=2)
+    threads = [threading.Thread(target=llm.invoke, args=(MESSAGES,)) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert model.calls == 6
+    assert model.peak == 2
+
+
+def test_sync_call_gives_up_at_the_deadline():
+    llm = client(ScriptedModel(hold=1.0), timeout=0.2, max_retries=0)
+
+    start = time.monotonic()
+    with pytest.raises(LlmTimeout):
+        llm.invoke(MESSAGES)
+    assert time.monotonic() - start < 0.5
+
+
+async def test_fake_provider_streams_through_the_client():
+    llm = client(FakeListChatModel(responses=["canned"]))
+
+    assert "".join(await collect(llm.astream(MESSAGES))) == "canned"
@@ -0,0 +1,197 @@
+import json
+
+import numpy as np
+import pytest
+
+from app.core.vectorstore import LocalVectorStore
+from app.core.vectorstore.local import GRAPH_FILE, build_graph
+
+DIM = 16
+
+
+def make_store(directory, **overrides) -> LocalVectorStore:
+    settings = {
+        "directory": str(directory),
+        "max_loaded": 4,
+        "graph_threshold": 1000,
+        "graph_degree": 8,
+        "search_ef": 32,
+        **overrides,
+    }
+    return LocalVectorStore(**settings)
+
+
+def vectors(n: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    v = rng.normal(size=(n, DIM))
+    return (v / np.linalg.norm(v, axis=1, keepdims=True)).astype(np.float32)
+
+
+def add(store: LocalVectorStore, doc_id: int, embeddings, start: int = 0, text="t"):
+    ids = [f"{doc_id}_chunk_{start + i}" for i in range(len(embeddings))]
+    store.upsert(
+        ids=ids,
+        embeddings=embeddings,
+        documents=[f"{text} {start + i}" for i in range(len(embeddings))],
+        metadatas=[{"doc_id": doc_id, "n": start + i} for i in range(len(embeddings))],
+    )
+    return ids
+
+
+def search(store: LocalVectorStore, doc_id: int, query, k: int = 3) -> dict:
+    return store.query(
+        query_embeddings=[query], n_results=k, where={"doc_id": str(doc_id)}
+    )
+
+
+def test_vectors_survive_reopening_the_store(tmp_path):
+    data = vectors(50)
+    add(make_store(tmp_path), 1, data[:30])
+    add(make_store(tmp_path), 1, data[30:], start=30)
+
+    reopened = make_store(tmp_path)
+    found = search(reopened, 1, data[42])
+    stored = reopened.get(where={"doc_id": 1}, include=["embeddings"])
+
+    assert found["ids"][0][0] == "1_chunk_42"
+    assert found["distances"][0][0] == pytest.approx(0, abs=1e-5)
+    assert found["documents"][0][0] == "t 42"
+    assert found["metadatas"][0][0] == {"doc_id": 1, "n": 42}
+    assert len(stored["ids"]) == 50
+    np.testing.assert_allclose(np.array(stored["embeddings"]), data, atol=1e-6)
+
+
+def test_appends_from_another_process_are_picked_up(tmp_path):
+    reader = make_store(tmp_path)
+    data = vectors(20)
+    add(make_store(tmp_path), 1, data[:10])
+    assert len(reader.get(where={"doc_id": 1})["ids"]) == 10
+
+    # a separate writer (e.g. an ingestion worker) appends to the same files
+    add(make_store(tmp_path), 1, data[10:], start=10)
+
+    assert len(reader.get(where={"doc_id": 1})["ids"]) == 20
+    assert search(reader, 1, data[15])["ids"][0][0] == "1_chunk_15"
+
+
+def test_torn_rows_are_ignored(tmp_path):
+    store = make_store(tmp_path)
+    add(store, 1, vectors(5))
+    with open(tmp_path / "1" / "chunks.jsonl", "a") as f:
+        f.write('{"id": "1_chunk_5", "docu')
+
+    assert make_store(tmp_path).get(where={"doc_id": 1})["ids"] == [
+        f"1_chunk_{i}" for i in range(5)
+    ]
+
+
+def test_upsert_overwrites_an_existing_id(tmp_path):
+    store = make_store(tmp_path)
+    data = vectors(10)
+    add(store, 1, data)
+
+    moved = vectors(1, seed=7)
+    store.upsert(
+        ids=["1_chunk_3"],
+        embeddings=moved,
+        documents=["rewritten"],
+        metadatas=[{"doc_id": 1, "n": 3}],
+    )
+
+    for reader in (store, make_store(tmp_path)):
+        got = reader.get(ids=["1_chunk_3"], include=["documents", "embeddings"])
+        assert got["documents"] == ["rewritten"]
+        np.testing.assert_allclose(got["embeddings"][0], moved[0], atol=1e-6)
+        # the old row is gone: it neither matches its old vector nor repeats
+        old = search(reader, 1, data[3], k=10)["ids"][0]
+        assert old.count("1_chunk_3") <= 1
+        assert old[0] != "1_chunk_3"
+        assert search(reader, 1, moved[0])["ids"][0][0] == "1_chunk_3"
+        assert len(reader.get(where={"doc_id": 1})["ids"]) == 10
+
+
+def test_delete_by_document_drops_only_that_document(tmp_path):
+    store = make_store(tmp_path)
+    add(store, 1, vectors(5))
+    add(store, 2, vectors(5, seed=1))
+    search(store, 1, vectors(1)[0])  # loaded before the delete
+
+    store.delete(where={"doc_id": 1})
+
+    assert store.get(where={"doc_id": 1})["ids"] == []
+    assert search(store, 1, vectors(1)[0])["ids"] == [[]]
+    assert not (tmp_path / "1").exists()
+    assert len(make_store(tmp_path).get(where={"doc_id": 2})["ids"]) == 5
+
+
+def test_deleted_document_can_be_ingested_again(tmp_path):
+    store = make_store(tmp_path)
+    add(store, 1, vectors(5), text="old")
+    store.delete(where={"doc_id": 1})
+    add(store, 1, vectors(3, seed=1), text="new")
+
+    assert store.get(where={"doc_id": 1})["documents"] == ["new 0", "new 1", "new 2"]
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [{"ids": ["1_chunk_0"]}, {"where": {"title": "x"}}, {}],
+)
+def test_unsupported_deletes_are_rejected(tmp_path, kwargs):
+    with pytest.raises(ValueError):
+        make_store(tmp_path).delete(**kwargs)
+
+
+def test_documents_keep_the_encoding_they_were_created_with(tmp_path):
+    data = vectors(20)
+    add(make_store(tmp_path, encoding="int8"), 1, data[:10])
+    add(make_store(tmp_path), 1, data[10:], start=10)
+
+    meta = json.loads((tmp_path / "1" / "meta.json").read_text())
+    assert meta["encoding"] == "int8"
+    assert not (tmp_path / "1" / "vectors.f32").exists()
+    assert search(make_store(tmp_path), 1, data[15])["ids"][0][0] == "1_chunk_15"
+
+
+def test_build_graph_has_nearest_and_reverse_edges():
+    data = vectors(100)
+    graph = build_graph(data, degree=4)
+
+    assert graph.shape == (100, 8)
+    distances = ((data[:, None] - data[None]) ** 2).sum(axis=2)
+    np.fill_diagonal(distances, np.inf)
+    nearest = np.argsort(distances, axis=1)[:, :4]
+    np.testing.assert_array_equal(graph[:, :4], nearest)
+    for row, edges in enumerate(graph):
+        for target in edges[4:]:
+            if target >= 0:
+                assert row in graph[target, :4]
+
+
+def test_graph_search_recall_and_graph_reuse(tmp_path):
+    data = vectors(600)
+    store = make_store(tmp_path, graph_threshold=100)
+    add(store, 1, data)
+    store.prepare(where={"doc_id": 1})
+    assert (tmp_path / "1" / GRAPH_FILE).exists()
+
+    queries = vectors(20, seed=3)
+    hits = 0
+    for query in queries:
+        truth = set(np.argsort(((data - query) ** 2).sum(axis=1))[:5].tolist())
+        found = search(make_store(tmp_path, graph_threshold=100), 1, query, k=5)
+        hits += len(truth & {int(i.rsplit("_", 1)[1]) for i in found["ids"][0]})
+
+    assert hits / (len(queries) * 5) >= 0.9
+
+
+def test_new_rows_invalidate_the_saved_graph(tmp_path):
+    data = vectors(150)
+    store = make_store(tmp_path, graph_threshold=100)
+    add(store, 1, data[:120])
+    store.prepare(where={"doc_id": 1})
+
+    add(store, 1, data[120:], start=120)
+
+    assert not (tmp_path / "1" / GRAPH_FILE).exists()
+    assert search(store, 1, data[130])["ids"][0][0] == "1_chunk_130"
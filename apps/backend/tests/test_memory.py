@@ -0,0 +1,151 @@
+import pytest
+from sqlalchemy import delete, select, update
+
+from app.core.rag import memory
+from app.core.rag.memory import summarize_session
+from app.database.main import Base, SessionLocal, engine
+from app.database.models import Document, Session, User
+from app.database.models.chats import Chat, Role
+from app.database.models.documents import ContentType, DocumentStatus
+
+TOKEN = "token"
+
+
+@pytest.fixture(autouse=True)
+def tables():
+    # summarisation runs in a worker thread against the sync database
+    Base.metadata.create_all(engine)
+    yield
+    with SessionLocal() as db:
+        for table in reversed(Base.metadata.sorted_tables):
+            db.execute(delete(table))
+        db.commit()
+
+
+@pytest.fixture
+def chat_ids():
+    with SessionLocal() as db:
+        user = User(email="reader@example.com")
+        doc = Document(
+            url="https://cdn.example.com/doc.pdf",
+            key="doc.pdf",
+            title="doc.pdf",
+            user=user,
+            content_type=ContentType.PDF,
+            status=DocumentStatus.READY,
+        )
+        chats = [
+            Chat(
+                session_id=TOKEN,
+                message=f"message {i}",
+                role=Role.USER if i % 2 == 0 else Role.ASSISTANT,
+            )
+            for i in range(6)
+        ]
+        db.add_all([Session(session_token=TOKEN, document=doc, user=user), *chats])
+        db.commit()
+        return [chat.id for chat in chats]
+
+
+class FakeLlm:
+    def __init__(self, reply: str = "summary", before_reply=None) -> None:
+        self.reply = reply
+        self.before_reply = before_reply
+        self.prompts: list[str] = []
+
+    def invoke(self, messages):
+        self.prompts.append(messages[-1].content)
+        if self.before_reply is not None:
+            hook, self.before_reply = self.before_reply, None
+            hook()
+        return self.reply
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    fake = FakeLlm()
+    monkeypatch.setattr(memory, "llm_client", fake)
+    return fake
+
+
+def stored() -> tuple[str | None, int | None]:
+    with SessionLocal() as db:
+        session = db.scalar(select(Session).where(Session.session_token == TOKEN))
+        return session.memory_summary, session.summarized_until
+
+
+def summarize() -> bool:
+    return summarize_session(TOKEN, recent_messages=2, every_messages=4, words=50)
+
+
+def test_older_turns_are_folded_into_the_summary(llm, chat_ids):
+    assert summarize()
+
+    assert stored() == ("summary", chat_ids[3])
+    # the two most recent turns stay out of the summary
+    assert "message 3" in llm.prompts[0]
+    assert "message 4" not in llm.prompts[0]
+
+
+def test_too_few_turns_skip_the_llm(llm, chat_ids):
+    assert not summarize_session(TOKEN, recent_messages=2, every_messages=5, words=50)
+
+    assert llm.prompts == []
+    assert stored() == (None, None)
+
+
+def test_next_summary_builds_on_the_previous_one(llm, chat_ids):
+    with SessionLocal() as db:
+        db.execute(
+            update(Session)
+            .where(Session.session_token == TOKEN)
+            .values(memory_summary="earlier", summarized_until=chat_ids[1])
+        )
+        db.commit()
+
+    assert not summarize()  # only two new turns outside the window
+    assert summarize_session(TOKEN, recent_messages=0, every_messages=4, words=50)
+
+    assert stored() == ("summary", chat_ids[5])
+    assert "EXISTING SUMMARY:\nearlier" in llm.prompts[-1]
+    assert "message 1" not in llm.prompts[-1]
+
+
+def test_losing_a_race_keeps_the_newer_summary(monkeypatch, chat_ids):
+    # another worker finishes its summary while this one waits on the LLM
+    def concurrent_run():
+        monkeypatch.setattr(memory, "llm_client", FakeLlm("newer summary"))
+        assert summarize()
+        monkeypatch.setattr(memory, "llm_client", slow)
+
+    slow = FakeLlm("stale summary", before_reply=concurrent_run)
+    monkeypatch.setattr(memory, "llm_client", slow)
+
+    assert not summarize()
+    assert stored() == ("newer summary", chat_ids[3])
+
+
+def test_losing_a_race_to_a_later_window_keeps_it(monkeypatch, chat_ids):
+    # the winner summarised further ahead than the run it raced with
+    def concurrent_update():
+        with SessionLocal() as db:
+            db.execute(
+                update(Session)
+                .where(Session.session_token == TOKEN)
+                .values(memory_summary="newer summary", summarized_until=chat_ids[5])
+            )
+            db.commit()
+
+    monkeypatch.setattr(
+        memory, "llm_client", FakeLlm("stale summary", before_reply=concurrent_update)
+    )
+
+    assert not summarize()
+    assert stored() == ("newer summary", chat_ids[5])
+
+
+def test_empty_reply_leaves_the_session_alone(llm, chat_ids):
+    llm.reply = "   "
+
+    assert not summarize()
+    assert stored() == (None, None)
@@ -0,0 +1,14 @@
+from fastapi.testclient import TestClient
+
+from app.main import app
+
+
+def test_metrics_require_authentication():
+    # outside a `with` block the lifespan (model warmup, workers) never runs
+    client = TestClient(app)
+
+    assert client.get("/api/metrics/").status_code == 401
+    response = client.get(
+        "/api/metrics/", headers={"Authorization": "Bearer not-a-token"}
+    )
+    assert response.status_code == 401
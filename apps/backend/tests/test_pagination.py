@@ -0,0 +1,180 @@
+import base64
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+from fastapi import Request
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.core.utils.cursor import decode_cursor, encode_cursor
+from app.core.utils.exceptions.session import InvalidCursor
+from app.database.main import get_db
+from app.database.models import Document, Session, User
+from app.database.models.chats import Chat, Role
+from app.database.models.documents import ContentType, DocumentStatus
+from app.main import app
+from app.middlewares.auth_middleware import auth_middleware
+from app.services.session import SessionService
+
+pytestmark = pytest.mark.anyio
+
+SAME_INSTANT = datetime(2026, 1, 1, 12, 0)
+LATER = SAME_INSTANT + timedelta(minutes=1)
+
+MALFORMED = [
+    "not-a-cursor",
+    "%%%",
+    base64.urlsafe_b64encode(b"[1]").decode(),
+    base64.urlsafe_b64encode(b'["yesterday", 1]').decode(),
+    base64.urlsafe_b64encode(b'["2026-01-01T12:00:00", "x"]').decode(),
+    "é",
+]
+
+
+@pytest.fixture
+async def db(engine):
+    # five chats and five sessions share a created_at, one of each is newer
+    async with async_sessionmaker(engine, expire_on_commit=False)() as db:
+        user = User(email="reader@example.com")
+        doc = Document(
+            url="https://cdn.example.com/doc.pdf",
+            key="doc.pdf",
+            title="doc.pdf",
+            user=user,
+            content_type=ContentType.PDF,
+            status=DocumentStatus.READY,
+        )
+        db.add_all([user, doc])
+        db.add_all(
+            Session(
+                session_token=f"token-{i}",
+                document=doc,
+                user=user,
+                created_at=LATER if i == 5 else SAME_INSTANT,
+            )
+            for i in range(6)
+        )
+        db.add_all(
+            Chat(
+                session_id="token-0",
+                message=f"message {i}",
+                role=Role.USER,
+                created_at=LATER if i == 5 else SAME_INSTANT,
+            )
+            for i in range(6)
+        )
+        await db.commit()
+        yield db
+
+
+async def all_session_pages(db, limit: int) -> tuple[list[list[str]], list]:
+    pages, cursors, cursor = [], [], None
+    while True:
+        sessions, cursor = await SessionService.get_sessions(
+            user_id=1, db=db, limit=limit, cursor=cursor
+        )
+        pages.append([s.session_token for s in sessions])
+        cursors.append(cursor)
+        if cursor is None:
+            return pages, cursors
+
+
+async def all_chat_pages(db, limit: int) -> list[list[str]]:
+    pages, cursor = [], None
+    while True:
+        _, chats, cursor = await SessionService.get_session(
+            user_id=1, session_id="token-0", db=db, limit=limit, cursor=cursor
+        )
+        pages.append([chat.message for chat in chats])
+        if cursor is None:
+            return pages
+
+
+def test_cursor_round_trips():
+    assert decode_cursor(encode_cursor(SAME_INSTANT, 42)) == (SAME_INSTANT, 42)
+
+
+@pytest.mark.parametrize("cursor", MALFORMED)
+def test_malformed_cursor_is_a_domain_error(cursor):
+    with pytest.raises(InvalidCursor) as error:
+        decode_cursor(cursor)
+
+    assert error.value.status_code == 400
+
+
+async def test_session_pages_split_ties_on_created_at_by_id(db):
+    pages, _ = await all_session_pages(db, limit=2)
+
+    # newest first; rows created in the same instant by descending id
+    assert pages == [
+        ["token-5", "token-4"],
+        ["token-3", "token-2"],
+        ["token-1", "token-0"],
+    ]
+
+
+async def test_chat_pages_split_ties_on_created_at_by_id(db):
+    pages = await all_chat_pages(db, limit=4)
+
+    assert pages == [
+        ["message 5", "message 4", "message 3", "message 2"],
+        ["message 1", "message 0"],
+    ]
+
+
+async def test_last_page_has_no_cursor(db):
+    # an exact multiple of the page size ends without an empty extra page
+    pages, cursors = await all_session_pages(db, limit=3)
+
+    assert [len(page) for page in pages] == [3, 3]
+    assert cursors[-1] is None
+
+    sessions, cursor = await SessionService.get_sessions(user_id=1, db=db, limit=10)
+    assert len(sessions) == 6 and cursor is None
+
+
+@pytest.fixture
+async def client(engine, db):
+    async def override_auth(req: Request):
+        req.state.user = {"id": 1, "email": "reader@example.com", "username": None}
+
+    async def override_db():
+        async with async_sessionmaker(engine, expire_on_commit=False)() as session:
+            yield session
+
+    app.dependency_overrides[auth_middleware] = override_auth
+    app.dependency_overrides[get_db] = override_db
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://test"
+        ) as client:
+            yield client
+    finally:
+        app.dependency_overrides.clear()
+
+
+@pytest.mark.parametrize("path", ["/api/session/", "/api/session/token-0"])
+@pytest.mark.parametrize("cursor", MALFORMED)
+async def test_malformed_cursor_is_rejected_with_400(client, path, cursor):
+    response = await client.get(path, params={"cursor": cursor})
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid pagination cursor"
+
+
+async def test_next_cursor_is_followed_over_http(client):
+    first = (await client.get("/api/session/", params={"limit": 4})).json()["data"]
+    cursor = first["next_cursor"]
+    second = (
+        await client.get("/api/session/", params={"limit": 4, "cursor": cursor})
+    ).json()["data"]
+
+    assert [s["session_token"] for s in first["sessions"]] == [
+        "token-5",
+        "token-4",
+        "token-3",
+        "token-2",
+    ]
+    assert [s["session_token"] for s in second["sessions"]] == ["token-1", "token-0"]
+    assert second["next_cursor"] is None
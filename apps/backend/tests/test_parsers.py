@@ -0,0 +1,193 @@
+import io
+import zipfile
+
+import pytest
+from langchain_core.documents import Document
+from pypdf import PdfReader
+
+from app.config import Config
+from app.core.utils.rag import parsers
+from app.core.utils.rag.parsers import parse
+
+W = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+
+
+def make_pdf(pages: list[str | None]) -> bytes:
+    """A minimal PDF; None pages have no text layer, like scans."""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # page tree, filled in once the page ids are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    kids = []
+    for text in pages:
+        content = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET" if text else ""
+        objects.append(
+            b"<< /Length %d >>\nstream\n%s\nendstream"
+            % (len(content), content.encode())
+        )
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % len(objects)
+        )
+        kids.append(b"%d 0 R" % len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(kids),
+        len(kids),
+    )
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n%s\nendobj\n" % (number, body))
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for offset in offsets:
+        out.write(b"%010d 00000 n \n" % offset)
+    out.write(
+        b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+        % (len(objects) + 1, xref)
+    )
+    return out.getvalue()
+
+
+def paragraph(text: str, style: str | None = None) -> str:
+    props = f'<w:pPr><w:pStyle w:val="{style}"/></w:pPr>' if style else ""
+    return f"<w:p>{props}<w:r><w:t>{text}</w:t></w:r></w:p>"
+
+
+PAGE_BREAK = '<w:p><w:r><w:br w:type="page"/></w:r></w:p>'
+
+
+def make_docx(body: str, header: str = "") -> bytes:
+    out = io.BytesIO()
+    with zipfile.ZipFile(out, "w") as archive:
+        archive.writestr(
+            "word/document.xml",
+            f'<w:document xmlns:w="{W}"><w:body>{body}</w:body></w:document>',
+        )
+        archive.writestr(
+            "word/header1.xml", f'<w:hdr xmlns:w="{W}">{paragraph(header)}</w:hdr>'
+        )
+    return out.getvalue()
+
+
+def pages(data: bytes, key: str) -> list[tuple[int, str]]:
+    return [
+        (doc.metadata["page"], doc.page_content.strip())
+        for doc in parse(io.BytesIO(data), key)
+    ]
+
+
+@pytest.fixture
+def ocr(monkeypatch):
+    """Stands in for unstructured; records what it was asked to read."""
+    calls = []
+
+    def parse_unstructured(file, key):
+        file.seek(0)
+        count = len(PdfReader(file).pages)
+        calls.append(count)
+        yield Document(page_content=f"ocr text ({count} pages)", metadata={"page": 1})
+
+    monkeypatch.setattr(parsers, "parse_unstructured", parse_unstructured)
+    return calls
+
+
+def test_pdf_text_layer_is_read_page_by_page(ocr):
+    data = make_pdf(["First page", "Second page"])
+
+    assert pages(data, "uploads/a.pdf") == [(1, "First page"), (2, "Second page")]
+    assert ocr == []
+
+
+def test_scanned_pages_of_a_mixed_pdf_are_ocrd_on_their_own(ocr, monkeypatch):
+    monkeypatch.setattr(Config["Env"], "pdf_ocr_min_share", 0.1)
+    data = make_pdf(["Intro", None, "Body", None])
+
+    assert pages(data, "uploads/a.pdf") == [
+        (1, "Intro"),
+        (3, "Body"),
+        (2, "ocr text (1 pages)"),
+        (4, "ocr text (1 pages)"),
+    ]
+    assert ocr == [1, 1]
+
+
+def test_few_blank_pages_below_the_share_are_not_ocrd(ocr, monkeypatch):
+    monkeypatch.setattr(Config["Env"], "pdf_ocr_min_share", 0.6)
+    data = make_pdf(["Intro", None, "Body", None])
+
+    assert pages(data, "uploads/a.pdf") == [(1, "Intro"), (3, "Body")]
+    assert ocr == []
+
+
+def test_fully_scanned_pdf_goes_through_unstructured_whole(ocr):
+    data = make_pdf([None, None, None])
+
+    assert pages(data, "uploads/a.pdf") == [(1, "ocr text (3 pages)")]
+    assert ocr == [3]
+
+
+def test_docx_keeps_headings_tables_and_page_breaks():
+    table = (
+        "<w:tbl>"
+        + "".join(
+            "<w:tr>"
+            + "".join(f"<w:tc>{paragraph(cell)}</w:tc>" for cell in row)
+            + "</w:tr>"
+            for row in [("Quarter", "Revenue"), ("Q1", "120")]
+        )
+        + "</w:tbl>"
+    )
+    body = (
+        paragraph("Annual report", style="Heading1")
+        + paragraph("Summary of the year.")
+        + table
+        + PAGE_BREAK
+        + paragraph("Outlook", style="Heading2")
+        + paragraph("Growth continues.")
+    )
+    data = make_docx(body, header="Confidential")
+
+    assert pages(data, "uploads/a.docx") == [
+        (1, "Annual report\nSummary of the year.\nQuarter\nRevenue\nQ1\n120"),
+        (2, "Outlook\nGrowth continues."),
+    ]
+
+
+def test_docx_page_headers_are_not_repeated_into_pages():
+    data = make_docx(paragraph("Body text"), header="Confidential")
+
+    assert pages(data, "uploads/a.docx") == [(1, "Body text")]
+
+
+def test_docx_tabs_and_line_breaks_are_kept():
+    body = "<w:p><w:r><w:t>a</w:t><w:tab/><w:t>b</w:t><w:br/><w:t>c</w:t></w:r></w:p>"
+    data = make_docx(body)
+
+    assert pages(data, "uploads/a.docx") == [(1, "a\tb\nc")]
+
+
+def test_text_is_cut_on_line_boundaries(monkeypatch):
+    monkeypatch.setattr(parsers, "TEXT_BLOCK_SIZE", 16)
+    lines = [f"line {i} é\n" for i in range(6)]
+    data = "".join(lines).encode()
+
+    parsed = [doc.page_content for doc in parse(io.BytesIO(data), "notes.txt")]
+
+    assert "".join(parsed) == "".join(lines)
+    assert all(block.endswith("\n") for block in parsed)
+    assert len(parsed) > 1
+
+
+def test_text_drops_the_bom_and_survives_split_characters(monkeypatch):
+    # 7 bytes per read splits the two-byte "é" across reads
+    monkeypatch.setattr(parsers, "TEXT_BLOCK_SIZE", 7)
+    data = "﻿café au lait\nsecond line".encode("utf-8")
+
+    parsed = "".join(doc.page_content for doc in parse(io.BytesIO(data), "a.md"))
+
+    assert parsed == "café au lait\nsecond line"
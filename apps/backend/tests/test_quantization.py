@@ -0,0 +1,145 @@
+import numpy as np
+import pytest
+
+from app.core.vectorstore import LocalVectorStore
+from app.core.vectorstore.quantization import (
+    BinaryCodec,
+    Float32Codec,
+    Int8Codec,
+    codecs_for,
+)
+
+DIM = 64
+
+
+def unit(vectors: np.ndarray) -> np.ndarray:
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+@pytest.fixture
+def corpus():
+    # clustered unit vectors, closer to real embeddings than uniform noise
+    rng = np.random.default_rng(0)
+    centers = rng.normal(size=(20, DIM))
+    vectors = unit(
+        centers[rng.integers(0, 20, 2000)] + 0.5 * rng.normal(size=(2000, DIM))
+    )
+    queries = unit(vectors[rng.choice(2000, 50)] + 0.1 * rng.normal(size=(50, DIM)))
+    return vectors, queries
+
+
+def test_float32_round_trip_is_exact(corpus):
+    vectors, _ = corpus
+    codec = Float32Codec(DIM)
+
+    codes, scales = codec.encode(vectors.astype(np.float64))
+
+    assert codes.dtype == np.float32 and scales is None
+    np.testing.assert_array_equal(codec.decode(codes, scales), vectors)
+
+
+def test_int8_round_trip_error_is_half_a_step(corpus):
+    vectors, _ = corpus
+    codec = Int8Codec(DIM)
+
+    codes, scales = codec.encode(vectors)
+    decoded = codec.decode(codes, scales)
+
+    assert codes.dtype == np.int8 and scales.dtype == np.float32
+    # the largest component of every vector lands on ±127
+    assert (np.abs(codes).max(axis=1) == 127).all()
+    step = np.abs(vectors).max(axis=1) / 127
+    assert (np.abs(decoded - vectors) <= step[:, None] / 2 + 1e-6).all()
+
+
+def test_int8_scores_stay_within_one_percent(corpus):
+    vectors, queries = corpus
+    codec = Int8Codec(DIM)
+    codes, scales = codec.encode(vectors)
+
+    for query in queries:
+        exact = vectors @ query
+        approx = codec.scores(codes, scales, query)
+        # unit vectors: a 1% error on the dot product is 0.01 absolute
+        assert np.abs(approx - exact).max() < 0.01
+
+
+def test_int8_encodes_a_zero_vector():
+    codec = Int8Codec(4)
+    vectors = np.array([[0, 0, 0, 0], [0.5, -1, 0, 0.25]], dtype=np.float32)
+
+    codes, scales = codec.encode(vectors)
+
+    assert codes[0].tolist() == [0, 0, 0, 0] and scales[0] == 1.0
+    np.testing.assert_allclose(codec.decode(codes, scales), vectors, atol=0.004)
+
+
+def test_binary_codes_pack_sign_bits():
+    codec = BinaryCodec(10)
+    vectors = np.array([[1, -1, 1, -1, 1, -1, 1, -1, 1, 1]], dtype=np.float32)
+
+    codes, scales = codec.encode(vectors)
+
+    assert codec.width == 2 and codes.shape == (1, 2) and scales is None
+    assert codes[0].tolist() == [0b10101010, 0b11000000]
+
+
+def test_hamming_counts_differing_signs(corpus):
+    vectors, queries = corpus
+    codec = BinaryCodec(DIM)
+    codes, _ = codec.encode(vectors)
+
+    for query in queries[:5]:
+        expected = ((vectors > 0) != (query > 0)).sum(axis=1)
+        np.testing.assert_array_equal(codec.hamming(codes, query), expected)
+
+
+def test_unknown_encoding_is_rejected():
+    with pytest.raises(ValueError, match="Unknown vector encoding"):
+        codecs_for("float16", DIM)
+
+
+def recall(encoding: str, rescore: int, corpus, tmp_path, k: int = 10) -> float:
+    vectors, queries = corpus
+    store = LocalVectorStore(
+        directory=str(tmp_path / f"{encoding}-{rescore}"),
+        max_loaded=4,
+        graph_threshold=len(vectors) + 1,
+        graph_degree=16,
+        search_ef=64,
+        encoding=encoding,
+        rescore_factor=rescore,
+    )
+    store.upsert(
+        ids=[f"1_chunk_{i}" for i in range(len(vectors))],
+        embeddings=vectors,
+        metadatas=[{"doc_id": 1}] * len(vectors),
+    )
+
+    hits = 0
+    for query in queries:
+        # float32 brute force is the ground truth
+        truth = np.argsort(((vectors - query) ** 2).sum(axis=1))[:k]
+        result = store.query(
+            query_embeddings=[query], n_results=k, where={"doc_id": "1"}
+        )
+        found = {int(i.rsplit("_chunk_", 1)[1]) for i in result["ids"][0]}
+        hits += len(found & set(truth.tolist()))
+    return hits / (len(queries) * k)
+
+
+@pytest.mark.parametrize(
+    "encoding, rescore, minimum",
+    [("float32", 1, 1.0), ("int8", 1, 0.97), ("binary", 10, 0.9)],
+)
+def test_recall_against_float32_brute_force(
+    encoding, rescore, minimum, corpus, tmp_path
+):
+    assert recall(encoding, rescore, corpus, tmp_path) >= minimum
+
+
+def test_binary_recall_grows_with_the_rescore_factor(corpus, tmp_path):
+    recalls = [recall("binary", r, corpus, tmp_path) for r in (1, 4, 10)]
+
+    assert recalls == sorted(recalls)
+    assert recalls[0] < recalls[-1]
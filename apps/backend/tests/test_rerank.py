@@ -0,0 +1,109 @@
+import time
+
+import pytest
+
+from app.core.rag.rerank import Reranker
+from app.schemas.rag import RetrievedChunk
+
+
+class LengthModel:
+    """Cross-encoder double: longer chunks score higher, after `delay`."""
+
+    def __init__(self, delay: float = 0.0) -> None:
+        self.delay = delay
+        self.pairs = 0
+
+    def predict(self, pairs, batch_size):
+        time.sleep(self.delay)
+        self.pairs += len(pairs)
+        return [float(len(text)) for _, text in pairs]
+
+
+def reranker(model: LengthModel, budget_ms: float = 1000, batch_size: int = 2):
+    ranker = Reranker(
+        model_name="fake",
+        device="cpu",
+        batch_size=batch_size,
+        budget_ms=budget_ms,
+        cache_size=100,
+        enabled=True,
+    )
+    ranker._model = model
+    return ranker
+
+
+@pytest.fixture
+def chunks():
+    return [
+        RetrievedChunk(id=f"1_chunk_{i}", text=text)
+        for i, text in enumerate(["a", "ccc", "bb", "dddd"])
+    ]
+
+
+def test_chunks_are_reordered_by_score(chunks):
+    ranker = reranker(LengthModel())
+    try:
+        ranked = ranker.rerank("query", chunks, top_k=3)
+    finally:
+        ranker.shutdown()
+
+    assert [chunk.text for chunk in ranked] == ["dddd", "ccc", "bb"]
+    assert [chunk.score for chunk in ranked] == [4.0, 3.0, 2.0]
+    assert ranker.stats()["scored_pairs"] == 4
+
+
+def test_scores_are_cached_per_query_and_chunk(chunks):
+    model = LengthModel()
+    ranker = reranker(model)
+    try:
+        ranker.rerank("What is it?", chunks, top_k=2)
+        ranked = ranker.rerank("what is it", chunks, top_k=2)
+    finally:
+        ranker.shutdown()
+
+    assert [chunk.text for chunk in ranked] == ["dddd", "ccc"]
+    assert model.pairs == 4
+    assert ranker.stats()["cache_hits"] == 4
+
+
+def test_slow_model_returns_retrieval_order_at_the_budget(chunks):
+    # a single batch outlasts the whole budget
+    model = LengthModel(delay=0.5)
+    ranker = reranker(model, budget_ms=50, batch_size=4)
+
+    start = time.monotonic()
+    ranked = ranker.rerank("query", chunks, top_k=3)
+    elapsed = time.monotonic() - start
+
+    assert elapsed < 0.3
+    assert ranked == chunks[:3]
+    assert ranker.stats()["over_budget"] == 1
+
+    # the abandoned batch still finishes into the score cache
+    ranker.shutdown()
+    assert ranker.stats()["cached_scores"] == 4
+
+
+def test_abandoned_job_stops_after_its_current_batch(chunks):
+    model = LengthModel(delay=0.2)
+    ranker = reranker(model, budget_ms=50, batch_size=1)
+
+    ranker.rerank("query", chunks, top_k=3)
+    ranker.shutdown()
+
+    assert model.pairs == 1
+
+
+def test_model_errors_keep_retrieval_order(chunks):
+    class Broken:
+        def predict(self, pairs, batch_size):
+            raise RuntimeError("model crashed")
+
+    ranker = reranker(Broken())
+    try:
+        ranked = ranker.rerank("query", chunks, top_k=2)
+    finally:
+        ranker.shutdown()
+
+    assert ranked == chunks[:2]
+    assert ranker.stats()["errors"] == 1
@@ -0,0 +1,150 @@
+import numpy as np
+import pytest
+
+from app.core.rag import cache
+from app.core.rag.cache import ByteLRU, RetrievalCache, VectorHits
+from app.schemas.rag import RetrievedChunk
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache.time, "monotonic", clock)
+    return clock
+
+
+def retrieval(**overrides) -> RetrievalCache:
+    settings = {
+        "enabled": True,
+        "results_bytes": 1 << 20,
+        "chunks_bytes": 1 << 20,
+        "ttl_seconds": 60,
+        "step": 0.05,
+        **overrides,
+    }
+    return RetrievalCache(**settings)
+
+
+def chunk(doc_id: int, n: int, text: str) -> RetrievedChunk:
+    return RetrievedChunk(id=f"{doc_id}_chunk_{n}", text=text, distance=0.3)
+
+
+def test_byte_lru_evicts_by_size_not_count():
+    lru = ByteLRU(max_bytes=100, ttl_seconds=60)
+    for key in "abcd":
+        lru.put(1, key, key, size=20)
+    lru.get("a")
+
+    # one 60-byte entry pushes out the two least recently used small ones
+    lru.put(1, "big", "big", size=60)
+
+    assert [key for key in "abcd" if lru.get(key) is not None] == ["a", "d"]
+    assert lru.get("big") == "big"
+    assert lru.stats()["bytes"] == 100
+    assert lru.evictions == 2
+
+
+def test_byte_lru_skips_entries_larger_than_the_budget():
+    lru = ByteLRU(max_bytes=100, ttl_seconds=60)
+    lru.put(1, "small", "small", size=10)
+    lru.put(1, "huge", "huge", size=101)
+
+    assert lru.get("huge") is None
+    assert lru.get("small") == "small"
+
+
+def test_byte_lru_replacing_a_key_keeps_the_byte_count(clock):
+    lru = ByteLRU(max_bytes=100, ttl_seconds=60)
+    lru.put(1, "a", "old", size=30)
+    lru.put(1, "a", "new", size=50)
+
+    assert lru.get("a") == "new"
+    assert lru.stats()["bytes"] == 50
+
+
+def test_byte_lru_entries_expire(clock):
+    lru = ByteLRU(max_bytes=100, ttl_seconds=60)
+    lru.put(1, "a", "value", size=10)
+
+    clock.now += 59
+    assert lru.get("a") == "value"
+    clock.now += 2
+    assert lru.get("a") is None
+    assert lru.stats()["bytes"] == 0
+
+
+def test_byte_lru_invalidates_one_document():
+    lru = ByteLRU(max_bytes=100, ttl_seconds=60)
+    lru.put(1, "a", "one", size=10)
+    lru.put(1, "b", "one", size=10)
+    lru.put(2, "c", "two", size=10)
+
+    lru.invalidate(1)
+
+    assert lru.get("a") is None and lru.get("b") is None
+    assert lru.get("c") == "two"
+    assert lru.stats()["bytes"] == 10
+
+
+def test_near_identical_queries_share_a_key():
+    cached = retrieval(step=0.05)
+    base = retrieval().key(1, [1.0, 0.5, 0.25], 8, False)
+
+    assert cached.key(1, [1.0, 0.5, 0.2501], 8, False) == base
+    assert cached.key(1, [0.25, 0.5, 1.0], 8, False) != base
+    assert cached.key(1, [1.0, 0.5, 0.25], 16, False) != base
+    assert cached.key(2, [1.0, 0.5, 0.25], 8, False) != base
+
+
+def test_hits_are_scoped_to_the_index_version():
+    cached = retrieval()
+    vector = [1.0, 0.0, 0.0]
+    hits = VectorHits(ids=["1_chunk_0"], distances=[0.1], embeddings=np.ones((1, 3)))
+    cached.put_hits(cached.key(1, vector, 8, True, version=1), hits)
+
+    assert cached.get_hits(cached.key(1, vector, 8, True, version=1)) == hits
+    assert cached.get_hits(cached.key(1, vector, 8, True, version=2)) is None
+
+
+def test_chunks_are_scoped_to_the_index_version():
+    cached = retrieval()
+    cached.put_chunks(1, [chunk(1, 0, "old text")], version=1)
+    cached.put_chunks(1, [chunk(1, 0, "new text")], version=2)
+
+    assert cached.get_chunks(["1_chunk_0"], version=1)["1_chunk_0"].text == "old text"
+    fresh = cached.get_chunks(["1_chunk_0", "1_chunk_1"], version=2)
+    assert list(fresh) == ["1_chunk_0"]
+    assert fresh["1_chunk_0"].text == "new text"
+    # cached chunks are stored without query-specific scores
+    assert fresh["1_chunk_0"].distance is None
+
+
+def test_invalidate_drops_hits_and_chunks_of_one_document():
+    cached = retrieval()
+    key = cached.key(1, [1.0, 0.0], 8, False)
+    cached.put_hits(key, VectorHits(ids=["1_chunk_0"], distances=[0.1]))
+    cached.put_chunks(1, [chunk(1, 0, "one")])
+    cached.put_chunks(2, [chunk(2, 0, "two")])
+
+    cached.invalidate(1)
+
+    assert cached.get_hits(key) is None
+    assert cached.get_chunks(["1_chunk_0", "2_chunk_0"]).keys() == {"2_chunk_0"}
+
+
+def test_disabled_cache_stores_nothing():
+    cached = retrieval(enabled=False)
+    key = cached.key(1, [1.0, 0.0], 8, False)
+    cached.put_hits(key, VectorHits(ids=["1_chunk_0"], distances=[0.1]))
+    cached.put_chunks(1, [chunk(1, 0, "one")])
+
+    assert cached.get_hits(key) is None
+    assert cached.get_chunks(["1_chunk_0"]) == {}
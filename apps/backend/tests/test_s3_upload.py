@@ -0,0 +1,121 @@
+import hashlib
+import io
+import threading
+import time
+
+import boto3
+import pytest
+from moto import mock_aws
+
+from app.core.s3.aws import MIN_PART_SIZE, S3Client
+
+BUCKET = "uploads"
+PDF = "application/pdf"
+
+
+class TrackingClient(S3Client):
+    """Records how many parts are uploading at once, optionally failing one."""
+
+    def __init__(self, *args, fail_part: int | None = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fail_part = fail_part
+        self.active = 0
+        self.peak = 0
+        self._count = threading.Lock()
+
+    def _upload_part(self, object_key, upload_id, part_number, body):
+        with self._count:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            # keep parts in flight long enough to overlap
+            time.sleep(0.05)
+            if part_number == self.fail_part:
+                raise ConnectionError("connection reset")
+            return super()._upload_part(object_key, upload_id, part_number, body)
+        finally:
+            with self._count:
+                self.active -= 1
+
+
+@pytest.fixture
+def client():
+    with mock_aws():
+        client = boto3.client(
+            "s3",
+            region_name="us-east-1",
+            aws_access_key_id="testing",
+            aws_secret_access_key="testing",
+        )
+        client.create_bucket(Bucket=BUCKET)
+        yield client
+
+
+def uploader(client, concurrency: int = 2, **kwargs) -> TrackingClient:
+    return TrackingClient(
+        BUCKET,
+        part_size=MIN_PART_SIZE,
+        concurrency=concurrency,
+        client=client,
+        **kwargs,
+    )
+
+
+def payload(size: int) -> bytes:
+    return bytes(i % 251 for i in range(size))
+
+
+def test_small_file_is_a_single_put(client):
+    s3 = uploader(client)
+    data = payload(1024)
+
+    result = s3.upload_fileobj(io.BytesIO(data), PDF)
+
+    assert s3.peak == 0
+    assert result.size == len(data)
+    assert result.sha256 == hashlib.sha256(data).hexdigest()
+    body = client.get_object(Bucket=BUCKET, Key=result.object_key)["Body"].read()
+    assert body == data
+
+
+def test_large_file_is_split_into_parts(client):
+    s3 = uploader(client)
+    data = payload(2 * MIN_PART_SIZE + 1024)
+
+    try:
+        result = s3.upload_fileobj(io.BytesIO(data), PDF)
+    finally:
+        s3.shutdown()
+
+    assert result.size == len(data)
+    assert result.sha256 == hashlib.sha256(data).hexdigest()
+    head = client.head_object(Bucket=BUCKET, Key=result.object_key)
+    assert head["ETag"].strip('"').endswith("-3")
+    body = client.get_object(Bucket=BUCKET, Key=result.object_key)["Body"].read()
+    assert body == data
+
+
+def test_parts_in_flight_are_bounded_by_concurrency(client):
+    s3 = uploader(client, concurrency=2)
+    data = payload(6 * MIN_PART_SIZE)
+
+    try:
+        s3.upload_fileobj(io.BytesIO(data), PDF)
+    finally:
+        s3.shutdown()
+
+    assert s3.peak == 2
+
+
+def test_failed_part_aborts_the_upload(client):
+    s3 = uploader(client, fail_part=2)
+    data = payload(3 * MIN_PART_SIZE)
+
+    try:
+        with pytest.raises(ConnectionError):
+            s3.upload_fileobj(io.BytesIO(data), PDF)
+    finally:
+        s3.shutdown()
+
+    assert "Uploads" not in client.list_multipart_uploads(Bucket=BUCKET)
+    assert "Contents" not in client.list_objects_v2(Bucket=BUCKET)
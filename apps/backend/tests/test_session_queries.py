@@ -0,0 +1,122 @@
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.database.models import Document, Session, User
+from app.database.models.chats import Chat, Role
+from app.database.models.documents import ContentType, DocumentStatus
+from app.services.session import SessionService
+
+pytestmark = pytest.mark.anyio
+
+CHATS = 5
+START = datetime(2026, 1, 1)
+
+
+@pytest.fixture
+async def db(engine):
+    async with async_sessionmaker(engine, expire_on_commit=False)() as db:
+        user = User(email="reader@example.com")
+        doc = Document(
+            url="https://cdn.example.com/doc.pdf",
+            key="doc.pdf",
+            title="doc.pdf",
+            user=user,
+            content_type=ContentType.PDF,
+            status=DocumentStatus.READY,
+        )
+        session = Session(session_token="token", document=doc, user=user)
+        db.add_all([user, doc, session])
+        db.add_all(
+            Chat(
+                session_id="token",
+                message=f"message {i}",
+                role=Role.USER if i % 2 == 0 else Role.ASSISTANT,
+                created_at=START + timedelta(minutes=i),
+            )
+            for i in range(CHATS)
+        )
+        for i in range(3):
+            db.add(Session(session_token=f"other-{i}", document=doc, user=user))
+        await db.commit()
+        yield db
+
+
+@contextmanager
+def count_statements(engine):
+    statements = []
+
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", _count)
+    try:
+        yield statements
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", _count)
+
+
+async def test_get_session_is_one_statement(engine, db):
+    with count_statements(engine) as statements:
+        session, chats, next_cursor = await SessionService.get_session(
+            user_id=1, session_id="token", db=db, limit=2
+        )
+
+    assert len(statements) == 1
+    assert session.document_name == "doc.pdf"
+    assert [chat.message for chat in chats] == ["message 4", "message 3"]
+    assert next_cursor is not None
+
+
+async def test_get_session_with_cursor_is_one_statement(engine, db):
+    _, _, cursor = await SessionService.get_session(
+        user_id=1, session_id="token", db=db, limit=2
+    )
+
+    with count_statements(engine) as statements:
+        _, chats, _ = await SessionService.get_session(
+            user_id=1, session_id="token", db=db, limit=2, cursor=cursor
+        )
+
+    assert len(statements) == 1
+    assert [chat.message for chat in chats] == ["message 2", "message 1"]
+
+
+async def test_get_session_past_last_chat_is_one_statement(engine, db):
+    with count_statements(engine) as statements:
+        session, chats, next_cursor = await SessionService.get_session(
+            user_id=1, session_id="token", db=db, limit=2, offset=CHATS + 10
+        )
+
+    assert len(statements) == 1
+    assert session.session_token == "token"
+    assert chats == []
+    assert next_cursor is None
+
+
+async def test_get_sessions_is_one_statement(engine, db):
+    with count_statements(engine) as statements:
+        sessions, next_cursor = await SessionService.get_sessions(
+            user_id=1, db=db, limit=2
+        )
+
+    assert len(statements) == 1
+    assert len(sessions) == 2
+    assert next_cursor is not None
+
+
+async def test_prepare_chat_is_one_statement(engine, db):
+    with count_statements(engine) as statements:
+        session_token, query = await SessionService._prepare_chat(
+            session_id="token", user_id=1, message="next question", db=db
+        )
+
+    assert len(statements) == 1
+    assert session_token == "token"
+    assert query.doc_id == 1
+    assert [turn.content for turn in query.history] == [
+        f"message {i}" for i in range(CHATS)
+    ]